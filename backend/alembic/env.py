@@ -7,7 +7,7 @@ import asyncio
 
 from app.core.config import settings
 from app.core.database import Base
-from app.models import user, match, clip
+from app.models import user, match, clip, archive, matchmaking, challenge
 
 # this is the Alembic Config object
 config = context.config
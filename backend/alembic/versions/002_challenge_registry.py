@@ -0,0 +1,61 @@
+"""challenge registry
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17
+
+"""
+from datetime import timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('matches', sa.Column('challenge_code', sa.String(32), nullable=True))
+    op.add_column('matches', sa.Column('challenge_expires_at', sa.DateTime(), nullable=True))
+
+    # Backfill codes that were previously stored in extra_data, and give
+    # open invites the expiry new ones get so the sweep can retire them
+    matches = sa.table('matches',
+        sa.column('id', sa.String()),
+        sa.column('status', sa.String()),
+        sa.column('extra_data', sa.JSON()),
+        sa.column('created_at', sa.DateTime()),
+        sa.column('challenge_code', sa.String()),
+        sa.column('challenge_expires_at', sa.DateTime()),
+    )
+    ttl = timedelta(hours=settings.CHALLENGE_TTL_HOURS)
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(matches.c.id, matches.c.extra_data, matches.c.created_at)
+        .where(matches.c.status == 'PENDING')
+    ).fetchall()
+    for match_id, extra_data, created_at in rows:
+        bind.execute(
+            matches.update().where(matches.c.id == match_id).values(
+                challenge_code=(extra_data or {}).get('challenge_code') or None,
+                challenge_expires_at=created_at + ttl,
+            )
+        )
+
+    op.create_index('ix_matches_challenge_code', 'matches', ['challenge_code'], unique=True)
+    op.create_index(
+        'ix_matches_status_challenge_expires_at',
+        'matches',
+        ['status', 'challenge_expires_at']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_matches_status_challenge_expires_at', table_name='matches')
+    op.drop_index('ix_matches_challenge_code', table_name='matches')
+    op.drop_column('matches', 'challenge_expires_at')
+    op.drop_column('matches', 'challenge_code')
@@ -0,0 +1,32 @@
+"""match history indexes
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_matches_player1_status_completed_at',
+        'matches',
+        ['player1_id', 'status', 'completed_at']
+    )
+    op.create_index(
+        'ix_matches_player2_status_completed_at',
+        'matches',
+        ['player2_id', 'status', 'completed_at']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_matches_player2_status_completed_at', table_name='matches')
+    op.drop_index('ix_matches_player1_status_completed_at', table_name='matches')
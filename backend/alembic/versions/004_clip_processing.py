@@ -0,0 +1,26 @@
+"""clip processing status and rendition
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('clips', sa.Column('rendition_url', sa.String(), nullable=True))
+    op.add_column('clips', sa.Column('processing_status', sa.String(10), nullable=True))
+    op.create_index('ix_clips_processing_status', 'clips', ['processing_status'])
+
+
+def downgrade():
+    op.drop_index('ix_clips_processing_status', table_name='clips')
+    op.drop_column('clips', 'processing_status')
+    op.drop_column('clips', 'rendition_url')
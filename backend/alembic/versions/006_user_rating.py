@@ -0,0 +1,24 @@
+"""user elo rating
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('rating', sa.Float(), nullable=False, server_default='1500'))
+    op.add_column('users', sa.Column('rated_games', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('users', 'rated_games')
+    op.drop_column('users', 'rating')
@@ -0,0 +1,26 @@
+"""clip listing index
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_clips_match_id_uploaded_at',
+        'clips',
+        ['match_id', 'uploaded_at', 'id']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_clips_match_id_uploaded_at', table_name='clips')
@@ -0,0 +1,92 @@
+"""archive tables for finished matches and their clips
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Same columns as matches/clips, without foreign keys: archived rows are
+    # only ever read, and users may be deleted long after their games
+    op.create_table('matches_archive',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('player1_id', sa.String(), nullable=False),
+        sa.Column('player2_id', sa.String(), nullable=True),
+        sa.Column('mode', sa.String(6), nullable=False),
+        sa.Column('status', sa.String(9), nullable=False),
+        sa.Column('current_turn_user_id', sa.String(), nullable=True),
+        sa.Column('player1_letters', sa.Integer(), nullable=False),
+        sa.Column('player2_letters', sa.Integer(), nullable=False),
+        sa.Column('winner_id', sa.String(), nullable=True),
+        sa.Column('gps_anchor_lat', sa.Float(), nullable=True),
+        sa.Column('gps_anchor_lng', sa.Float(), nullable=True),
+        sa.Column('challenge_code', sa.String(32), nullable=True),
+        sa.Column('challenge_expires_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('last_activity', sa.DateTime(), nullable=True),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('extra_data', sa.JSON(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_matches_archive_player1_status_completed_at',
+        'matches_archive',
+        ['player1_id', 'status', 'completed_at']
+    )
+    op.create_index(
+        'ix_matches_archive_player2_status_completed_at',
+        'matches_archive',
+        ['player2_id', 'status', 'completed_at']
+    )
+
+    op.create_table('clips_archive',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('match_id', sa.String(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('clip_type', sa.String(11), nullable=False),
+        sa.Column('status', sa.String(8), nullable=False),
+        sa.Column('video_url', sa.String(), nullable=False),
+        sa.Column('thumbnail_url', sa.String(), nullable=True),
+        sa.Column('rendition_url', sa.String(), nullable=True),
+        sa.Column('processing_status', sa.String(10), nullable=True),
+        sa.Column('duration_seconds', sa.Float(), nullable=False),
+        sa.Column('file_size_bytes', sa.Integer(), nullable=False),
+        sa.Column('trick_name', sa.String(200), nullable=True),
+        sa.Column('trick_description', sa.String(500), nullable=True),
+        sa.Column('gps_lat', sa.Float(), nullable=False),
+        sa.Column('gps_lng', sa.Float(), nullable=False),
+        sa.Column('gps_distance_from_anchor_miles', sa.Float(), nullable=True),
+        sa.Column('gps_verified', sa.Boolean(), nullable=True),
+        sa.Column('watermark_data', sa.JSON(), nullable=True),
+        sa.Column('recorded_at', sa.DateTime(), nullable=False),
+        sa.Column('uploaded_at', sa.DateTime(), nullable=False),
+        sa.Column('judged_at', sa.DateTime(), nullable=True),
+        sa.Column('extra_data', sa.JSON(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_clips_archive_match_id_uploaded_at',
+        'clips_archive',
+        ['match_id', 'uploaded_at', 'id']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_clips_archive_match_id_uploaded_at', table_name='clips_archive')
+    op.drop_table('clips_archive')
+    op.drop_index('ix_matches_archive_player2_status_completed_at', table_name='matches_archive')
+    op.drop_index('ix_matches_archive_player1_status_completed_at', table_name='matches_archive')
+    op.drop_table('matches_archive')
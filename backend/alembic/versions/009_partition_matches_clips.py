@@ -0,0 +1,120 @@
+"""range-partition matches and clips by month (PostgreSQL)
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17
+
+"""
+from datetime import date, datetime
+from alembic import op
+import sqlalchemy as sa
+
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+# The partition maintenance job keeps topping this up once the app runs
+MONTHS_AHEAD = 3
+
+# table -> (partition key, foreign keys, indexes as (name, columns, unique))
+# PostgreSQL requires the partition key in every unique index on a
+# partitioned table, so the primary key becomes (id, <key>) and the
+# challenge code is unique per (challenge_code, created_at)
+TABLES = {
+    'matches': ('created_at', [
+        ('player1_id', 'users'),
+        ('player2_id', 'users'),
+        ('current_turn_user_id', 'users'),
+        ('winner_id', 'users'),
+    ], [
+        ('ix_matches_player1_id', ['player1_id'], False),
+        ('ix_matches_player2_id', ['player2_id'], False),
+        ('ix_matches_winner_id', ['winner_id'], False),
+        ('ix_matches_challenge_code', ['challenge_code'], True),
+        ('ix_matches_status_challenge_expires_at', ['status', 'challenge_expires_at'], False),
+        ('ix_matches_player1_status_completed_at', ['player1_id', 'status', 'completed_at'], False),
+        ('ix_matches_player2_status_completed_at', ['player2_id', 'status', 'completed_at'], False),
+    ]),
+    'clips': ('uploaded_at', [
+        ('user_id', 'users'),
+    ], [
+        ('ix_clips_match_id', ['match_id'], False),
+        ('ix_clips_user_id', ['user_id'], False),
+        ('ix_clips_processing_status', ['processing_status'], False),
+        ('ix_clips_match_id_uploaded_at', ['match_id', 'uploaded_at', 'id'], False),
+    ]),
+}
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_start(moment: datetime) -> date:
+    return date(moment.year, moment.month, 1)
+
+
+def create_partitions(table, key):
+    """DEFAULT partition plus one per month from the oldest row to MONTHS_AHEAD out"""
+    bind = op.get_bind()
+    oldest = bind.execute(sa.text(f'SELECT min({key}) FROM {table}_unpartitioned')).scalar()
+    this_month = month_start(datetime.utcnow())
+    month = month_start(oldest) if oldest else this_month
+
+    op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+    while month <= add_months(this_month, MONTHS_AHEAD):
+        op.execute(
+            f"CREATE TABLE {table}_p{month:%Y%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+        )
+        month = add_months(month, 1)
+
+
+def rebuild(table, partitioned):
+    """Copy a table into a partitioned (or back into a plain) table of the same name"""
+    key, foreign_keys, indexes = TABLES[table]
+    old = f'{table}_unpartitioned' if partitioned else f'{table}_partitioned'
+
+    op.rename_table(table, old)
+    partition_by = f' PARTITION BY RANGE ({key})' if partitioned else ''
+    op.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS){partition_by}')
+    if partitioned:
+        create_partitions(table, key)
+    op.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+
+    # CASCADE also drops clips.match_id -> matches.id, see upgrade()
+    op.execute(f'DROP TABLE {old} CASCADE')
+
+    # Constraints and indexes last: the names are free again and the copy
+    # above didn't have to maintain them row by row
+    op.create_primary_key(f'{table}_pkey', table, ['id', key] if partitioned else ['id'])
+    for column, target in foreign_keys:
+        op.create_foreign_key(f'{table}_{column}_fkey', table, target, [column], ['id'])
+    for name, columns, unique in indexes:
+        if unique and partitioned:
+            columns = columns + [key]
+        op.create_index(name, table, columns, unique=unique)
+
+
+def upgrade():
+    # Partitioning is PostgreSQL only; SQLite (tests, local dev) keeps plain tables
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # Rewrites both tables under an exclusive lock: run in a maintenance window.
+    # clips.match_id -> matches.id can't survive, a foreign key to a
+    # partitioned table has to carry its partition key. The app already
+    # writes clips only for matches it has just loaded
+    rebuild('matches', partitioned=True)
+    rebuild('clips', partitioned=True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    rebuild('matches', partitioned=False)
+    rebuild('clips', partitioned=False)
+    op.create_foreign_key('clips_match_id_fkey', 'clips', 'matches', ['match_id'], ['id'])
@@ -0,0 +1,24 @@
+"""clip processing lease
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('clips', sa.Column('processing_started_at', sa.DateTime(), nullable=True))
+    op.add_column('clips_archive', sa.Column('processing_started_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('clips_archive', 'processing_started_at')
+    op.drop_column('clips', 'processing_started_at')
@@ -0,0 +1,37 @@
+"""matchmaking queue table
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('matchmaking_queue',
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('mode', sa.String(6), nullable=False),
+        sa.Column('gps_lat', sa.Float(), nullable=False),
+        sa.Column('gps_lng', sa.Float(), nullable=False),
+        sa.Column('cell', sa.String(12), nullable=False),
+        sa.Column('joined_at', sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index(
+        'ix_matchmaking_queue_mode_cell_joined_at',
+        'matchmaking_queue',
+        ['mode', 'cell', 'joined_at']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_matchmaking_queue_mode_cell_joined_at', table_name='matchmaking_queue')
+    op.drop_table('matchmaking_queue')
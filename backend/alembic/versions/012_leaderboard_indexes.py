@@ -0,0 +1,26 @@
+"""leaderboard score indexes
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_users_wins_id', 'users', ['wins', 'id'])
+    op.create_index('ix_users_current_streak_id', 'users', ['current_streak', 'id'])
+    op.create_index('ix_users_rating_id', 'users', ['rating', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_users_rating_id', table_name='users')
+    op.drop_index('ix_users_current_streak_id', table_name='users')
+    op.drop_index('ix_users_wins_id', table_name='users')
@@ -0,0 +1,73 @@
+"""challenge code registry
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-17
+
+"""
+from datetime import timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('challenge_codes',
+        sa.Column('code', sa.String(32), nullable=False),
+        sa.Column('match_id', sa.String(), nullable=False),
+        sa.Column('match_created_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('code')
+    )
+    op.create_index('ix_challenge_codes_expires_at', 'challenge_codes', ['expires_at'])
+
+    # Open invites keep working across the upgrade. Ones carried over from
+    # before 002 may have no expiry yet; they get the TTL new ones get
+    matches = sa.table('matches',
+        sa.column('id', sa.String()),
+        sa.column('status', sa.String()),
+        sa.column('created_at', sa.DateTime()),
+        sa.column('challenge_code', sa.String()),
+        sa.column('challenge_expires_at', sa.DateTime()),
+    )
+    challenge_codes = sa.table('challenge_codes',
+        sa.column('code', sa.String()),
+        sa.column('match_id', sa.String()),
+        sa.column('match_created_at', sa.DateTime()),
+        sa.column('expires_at', sa.DateTime()),
+    )
+    ttl = timedelta(hours=settings.CHALLENGE_TTL_HOURS)
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(matches.c.id, matches.c.created_at, matches.c.challenge_code, matches.c.challenge_expires_at)
+        .where(matches.c.status == 'PENDING', matches.c.challenge_code.isnot(None))
+    ).fetchall()
+    codes = []
+    for match_id, created_at, code, expires_at in rows:
+        if expires_at is None:
+            expires_at = created_at + ttl
+            bind.execute(
+                matches.update()
+                .where(matches.c.id == match_id, matches.c.created_at == created_at)
+                .values(challenge_expires_at=expires_at)
+            )
+        codes.append({
+            'code': code,
+            'match_id': match_id,
+            'match_created_at': created_at,
+            'expires_at': expires_at,
+        })
+    if codes:
+        op.bulk_insert(challenge_codes, codes)
+
+
+def downgrade():
+    op.drop_index('ix_challenge_codes_expires_at', table_name='challenge_codes')
+    op.drop_table('challenge_codes')
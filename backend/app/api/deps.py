@@ -7,6 +7,7 @@ from sqlalchemy import select
 
 from app.core.database import AsyncSessionLocal
 from app.core.config import settings
+from app.core.principal_cache import principal_cache
 from app.models.user import User
 from app.schemas.user import TokenData
 
@@ -26,35 +27,51 @@ async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
 ) -> User:
-    """Get current authenticated user from JWT token"""
+    """
+    Get current authenticated user from JWT token
+    Validated tokens and user snapshots are served from principal_cache, so a
+    warm request costs no JWT decode and no DB round trip. The returned User
+    may be detached - load it through the session before modifying it
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
-        user_id: str = payload.get("sub")
-        if user_id is None:
+    token = credentials.credentials
+    user_id = principal_cache.get_token_subject(token)
+    
+    if user_id is None:
+        try:
+            payload = jwt.decode(
+                token,
+                settings.SECRET_KEY,
+                algorithms=[settings.ALGORITHM]
+            )
+            user_id = payload.get("sub")
+            if user_id is None:
+                raise credentials_exception
+            token_data = TokenData(user_id=user_id)
+        except JWTError:
             raise credentials_exception
-        token_data = TokenData(user_id=user_id)
-    except JWTError:
-        raise credentials_exception
+        
+        user_id = token_data.user_id
+        principal_cache.store_token(token, user_id, payload.get("exp"))
     
-    # Get user from database
-    result = await db.execute(
-        select(User).where(User.id == token_data.user_id)
-    )
-    user = result.scalar_one_or_none()
+    user = await principal_cache.get_user(user_id)
     
     if user is None:
-        raise credentials_exception
+        # Get user from database
+        result = await db.execute(
+            select(User).where(User.id == user_id)
+        )
+        user = result.scalar_one_or_none()
+        
+        if user is None:
+            raise credentials_exception
+        
+        await principal_cache.store_user(user)
     
     if not user.is_active:
         raise HTTPException(
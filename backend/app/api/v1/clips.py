@@ -1,26 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, or_, and_, func
+from botocore.exceptions import ClientError
 from datetime import datetime, timedelta
+from typing import AsyncIterator, List, Optional
+import math
 import uuid
 
+
 from app.api.deps import get_db, get_current_user
+from app.core.config import settings
+from app.core.validators import validate_clip_size
 from app.models.user import User
 from app.models.match import Match
-from app.models.clip import Clip, ClipTypeEnum
+from app.models.clip import Clip, ClipTypeEnum, ClipProcessingStatusEnum
 from app.schemas.clip import (
     ClipUploadRequest,
     ClipUploadResponse,
+    ClipUploadPartsResponse,
+    ClipUploadComplete,
+    UploadPartUrl,
+    UploadedPart,
     ClipResponse,
     ClipJudgement,
-    ClipListResponse
+    ClipListResponse,
+    ClipViewUrlResponse
 )
 from app.schemas.match import MatchResponse
+from app.services.archive import ArchiveService
 from app.services.game_service import GameService
+from app.services.match_cache import match_cache
+from app.services.partitions import clips_since
 from app.services.storage_service import StorageService
+from app.services.video import video_pipeline
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.serialization import RowResponse, RowSerializer, dumps
 
 router = APIRouter()
 
+clip_rows = RowSerializer(ClipResponse)
+
+CLIP_STREAM_BATCH_SIZE = 500
+
 
 @router.post("/upload/init", response_model=ClipUploadResponse)
 async def init_clip_upload(
@@ -29,11 +51,15 @@ async def init_clip_upload(
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Initialize clip upload - returns presigned S3 URL
+    Initialize clip upload - returns presigned S3 URL(s)
     Frontend uploads video directly to S3, then calls /upload/complete
+    Clips over MULTIPART_THRESHOLD_MB get a multipart upload instead: one URL
+    per part, uploadable in parallel and resumable via /upload/{clip_id}/parts
     """
+    validate_clip_size(upload_request.file_size_bytes)
+    
     # Get match
-    match = await db.get(Match, upload_request.match_id)
+    match = await match_cache.get(db, upload_request.match_id)
     if not match:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -43,8 +69,19 @@ async def init_clip_upload(
     # Validate user is in match and it's their turn
     await GameService.validate_turn(match, current_user.id)
     
+    clip_id = str(uuid.uuid4())
+    multipart = None
+    if upload_request.file_size_bytes > settings.MULTIPART_THRESHOLD_MB * 1024 * 1024:
+        part_size = settings.MULTIPART_PART_SIZE_MB * 1024 * 1024
+        multipart = {
+            "upload_id": await StorageService.create_multipart_upload(clip_id),
+            "part_size": part_size,
+            "part_count": math.ceil(upload_request.file_size_bytes / part_size),
+        }
+    
     # Create clip record
     clip = Clip(
+        id=clip_id,
         match_id=match.id,
         user_id=current_user.id,
         clip_type=upload_request.clip_type,
@@ -56,12 +93,29 @@ async def init_clip_upload(
         trick_description=upload_request.trick_description,
         recorded_at=datetime.utcnow(),
         video_url="",
+        extra_data={"multipart_upload": multipart} if multipart else None,
     )
     
     db.add(clip)
     await db.commit()
     await db.refresh(clip)
     
+    if multipart:
+        part_urls = await StorageService.generate_part_urls(
+            clip_id=clip.id,
+            upload_id=multipart["upload_id"],
+            part_numbers=list(range(1, multipart["part_count"] + 1)),
+            expires_in=settings.MULTIPART_URL_EXPIRE_SECONDS
+        )
+        
+        return ClipUploadResponse(
+            clip_id=clip.id,
+            expires_in=settings.MULTIPART_URL_EXPIRE_SECONDS,
+            upload_id=multipart["upload_id"],
+            part_size=multipart["part_size"],
+            part_urls=[UploadPartUrl(part_number=n, url=url) for n, url in part_urls]
+        )
+    
     # Generate presigned upload URL
     upload_url = await StorageService.generate_upload_url(
         clip_id=clip.id,
@@ -75,13 +129,88 @@ async def init_clip_upload(
     )
 
 
+@router.get("/upload/{clip_id}/parts", response_model=ClipUploadPartsResponse)
+async def get_upload_parts(
+    clip_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Resume a multipart upload
+    Returns the parts S3 already has and fresh URLs for the rest
+    """
+    clip = await get_own_clip(db, clip_id, current_user.id)
+    multipart = (clip.extra_data or {}).get("multipart_upload")
+    
+    if not multipart:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Clip has no multipart upload in progress"
+        )
+    
+    uploaded = await StorageService.list_uploaded_parts(clip.id, multipart["upload_id"])
+    uploaded_numbers = {part["part_number"] for part in uploaded}
+    missing = [n for n in range(1, multipart["part_count"] + 1) if n not in uploaded_numbers]
+    
+    part_urls = await StorageService.generate_part_urls(
+        clip_id=clip.id,
+        upload_id=multipart["upload_id"],
+        part_numbers=missing,
+        expires_in=settings.MULTIPART_URL_EXPIRE_SECONDS
+    )
+    
+    return ClipUploadPartsResponse(
+        clip_id=clip.id,
+        upload_id=multipart["upload_id"],
+        part_size=multipart["part_size"],
+        expires_in=settings.MULTIPART_URL_EXPIRE_SECONDS,
+        uploaded_parts=[UploadedPart(part_number=p["part_number"], etag=p["etag"]) for p in uploaded],
+        part_urls=[UploadPartUrl(part_number=n, url=url) for n, url in part_urls]
+    )
+
+
 @router.post("/upload/complete/{clip_id}", response_model=ClipResponse)
 async def complete_clip_upload(
     clip_id: str,
+    completion: Optional[ClipUploadComplete] = None,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Mark clip upload as complete and process based on type"""
+    """
+    Mark clip upload as complete and process based on type
+    For multipart uploads the part list is finalized first; if the body
+    has no parts, the parts S3 already holds are used
+    """
+    clip = await get_own_clip(db, clip_id, current_user.id)
+    match = await match_cache.get(db, clip.match_id)
+    
+    # Turn and GPS first: once S3 has stitched the parts there is no undo
+    await GameService.validate_clip(match, current_user.id, clip)
+    
+    multipart = (clip.extra_data or {}).get("multipart_upload")
+    if multipart:
+        await finish_multipart_upload(clip, multipart, completion.parts if completion else None)
+    
+    # Update video URL
+    clip.video_url = await StorageService.get_clip_url(clip.id)
+    if settings.VIDEO_PROCESSING_ENABLED:
+        clip.processing_status = ClipProcessingStatusEnum.QUEUED
+    
+    # Process based on clip type - commits the clip and match together
+    if clip.clip_type == ClipTypeEnum.TRICK_SET:
+        await GameService.submit_trick_set(db, match, current_user.id, clip)
+    else:
+        await GameService.submit_trick_attempt(db, match, current_user.id, clip)
+    
+    # Transcoding happens off the request; a full queue is retried later
+    if clip.processing_status == ClipProcessingStatusEnum.QUEUED:
+        video_pipeline.submit(clip.id)
+    
+    return clip
+
+
+async def get_own_clip(db: AsyncSession, clip_id: str, user_id: str) -> Clip:
+    """Load a clip the user uploaded, 404/403 otherwise"""
     clip = await db.get(Clip, clip_id)
     
     if not clip:
@@ -90,28 +219,52 @@ async def complete_clip_upload(
             detail="Clip not found"
         )
     
-    if clip.user_id != current_user.id:
+    if clip.user_id != user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not your clip"
         )
     
-    # Update video URL
-    clip.video_url = await StorageService.get_clip_url(clip.id)
-    
-    # Get match
-    match = await db.get(Match, clip.match_id)
+    return clip
+
+
+async def finish_multipart_upload(clip: Clip, multipart: dict, parts: Optional[List[UploadedPart]]) -> None:
+    """
+    Complete the S3 multipart upload once every part is there
+    Safe to retry: if an earlier attempt completed the upload but the
+    request failed afterwards, S3 no longer knows the upload id and the
+    object is already in place
+    """
+    try:
+        await complete_uploaded_parts(clip, multipart, parts)
+    except ClientError as e:
+        if not (e.response["Error"].get("Code") == "NoSuchUpload" and await StorageService.clip_exists(clip.id)):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Could not complete upload: {e.response['Error'].get('Code', 'error')}"
+            )
     
-    # Process based on clip type
-    if clip.clip_type == ClipTypeEnum.TRICK_SET:
-        await GameService.submit_trick_set(db, match, current_user.id, clip)
+    # Reassign so the JSON column is flagged as changed
+    extra_data = dict(clip.extra_data)
+    extra_data.pop("multipart_upload")
+    clip.extra_data = extra_data
+
+
+async def complete_uploaded_parts(clip: Clip, multipart: dict, parts: Optional[List[UploadedPart]]) -> None:
+    if parts is None:
+        uploaded = await StorageService.list_uploaded_parts(clip.id, multipart["upload_id"])
     else:
-        await GameService.submit_trick_attempt(db, match, current_user.id, clip)
+        uploaded = [part.model_dump() for part in parts]
     
-    await db.commit()
-    await db.refresh(clip)
+    uploaded_numbers = {part["part_number"] for part in uploaded}
+    missing = [n for n in range(1, multipart["part_count"] + 1) if n not in uploaded_numbers]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Upload incomplete, missing parts: {missing}"
+        )
     
-    return clip
+    await StorageService.complete_multipart_upload(clip.id, multipart["upload_id"], uploaded)
 
 
 @router.post("/judge", response_model=MatchResponse)
@@ -129,7 +282,7 @@ async def judge_clip(
             detail="Clip not found"
         )
     
-    match = await db.get(Match, clip.match_id)
+    match = await match_cache.get(db, clip.match_id)
     
     match = await GameService.judge_clip(
         db=db,
@@ -142,14 +295,99 @@ async def judge_clip(
     return match
 
 
-@router.get("/match/{match_id}", response_model=ClipListResponse)
+@router.get("/match/{match_id}", response_model=ClipListResponse, response_class=RowResponse)
 async def get_match_clips(
     match_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all clips for a match"""
-    match = await db.get(Match, match_id)
+    """
+    Get a match's clips, oldest first
+    Pass next_cursor from the previous page to continue
+    """
+    match = await get_player_match(db, match_id, current_user.id)
+    model = ArchiveService.clip_model(match)
+    
+    query = select(model).where(model.match_id == match_id, model.uploaded_at >= clips_since(match))
+    if cursor:
+        uploaded_at, clip_id = decode_cursor(cursor)
+        query = query.where(
+            or_(
+                model.uploaded_at > uploaded_at,
+                and_(model.uploaded_at == uploaded_at, model.id > clip_id)
+            )
+        )
+    
+    result = await db.execute(
+        query.order_by(model.uploaded_at.asc(), model.id.asc()).limit(limit + 1)
+    )
+    clips = result.scalars().all()
+    
+    next_cursor = None
+    if len(clips) > limit:
+        clips = clips[:limit]
+        next_cursor = encode_cursor(clips[-1].uploaded_at, clips[-1].id)
+    
+    total_result = await db.execute(
+        select(func.count()).select_from(model).where(
+            model.match_id == match_id,
+            model.uploaded_at >= clips_since(match)
+        )
+    )
+    
+    return RowResponse({
+        "clips": clip_rows.rows(clips),
+        "total": total_result.scalar_one(),
+        "next_cursor": next_cursor
+    })
+
+
+@router.get("/match/{match_id}/stream")
+async def stream_match_clips(
+    match_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Every clip for a match as NDJSON, one ClipResponse per line, oldest first
+    Rows come off a server-side cursor in batches, so memory stays flat
+    however many clips the match has
+    """
+    match = await get_player_match(db, match_id, current_user.id)
+    
+    return StreamingResponse(
+        clip_ndjson_stream(db, ArchiveService.clip_model(match), match),
+        media_type="application/x-ndjson"
+    )
+
+
+async def clip_ndjson_stream(db: AsyncSession, model, match) -> AsyncIterator[bytes]:
+    """
+    One chunk per batch of clips
+    The request's session outlives the dependency here, so it is closed
+    once the stream ends or the client goes away
+    """
+    try:
+        result = await db.stream(
+            select(model)
+            .where(model.match_id == match.id, model.uploaded_at >= clips_since(match))
+            .order_by(model.uploaded_at.asc(), model.id.asc())
+            .execution_options(yield_per=CLIP_STREAM_BATCH_SIZE)
+        )
+        async for clips in result.scalars().partitions():
+            yield b"".join(dumps(row) + b"\n" for row in clip_rows.rows(clips))
+            # Done with this batch - don't let the identity map hold it
+            for clip in clips:
+                db.expunge(clip)
+    finally:
+        await db.close()
+
+
+async def get_player_match(db: AsyncSession, match_id: str, user_id: str):
+    """Load a match the user plays in, archived or not; 404/403 otherwise"""
+    match = await ArchiveService.get_match(db, match_id)
     
     if not match:
         raise HTTPException(
@@ -157,19 +395,47 @@ async def get_match_clips(
             detail="Match not found"
         )
     
+    if user_id not in [match.player1_id, match.player2_id]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not a player in this match"
+        )
+    
+    return match
+
+
+@router.get("/{clip_id}/url", response_model=ClipViewUrlResponse)
+async def get_clip_view_url(
+    clip_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get a short-lived presigned URL for watching a clip, archived ones included"""
+    clip = await ArchiveService.get_clip(db, clip_id)
+    
+    if not clip:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Clip not found"
+        )
+    
+    match = await ArchiveService.get_match(db, clip.match_id)
+    
+    # Nothing ties a clip to its match on partitioned PostgreSQL, so a clip
+    # can outlive a match that was dropped with its month
+    if not match:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Clip not found"
+        )
+    
     if current_user.id not in [match.player1_id, match.player2_id]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not a player in this match"
         )
     
-    result = await db.execute(
-        select(Clip).where(Clip.match_id == match_id)
-        .order_by(Clip.uploaded_at.asc())
-    )
-    clips = result.scalars().all()
+    # A cached URL has less than the full hour left; report what it really has
+    url, expires_in = await StorageService.generate_view_url_with_expiry(clip.id, expires_in=3600)
     
-    return ClipListResponse(
-        clips=clips,
-        total=len(clips)
-    )
+    return ClipViewUrlResponse(url=url, expires_in=expires_in)
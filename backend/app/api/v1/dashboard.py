@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, or_
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.api.deps import get_db, get_current_user
+from app.models.user import User
+from app.models.match import Match, MatchStatusEnum
+from app.models.clip import Clip, ClipStatusEnum, ClipTypeEnum
+from app.schemas.clip import ClipResponse
+from app.schemas.dashboard import DashboardMatch, DashboardResponse, OpponentSummary
+from app.schemas.match import MatchResponse
+from app.schemas.user import UserResponse
+
+router = APIRouter()
+
+
+@router.get("", response_model=DashboardResponse)
+async def get_dashboard(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Home screen: active matches with opponent profiles and clips to judge
+    Two SELECTs however many matches - players are joined in, pending
+    clips come in one IN query for all matches
+    """
+    result = await db.execute(
+        select(Match)
+        .where(
+            or_(
+                Match.player1_id == current_user.id,
+                Match.player2_id == current_user.id
+            ),
+            Match.status == MatchStatusEnum.ACTIVE
+        )
+        .options(
+            joinedload(Match.player1),
+            joinedload(Match.player2),
+            selectinload(
+                # Attempts still being uploaded, or rejected at completion,
+                # are PENDING too but have no video_url
+                Match.clips.and_(
+                    Clip.clip_type == ClipTypeEnum.TRICK_MATCH,
+                    Clip.status == ClipStatusEnum.PENDING,
+                    Clip.user_id != current_user.id,
+                    Clip.video_url != ""
+                )
+            )
+        )
+        .order_by(Match.last_activity.desc())
+    )
+    matches = result.unique().scalars().all()
+    
+    active_matches = []
+    for match in matches:
+        opponent = match.player2 if match.player1_id == current_user.id else match.player1
+        pending = sorted(match.clips, key=lambda clip: clip.uploaded_at)
+        active_matches.append(DashboardMatch(
+            **MatchResponse.model_validate(match).model_dump(),
+            opponent=OpponentSummary.model_validate(opponent) if opponent else None,
+            my_turn=match.current_turn_user_id == current_user.id,
+            awaiting_my_judgement=[ClipResponse.model_validate(clip) for clip in pending]
+        ))
+    
+    return DashboardResponse(
+        user=UserResponse.model_validate(current_user),
+        active_matches=active_matches,
+        awaiting_judgement_count=sum(len(m.awaiting_my_judgement) for m in active_matches)
+    )
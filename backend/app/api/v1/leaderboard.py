@@ -0,0 +1,68 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.api.deps import get_db, get_current_user
+from app.models.user import User
+from app.schemas.leaderboard import (
+    LeaderboardEntry,
+    LeaderboardResponse,
+    LeaderboardRankResponse
+)
+from app.services.leaderboard import Board, leaderboard
+
+router = APIRouter()
+
+
+@router.get("/{board}", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    board: Board,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Ranked players on a board (wins, streak or win_rate), best first
+    Win rate only ranks players with LEADERBOARD_MIN_GAMES or more
+    """
+    total, page = await leaderboard.page(db, board, offset, limit)
+    
+    usernames = {}
+    if page:
+        result = await db.execute(
+            select(User.id, User.username).where(User.id.in_([user_id for user_id, _ in page]))
+        )
+        usernames = dict(result.all())
+    
+    return LeaderboardResponse(
+        board=board,
+        total=total,
+        offset=offset,
+        entries=[
+            LeaderboardEntry(
+                rank=offset + position + 1,
+                user_id=user_id,
+                username=usernames.get(user_id, ""),
+                score=score
+            )
+            for position, (user_id, score) in enumerate(page)
+        ]
+    )
+
+
+@router.get("/{board}/me", response_model=LeaderboardRankResponse)
+async def get_my_rank(
+    board: Board,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Current user's rank on a board; page from rank - 1 to see neighbours"""
+    rank, score, total = await leaderboard.rank(db, board, current_user.id)
+    
+    return LeaderboardRankResponse(
+        board=board,
+        total=total,
+        rank=rank + 1 if rank is not None else None,
+        score=score
+    )
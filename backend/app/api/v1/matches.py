@@ -1,22 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_, and_, func
-from typing import List
-import secrets
+from sqlalchemy import select, or_, and_, func, union_all
 from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+import asyncio
+import json
 
 from app.api.deps import get_db, get_current_user
+from app.core.config import settings
 from app.models.user import User
 from app.models.match import Match, MatchStatusEnum
+from app.models.archive import ArchivedMatch
 from app.schemas.match import (
     MatchCreate,
+    MatchJoin,
     MatchResponse,
-    MatchListResponse
+    MatchListResponse,
+    MatchmakingResponse
 )
+from app.services.archive import ArchiveService
 from app.services.game_service import GameService
+from app.services.match_cache import match_cache
+from app.services.challenge_service import ChallengeService
+from app.services.matchmaking import matchmaking_queue
+from app.services.notification import notification_bus, match_event
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.serialization import RowResponse, RowSerializer
 
 router = APIRouter()
 
+MATCH_OVER_EVENTS = ("match_completed", "match_forfeited")
+
+match_rows = RowSerializer(MatchResponse)
+
 
 @router.post("/challenge/create", response_model=dict)
 async def create_challenge(
@@ -28,29 +45,20 @@ async def create_challenge(
     Create a challenge invite code that another player can accept
     Returns a challenge code that can be shared via QR/link
     """
-    # Generate unique challenge code
-    challenge_code = secrets.token_urlsafe(8)
-    
-    # Store challenge in match with pending status
-    match = Match(
+    match = await ChallengeService.create_challenge(
+        db=db,
         player1_id=current_user.id,
-        player2_id=None,  # Will be filled when someone accepts
         mode=match_data.mode,
-        status=MatchStatusEnum.PENDING,
-        gps_anchor_lat=match_data.gps_lat,
-        gps_anchor_lng=match_data.gps_lng,
-        extra_data={"challenge_code": challenge_code}
+        gps_lat=match_data.gps_lat,
+        gps_lng=match_data.gps_lng
     )
     
-    db.add(match)
-    await db.commit()
-    await db.refresh(match)
-    
     return {
         "match_id": match.id,
-        "challenge_code": challenge_code,
-        "share_url": f"sk8://challenge/{challenge_code}",
-        "mode": match.mode.value
+        "challenge_code": match.challenge_code,
+        "share_url": f"sk8://challenge/{match.challenge_code}",
+        "mode": match.mode.value,
+        "expires_at": match.challenge_expires_at
     }
 
 
@@ -64,44 +72,43 @@ async def accept_challenge(
     Accept a challenge using the challenge code
     Activates the match and returns full match details
     """
-    # Find pending matches
-    result = await db.execute(
-        select(Match).where(Match.status == MatchStatusEnum.PENDING)
+    return await ChallengeService.accept_challenge(db, challenge_code, current_user.id)
+
+
+@router.post("/queue/join", response_model=MatchmakingResponse)
+async def join_matchmaking(
+    join_data: MatchJoin,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Join the matchmaking queue for nearby players
+    Returns the new match if someone within range was already waiting
+    """
+    match = await matchmaking_queue.join(
+        db,
+        user_id=current_user.id,
+        mode=join_data.mode,
+        gps_lat=join_data.gps_lat,
+        gps_lng=join_data.gps_lng
     )
-    matches = result.scalars().all()
-    
-    # Find the one with matching challenge code
-    match = None
-    for m in matches:
-        if m.extra_data and m.extra_data.get('challenge_code') == challenge_code:
-            match = m
-            break
     
     if not match:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Challenge not found or already accepted"
-        )
-    
-    if match.player1_id == current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot accept your own challenge"
-        )
-    
-    # Accept the challenge
-    match.player2_id = current_user.id
-    match.status = MatchStatusEnum.ACTIVE
-    match.current_turn_user_id = match.player1_id  # P1 sets first trick
-    match.started_at = datetime.utcnow()
-    
-    await db.commit()
-    await db.refresh(match)
+        return MatchmakingResponse(status="waiting")
     
-    return match
+    return MatchmakingResponse(status="matched", match=match)
+
+
+@router.delete("/queue", status_code=status.HTTP_204_NO_CONTENT)
+async def leave_matchmaking(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Leave the matchmaking queue"""
+    await matchmaking_queue.leave(db, current_user.id)
 
 
-@router.get("/active", response_model=MatchListResponse)
+@router.get("/active", response_model=MatchListResponse, response_class=RowResponse)
 async def get_active_matches(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
@@ -120,52 +127,93 @@ async def get_active_matches(
     )
     matches = result.scalars().all()
     
-    return MatchListResponse(
-        matches=matches,
-        total=len(matches)
-    )
+    return RowResponse({
+        "matches": match_rows.rows(matches),
+        "total": len(matches),
+        "next_cursor": None
+    })
 
 
-@router.get("/history", response_model=MatchListResponse)
+@router.get("/history", response_model=MatchListResponse, response_class=RowResponse)
 async def get_match_history(
-    limit: int = 20,
-    offset: int = 0,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get match history for current user"""
-    result = await db.execute(
-        select(Match).where(
-            and_(
-                or_(
-                    Match.player1_id == current_user.id,
-                    Match.player2_id == current_user.id
-                ),
-                Match.status == MatchStatusEnum.COMPLETED
-            )
-        ).order_by(Match.completed_at.desc())
-        .limit(limit)
-        .offset(offset)
-    )
-    matches = result.scalars().all()
+    """
+    Get match history for current user, newest first
+    Pass next_cursor from the previous page to continue
+    """
+    after = decode_cursor(cursor) if cursor else None
+    
+    # Recent games are in the hot table, older ones in the archive - page
+    # through both and merge
+    matches = []
+    for model in (Match, ArchivedMatch):
+        result = await db.execute(history_page(model, current_user.id, after, limit + 1))
+        matches.extend(result.scalars().all())
+    matches.sort(key=lambda m: (m.completed_at, m.id), reverse=True)
+    
+    next_cursor = None
+    if len(matches) > limit:
+        matches = matches[:limit]
+        next_cursor = encode_cursor(matches[-1].completed_at, matches[-1].id)
     
     # Get total count
-    count_result = await db.execute(
-        select(Match).where(
-            and_(
-                or_(
-                    Match.player1_id == current_user.id,
-                    Match.player2_id == current_user.id
-                ),
-                Match.status == MatchStatusEnum.COMPLETED
+    total_result = await db.execute(
+        select(sum(
+            select(func.count()).select_from(model).where(
+                player_column == current_user.id,
+                model.status == MatchStatusEnum.COMPLETED
+            ).scalar_subquery()
+            for model in (Match, ArchivedMatch)
+            for player_column in (model.player1_id, model.player2_id)
+        ))
+    )
+    
+    return RowResponse({
+        "matches": match_rows.rows(matches),
+        "total": total_result.scalar_one(),
+        "next_cursor": next_cursor
+    })
+
+
+def history_page(model, user_id: str, after: Optional[Tuple[datetime, str]], limit: int):
+    """
+    SELECT for one page of a player's completed matches in one table, newest
+    first, starting after the (completed_at, id) keyset position
+    """
+    keyset = []
+    if after:
+        completed_at, match_id = after
+        keyset.append(
+            or_(
+                model.completed_at < completed_at,
+                and_(model.completed_at == completed_at, model.id < match_id)
             )
         )
-    )
-    total = len(count_result.scalars().all())
     
-    return MatchListResponse(
-        matches=matches,
-        total=total
+    # One index range scan per player column, merged and trimmed to the page
+    branches = [
+        select(model.id)
+        .where(
+            player_column == user_id,
+            model.status == MatchStatusEnum.COMPLETED,
+            *keyset
+        )
+        .order_by(model.completed_at.desc(), model.id.desc())
+        .limit(limit)
+        .subquery()
+        for player_column in (model.player1_id, model.player2_id)
+    ]
+    page_ids = union_all(*(select(branch.c.id) for branch in branches)).subquery()
+    
+    return (
+        select(model)
+        .join(page_ids, model.id == page_ids.c.id)
+        .order_by(model.completed_at.desc(), model.id.desc())
+        .limit(limit)
     )
 
 
@@ -175,8 +223,8 @@ async def get_match(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get specific match details"""
-    match = await db.get(Match, match_id)
+    """Get specific match details, archived ones included"""
+    match = await ArchiveService.get_match(db, match_id)
     
     if not match:
         raise HTTPException(
@@ -191,12 +239,71 @@ async def get_match(
             detail="Not a player in this match"
         )
     
-    # Check for timeout
-    await GameService.validate_timeout(match, db)
-    
     return match
 
 
+@router.get("/{match_id}/events")
+async def stream_match_events(
+    match_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Server-sent events for a match, replacing polling GET /matches/{id}
+    Opens with a snapshot of the current state, then one event per move
+    """
+    match = await ArchiveService.get_match(db, match_id)
+    
+    if not match:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Match not found"
+        )
+    
+    if current_user.id not in [match.player1_id, match.player2_id]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not a player in this match"
+        )
+    
+    # The stream can stay open for hours - don't hold a DB connection for it
+    await db.close()
+    
+    return StreamingResponse(
+        match_event_stream(request, db, match.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def match_event_stream(request: Request, db: AsyncSession, match_id: str) -> AsyncIterator[str]:
+    """Format bus events for one match as SSE, with keepalive comments"""
+    async with notification_bus.subscribe(match_id) as events:
+        # The snapshot is read after subscribing: a move committed before the
+        # read is in it, a later one is queued. A move in between shows up in
+        # both, which is harmless since every event carries the full state
+        match = await db.get(Match, match_id, populate_existing=True)
+        if match is None:
+            match = await db.get(ArchivedMatch, match_id)
+        await db.close()
+        
+        yield f"event: snapshot\ndata: {json.dumps(match_event('snapshot', match), default=str)}\n\n"
+        if match.status not in (MatchStatusEnum.PENDING, MatchStatusEnum.ACTIVE):
+            return
+        
+        while not await request.is_disconnected():
+            try:
+                event_type, data = await asyncio.wait_for(events.get(), settings.SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            
+            yield f"event: {event_type}\ndata: {data}\n\n"
+            if event_type in MATCH_OVER_EVENTS:
+                return
+
+
 @router.post("/{match_id}/forfeit", response_model=MatchResponse)
 async def forfeit_match(
     match_id: str,
@@ -204,7 +311,7 @@ async def forfeit_match(
     db: AsyncSession = Depends(get_db)
 ):
     """Forfeit an active match"""
-    match = await db.get(Match, match_id)
+    match = await match_cache.get(db, match_id)
     
     if not match:
         raise HTTPException(
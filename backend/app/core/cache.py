@@ -0,0 +1,248 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Hashable, Iterable, Optional, Type
+import asyncio
+import enum
+import json
+import logging
+import time
+
+from sqlalchemy import DateTime, Enum, inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "sk8:invalidate"
+
+
+class TTLCache:
+    """Bounded in-process LRU cache where every entry also expires after a TTL"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class InvalidationRelay:
+    """
+    Drops other workers' local copies of deleted TieredCache entries
+    Every TieredCache.delete is published on one Redis channel; each worker
+    holds a single subscription and clears the key from its own local tier
+    """
+
+    def __init__(self):
+        self.caches: Dict[str, "TieredCache"] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    def register(self, cache: "TieredCache") -> None:
+        self.caches[cache.namespace] = cache
+
+    async def start(self) -> None:
+        if get_redis() is not None and self._listener is None:
+            self._listener = asyncio.create_task(self._listen(), name="cache-invalidation-listener")
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    @property
+    def relaying(self) -> bool:
+        """True while invalidations from other workers are arriving over Redis"""
+        return self._listener is not None
+
+    async def publish(self, namespace: str, key: str) -> None:
+        await get_redis().publish(INVALIDATION_CHANNEL, json.dumps([namespace, key]))
+
+    async def _listen(self) -> None:
+        """Apply invalidations published by any worker, reconnecting on errors"""
+        while True:
+            try:
+                pubsub = get_redis().pubsub()
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    namespace, key = json.loads(message["data"])
+                    cache = self.caches.get(namespace)
+                    if cache is not None:
+                        cache.local.delete(key)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Redis invalidation subscription lost, retrying", exc_info=True)
+                await asyncio.sleep(1)
+
+
+invalidation_relay = InvalidationRelay()
+
+
+class TieredCache:
+    """
+    In-process TTLCache in front of an optional shared Redis tier
+    Values are JSON-compatible dicts. Redis errors are logged and treated as
+    misses so a Redis outage only costs extra DB reads. The local tier is
+    only used when no other worker can change an entry behind its back: a
+    single worker, or invalidations arriving through invalidation_relay
+    """
+
+    def __init__(self, namespace: str, max_entries: int, ttl_seconds: int):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.local = TTLCache(max_entries, ttl_seconds)
+        self._pending: set = set()
+        invalidation_relay.register(self)
+
+    def _redis_key(self, key: str) -> str:
+        return f"sk8:{self.namespace}:{key}"
+
+    @property
+    def local_enabled(self) -> bool:
+        return settings.WEB_CONCURRENCY == 1 or invalidation_relay.relaying
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.local_enabled:
+            value = self.local.get(key)
+            if value is not None:
+                return value
+
+        redis = get_redis()
+        if redis is None:
+            return None
+
+        try:
+            raw = await redis.get(self._redis_key(key))
+        except Exception:
+            logger.warning("Redis read failed for %s", self.namespace, exc_info=True)
+            return None
+
+        if raw is None:
+            return None
+
+        value = json.loads(raw)
+        if self.local_enabled:
+            self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        if self.local_enabled:
+            self.local.set(key, value)
+
+        redis = get_redis()
+        if redis is None:
+            return
+
+        try:
+            await redis.set(self._redis_key(key), json.dumps(value), ex=self.ttl_seconds)
+        except Exception:
+            logger.warning("Redis write failed for %s", self.namespace, exc_info=True)
+
+    async def delete(self, key: str) -> None:
+        self.local.delete(key)
+
+        redis = get_redis()
+        if redis is None:
+            return
+
+        try:
+            await redis.delete(self._redis_key(key))
+            await invalidation_relay.publish(self.namespace, key)
+        except Exception:
+            logger.warning("Redis delete failed for %s", self.namespace, exc_info=True)
+
+    def discard(self, key: str) -> None:
+        """
+        Invalidate from synchronous code (ORM event hooks)
+        The local tier is cleared at once; the Redis delete and the
+        invalidation for other workers are scheduled
+        """
+        self.local.delete(key)
+
+        if get_redis() is None:
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        task = loop.create_task(self.delete(key))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def wait_pending(self) -> None:
+        """Wait for invalidations scheduled by discard, for short-lived scripts"""
+        await asyncio.gather(*self._pending, return_exceptions=True)
+
+
+def snapshot_model(instance, exclude: Iterable[str] = ()) -> Dict[str, Any]:
+    """JSON-compatible dict of a mapped instance's column values"""
+    data = {}
+    for attr in inspect(type(instance)).column_attrs:
+        if attr.key in exclude:
+            continue
+        value = getattr(instance, attr.key)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, enum.Enum):
+            value = value.value
+        data[attr.key] = value
+    return data
+
+
+def restore_model(model: Type, data: Dict[str, Any]):
+    """
+    Rebuild a detached instance from snapshot_model output
+    The instance is not bound to any session; merge(load=False) to attach it
+    """
+    values = {}
+    for attr in inspect(model).column_attrs:
+        if attr.key not in data:
+            continue
+        value = data[attr.key]
+        column_type = attr.columns[0].type
+        if value is not None:
+            if isinstance(column_type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(column_type, Enum) and column_type.enum_class is not None:
+                value = column_type.enum_class(value)
+        values[attr.key] = value
+
+    instance = model(**values)
+    make_transient_to_detached(instance)
+    return instance
@@ -8,11 +8,19 @@ class Settings(BaseSettings):
     
     # Redis
     REDIS_URL: str
+    REDIS_ENABLED: bool = False
+    # Worker processes, as gunicorn reads it. More than one needs Redis,
+    # which carries match events and cache invalidations between workers
+    WEB_CONCURRENCY: int = 1
     
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 10080
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_CONCURRENCY: int = 4
     
     # Storage
     S3_BUCKET_NAME: str
@@ -20,20 +28,63 @@ class Settings(BaseSettings):
     AWS_ACCESS_KEY_ID: str
     AWS_SECRET_ACCESS_KEY: str
     S3_ENDPOINT_URL: str | None = None
+    PRESIGNED_URL_CACHE_SIZE: int = 10000
+    PRESIGNED_URL_CACHE_TTL_SECONDS: int = 1800
     
     # App
     ENVIRONMENT: str = "development"
     DEBUG: bool = True
     ALLOWED_ORIGINS: List[str] = ["http://localhost:3000"]
+    METRICS_ENABLED: bool = True
+    METRICS_DIR: str = ""  # Shared by the workers of one host; empty for a single process
+    METRICS_FLUSH_SECONDS: int = 5
+    METRICS_TOKEN: str = ""  # Bearer token /metrics requires, when set
+    QUERY_INSPECTOR_ENABLED: bool = False
+    SLOW_QUERY_MS: int = 200
+    N_PLUS_ONE_THRESHOLD: int = 5  # Same-shape statements in one request
     
     # Match Settings
     NORMAL_MODE_TIMEOUT_MINUTES: int = 2
     LONG_MODE_TIMEOUT_HOURS: int = 6
     GPS_RADIUS_MILES: float = 1.0
+    MATCHMAKING_WAIT_MINUTES: int = 30  # Queue entries older than this are never paired
+    CHALLENGE_TTL_HOURS: int = 24
+    CHALLENGE_SWEEP_INTERVAL_SECONDS: int = 300
+    TURN_SCHEDULER_INTERVAL_SECONDS: int = 5
+    TURN_SCHEDULER_BATCH_SIZE: int = 100
+    TURN_SCHEDULER_REBUILD_MINUTES: int = 60
     
     # Video Settings
     MAX_CLIP_DURATION_SECONDS: int = 30
     MAX_CLIP_SIZE_MB: int = 50
+    MULTIPART_THRESHOLD_MB: int = 8
+    MULTIPART_PART_SIZE_MB: int = 5  # S3 minimum for every part but the last
+    MULTIPART_URL_EXPIRE_SECONDS: int = 3600
+    UPLOAD_ABANDON_HOURS: int = 24  # Clips initialized but never completed are deleted after this
+    UPLOAD_CLEANUP_INTERVAL_MINUTES: int = 60
+    VIDEO_PROCESSING_ENABLED: bool = True
+    TRANSCODE_WORKERS: int = 2
+    TRANSCODE_QUEUE_SIZE: int = 100
+    TRANSCODE_MAX_HEIGHT: int = 720
+    TRANSCODE_CRF: int = 26
+    TRANSCODE_MAX_BITRATE: str = "2M"
+    VIDEO_REQUEUE_INTERVAL_SECONDS: int = 60
+    TRANSCODE_LEASE_MINUTES: int = 30  # A PROCESSING clip unfinished after this is taken over
+    NOTIFICATION_QUEUE_SIZE: int = 100
+    SSE_KEEPALIVE_SECONDS: int = 15
+    MATCH_CACHE_MAX_ENTRIES: int = 10000
+    MATCH_CACHE_TTL_SECONDS: int = 300
+    LEADERBOARD_MIN_GAMES: int = 10  # Games before a player shows on win rate
+    LEADERBOARD_REBUILD_MINUTES: int = 60
+    RATING_K: float = 20.0
+    RATING_PROVISIONAL_K: float = 40.0
+    RATING_PROVISIONAL_GAMES: int = 30
+    ARCHIVE_AFTER_DAYS: int = 90  # Finished matches idle this long move to the archive tables
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_INTERVAL_MINUTES: int = 60
+    PARTITION_MONTHS_AHEAD: int = 3  # PostgreSQL only: monthly partitions kept created ahead
+    PARTITION_RETENTION_MONTHS: int = 0  # Drop partitions older than this, 0 keeps everything
+    PARTITION_MAINTENANCE_HOURS: int = 24
     
     class Config:
         env_file = ".env"
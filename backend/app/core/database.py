@@ -1,6 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import settings
+from app.core.metrics import InstrumentedQueuePool
 
 # SQLite doesn't support pool settings
 if settings.DATABASE_URL.startswith("sqlite"):
@@ -16,6 +17,7 @@ else:
         echo=settings.DEBUG,
         future=True,
         pool_pre_ping=True,
+        poolclass=InstrumentedQueuePool,
         pool_size=10,
         max_overflow=20,
     )
@@ -0,0 +1,414 @@
+"""
+Request and database metrics in Prometheus text format
+
+A pure ASGI middleware times every request and counts the SQL it ran, using
+SQLAlchemy cursor events and a per-request context var. The queue pool
+records how long each connection checkout waited. Everything lives in
+process memory with plain dict/list updates and no locks, since all of it
+runs on the event loop thread, so it can stay on in production.
+
+Gunicorn workers share one port, so a scrape reaches whichever worker
+accepts it. With METRICS_DIR set, every worker writes a snapshot of its
+series to that directory every METRICS_FLUSH_SECONDS, and /metrics adds up
+all snapshots there. Counters and histograms of workers that have exited
+are kept, so totals never go backwards; their gauges are dropped
+"""
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import asyncio
+import json
+import logging
+import os
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import settings
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+UNMATCHED_ROUTE = "unmatched"
+_SQL_VERBS = frozenset(("SELECT", "INSERT", "UPDATE", "DELETE"))
+
+Labels = Tuple[str, ...]
+
+logger = logging.getLogger(__name__)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric(ABC):
+    type_name = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+
+    @abstractmethod
+    def snapshot(self) -> Dict[Labels, Any]:
+        """Copy of every series, safe to merge into or serialize"""
+
+    @abstractmethod
+    def combine(self, series: Dict[Labels, Any], labels: Labels, value: Any) -> None:
+        """Add one series from another worker's snapshot into series"""
+
+    @abstractmethod
+    def samples(self, series: Dict[Labels, Any]) -> List[str]:
+        """Exposition lines for the series, without HELP and TYPE"""
+
+    def render(self, series: Optional[Dict[Labels, Any]] = None) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.type_name}",
+            *self.samples(self.snapshot() if series is None else series),
+        ]
+
+
+class Gauge(Metric):
+    """Set directly, or read from a callback at scrape time"""
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], Optional[float]]] = None
+    ):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Labels, float] = {}
+        self._function = function
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) - amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def snapshot(self) -> Dict[Labels, float]:
+        if self._function is not None:
+            value = self._function()
+            return {} if value is None else {(): float(value)}
+        return dict(self._values)
+
+    def combine(self, series: Dict[Labels, float], labels: Labels, value: float) -> None:
+        series[labels] = series.get(labels, 0.0) + value
+
+    def samples(self, series: Dict[Labels, float]) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in series.items()
+        ]
+
+
+class Histogram(Metric):
+    """
+    Fixed buckets per label set: an observation is one bisect and three
+    in-place adds. Counts are stored per bucket and made cumulative on render
+    """
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Labels, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def total(self, *labels: str) -> float:
+        series = self._series.get(labels)
+        return series[1] if series else 0.0
+
+    def snapshot(self) -> Dict[Labels, list]:
+        return {labels: [list(counts), total, count] for labels, (counts, total, count) in self._series.items()}
+
+    def combine(self, series: Dict[Labels, list], labels: Labels, value: list) -> None:
+        mine = series.get(labels)
+        if mine is None:
+            series[labels] = [list(value[0]), value[1], value[2]]
+            return
+        mine[0] = [a + b for a, b in zip(mine[0], value[0])]
+        mine[1] += value[1]
+        mine[2] += value[2]
+
+    def samples(self, series: Dict[Labels, list]) -> List[str]:
+        lines = []
+        for labels, (counts, total, count) in series.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = bound if bound == "+Inf" else _format_value(bound)
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self) -> Dict[str, list]:
+        """JSON-ready copy of every metric: name -> [[labels, value], ...]"""
+        return {
+            name: [[list(labels), value] for labels, value in metric.snapshot().items()]
+            for name, metric in self._metrics.items()
+        }
+
+    def render(self, others: Iterable[Tuple[Dict[str, list], bool]] = ()) -> str:
+        """
+        Exposition text for this process, plus (snapshot, alive) pairs from
+        other workers; gauges are only taken from workers still running
+        """
+        others = list(others)
+        lines = []
+        for name, metric in self._metrics.items():
+            series = metric.snapshot()
+            for snapshot, alive in others:
+                if isinstance(metric, Gauge) and not alive:
+                    continue
+                for labels, value in snapshot.get(name, ()):
+                    metric.combine(series, tuple(labels), value)
+            lines.extend(metric.render(series))
+        return "\n".join(lines) + "\n"
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricsDirectory:
+    """
+    Per-worker snapshot files, one {pid}.json each, shared by the workers of
+    one host. Files are replaced atomically so readers never see half a write
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def write(self, snapshot: Dict[str, list]) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        target = os.path.join(self.path, f"{os.getpid()}.json")
+        staging = f"{target}.tmp"
+        with open(staging, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(staging, target)
+
+    def read_others(self) -> List[Tuple[Dict[str, list], bool]]:
+        """(snapshot, alive) for every other worker that has written one"""
+        try:
+            names = os.listdir(self.path)
+        except FileNotFoundError:
+            return []
+
+        others = []
+        for name in names:
+            pid_text, ext = os.path.splitext(name)
+            if ext != ".json" or not pid_text.isdigit() or int(pid_text) == os.getpid():
+                continue
+            try:
+                with open(os.path.join(self.path, name)) as f:
+                    others.append((json.load(f), _process_alive(int(pid_text))))
+            except (OSError, ValueError):
+                logger.warning("Skipping unreadable metrics snapshot %s", name, exc_info=True)
+        return others
+
+
+registry = MetricsRegistry()
+
+metrics_directory = MetricsDirectory(settings.METRICS_DIR) if settings.METRICS_DIR else None
+
+
+async def flush_metrics() -> None:
+    """Background job: publish this worker's series for whichever worker is scraped"""
+    if metrics_directory is None:
+        return
+    # Snapshot on the event loop, where the series are updated; write off it
+    snapshot = registry.snapshot()
+    await asyncio.to_thread(metrics_directory.write, snapshot)
+
+
+async def render_metrics() -> str:
+    """/metrics body: this worker's series plus every other worker's snapshot"""
+    others = []
+    if metrics_directory is not None:
+        others = await asyncio.to_thread(metrics_directory.read_others)
+    return registry.render(others)
+
+REQUEST_SECONDS = registry.register(Histogram(
+    "sk8_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+))
+REQUESTS_IN_PROGRESS = registry.register(Gauge(
+    "sk8_http_requests_in_progress",
+    "HTTP requests currently being handled",
+    ("method",),
+))
+REQUEST_QUERIES = registry.register(Histogram(
+    "sk8_http_request_db_queries",
+    "SQL statements executed per request",
+    ("method", "route"),
+    QUERY_COUNT_BUCKETS,
+))
+REQUEST_QUERY_SECONDS = registry.register(Histogram(
+    "sk8_http_request_db_seconds",
+    "Time spent in SQL per request",
+    ("method", "route"),
+))
+QUERY_SECONDS = registry.register(Histogram(
+    "sk8_db_query_duration_seconds",
+    "SQL statement latency by verb",
+    ("verb",),
+))
+POOL_CHECKOUT_SECONDS = registry.register(Histogram(
+    "sk8_db_pool_checkout_seconds",
+    "Time spent waiting for a pooled connection",
+))
+
+
+class RequestQueries:
+    """SQL counted against the request being handled"""
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+_request_queries: ContextVar[Optional[RequestQueries]] = ContextVar("sk8_request_queries", default=None)
+
+
+class MetricsMiddleware:
+    """Pure ASGI, so streaming responses pass through untouched"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        queries = RequestQueries()
+        token = _request_queries.set(queries)
+        REQUESTS_IN_PROGRESS.inc(method)
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = perf_counter() - start
+            REQUESTS_IN_PROGRESS.dec(method)
+            _request_queries.reset(token)
+
+            # Route template, not the raw path, so ids don't explode the label set
+            route = scope.get("route")
+            path = route.path if route is not None else UNMATCHED_ROUTE
+            REQUEST_SECONDS.observe(elapsed, method, path, str(status_code))
+            REQUEST_QUERIES.observe(queries.count, method, path)
+            REQUEST_QUERY_SECONDS.observe(queries.seconds, method, path)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._sk8_query_start = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = perf_counter() - context._sk8_query_start
+    verb = statement.lstrip()[:6].upper()
+    QUERY_SECONDS.observe(elapsed, verb if verb in _SQL_VERBS else "OTHER")
+
+    queries = _request_queries.get()
+    if queries is not None:
+        queries.count += 1
+        queries.seconds += elapsed
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Time every statement on the engine and expose its pool usage"""
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+    pool = sync_engine.pool
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        registry.register(Gauge(
+            "sk8_db_pool_checked_out",
+            "Connections currently checked out of the pool",
+            function=lambda: sync_engine.pool.checkedout(),
+        ))
+        registry.register(Gauge(
+            "sk8_db_pool_overflow",
+            "Connections open beyond pool_size",
+            function=lambda: max(sync_engine.pool.overflow(), 0),
+        ))
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited"""
+
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_SECONDS.observe(perf_counter() - start)
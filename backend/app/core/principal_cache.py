@@ -0,0 +1,81 @@
+from typing import Iterable, Optional
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.core.cache import TTLCache, TieredCache, snapshot_model, restore_model
+from app.core.config import settings
+from app.models.user import User
+
+_CHANGED_USERS_KEY = "sk8_changed_user_ids"
+
+
+class PrincipalCache:
+    """
+    Validated JWTs and user snapshots for get_current_user
+    Tokens are cached in-process only (decoding is cheaper than a Redis hop);
+    user snapshots also go to Redis when it is enabled. Any committed change
+    to a users row drops that user's snapshot, on every worker through the
+    invalidation relay
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.tokens = TTLCache(max_entries, ttl_seconds)
+        self.users = TieredCache("user", max_entries, ttl_seconds)
+
+    def get_token_subject(self, token: str) -> Optional[str]:
+        return self.tokens.get(token)
+
+    def store_token(self, token: str, user_id: str, expires_at: Optional[float]) -> None:
+        ttl = None
+        if expires_at is not None:
+            ttl = expires_at - time.time()
+            if ttl <= 0:
+                return
+        self.tokens.set(token, user_id, ttl)
+
+    async def get_user(self, user_id: str) -> Optional[User]:
+        """Detached User rebuilt from the cached snapshot, None on a miss"""
+        data = await self.users.get(user_id)
+        if data is None:
+            return None
+        return restore_model(User, data)
+
+    async def store_user(self, user: User) -> None:
+        # Never ship password hashes to the shared tier
+        await self.users.set(user.id, snapshot_model(user, exclude=("hashed_password",)))
+
+    def invalidate_user(self, user_id: str) -> None:
+        self.users.discard(user_id)
+
+    def clear(self) -> None:
+        self.tokens.clear()
+        self.users.local.clear()
+
+
+principal_cache = PrincipalCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
+
+
+def mark_users_changed(session, user_ids: Iterable[str]) -> None:
+    """Drop these users' snapshots when session commits (for Core UPDATEs)"""
+    session.info.setdefault(_CHANGED_USERS_KEY, set()).update(user_ids)
+
+
+@event.listens_for(User, "after_update")
+def _remember_changed_user(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_CHANGED_USERS_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    # Only after commit, so a concurrent miss cannot re-cache the old row
+    for user_id in session.info.pop(_CHANGED_USERS_KEY, ()):
+        principal_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session):
+    session.info.pop(_CHANGED_USERS_KEY, None)
@@ -0,0 +1,140 @@
+"""
+Opt-in slow query log and N+1 detector
+
+With QUERY_INSPECTOR_ENABLED, every statement slower than SLOW_QUERY_MS is
+logged with the route that ran it. At the end of each request, any
+statement shape that ran N_PLUS_ONE_THRESHOLD times or more is flagged as
+a likely N+1. The shape is the SQL text with whitespace and IN lists
+collapsed; SQLAlchemy already binds values as parameters.
+
+Tests use it through the query_inspector fixture:
+
+    with query_inspector.capture() as log:
+        await client.get(...)
+    assert not log.repeated(3)
+"""
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from time import perf_counter
+from typing import Iterator, List, Optional, Tuple
+import logging
+import re
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_PARAM = r"\s*(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)\s*"
+_PARAM_LIST = re.compile(rf"\({_PARAM}(?:,{_PARAM})+\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def statement_shape(statement: str) -> str:
+    """SQL with whitespace normalized and parameter lists collapsed to (...)"""
+    return _PARAM_LIST.sub("(...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def describe_route(scope: Optional[dict]) -> str:
+    """METHOD /route/template for a request scope, "-" outside a request"""
+    if not scope:
+        return "-"
+    route = scope.get("route")
+    return f"{scope.get('method', '')} {route.path if route is not None else scope.get('path', '')}".strip()
+
+
+class QueryLog:
+    """Statements run while a capture was active"""
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.statements: List[Tuple[str, float]] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def route(self) -> str:
+        return describe_route(self.scope)
+
+    def shapes(self) -> Counter:
+        return Counter(statement_shape(statement) for statement, _ in self.statements)
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """(shape, times) for shapes run at least threshold times, most first"""
+        return [(shape, times) for shape, times in self.shapes().most_common() if times >= threshold]
+
+
+class QueryInspector:
+    def __init__(self, slow_ms: float, n_plus_one_threshold: int):
+        self.slow_ms = slow_ms
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._current: ContextVar[Optional[QueryLog]] = ContextVar("sk8_query_log", default=None)
+
+    def install(self, engine: AsyncEngine) -> None:
+        sync_engine = engine.sync_engine
+        if not event.contains(sync_engine, "before_cursor_execute", self._before_cursor_execute):
+            event.listen(sync_engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(sync_engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def uninstall(self, engine: AsyncEngine) -> None:
+        sync_engine = engine.sync_engine
+        if event.contains(sync_engine, "before_cursor_execute", self._before_cursor_execute):
+            event.remove(sync_engine, "before_cursor_execute", self._before_cursor_execute)
+            event.remove(sync_engine, "after_cursor_execute", self._after_cursor_execute)
+
+    @contextmanager
+    def capture(self, scope: Optional[dict] = None) -> Iterator[QueryLog]:
+        """Collect statements run in this context; repeated shapes are reported on exit"""
+        log = QueryLog(scope)
+        token = self._current.set(log)
+        try:
+            yield log
+        finally:
+            self._current.reset(token)
+            self.report(log)
+
+    def report(self, log: QueryLog) -> None:
+        for shape, times in log.repeated(self.n_plus_one_threshold):
+            logger.warning("Possible N+1 in %s: %dx %s", log.route, times, shape[:300])
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._sk8_inspector_start = perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = perf_counter() - context._sk8_inspector_start
+        log = self._current.get()
+        if log is not None:
+            log.statements.append((statement, elapsed))
+
+        if elapsed * 1000 >= self.slow_ms:
+            logger.warning(
+                "Slow query %.1fms in %s: %s",
+                elapsed * 1000,
+                describe_route(log.scope if log is not None else None),
+                statement_shape(statement)[:500],
+            )
+
+
+class QueryInspectorMiddleware:
+    """Captures each HTTP request's statements so they can be reported together"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with query_inspector.capture(scope):
+            await self.app(scope, receive, send)
+
+
+query_inspector = QueryInspector(settings.SLOW_QUERY_MS, settings.N_PLUS_ONE_THRESHOLD)
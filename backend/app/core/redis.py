@@ -0,0 +1,21 @@
+from typing import Optional
+from app.core.config import settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Redis tier is optional
+    aioredis = None
+
+_client = None
+
+
+def get_redis() -> Optional["aioredis.Redis"]:
+    """Shared Redis client, or None when REDIS_ENABLED is off or redis isn't installed"""
+    global _client
+
+    if not settings.REDIS_ENABLED or aioredis is None:
+        return None
+
+    if _client is None:
+        _client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _client
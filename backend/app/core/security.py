@@ -1,9 +1,18 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Any, Union
 from jose import jwt
+import asyncio
 import bcrypt
 from app.core.config import settings
 
+# bcrypt releases the GIL, so a small thread pool takes hashing off the event
+# loop; its size is the cap on concurrent hashes per worker
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_CONCURRENCY,
+    thread_name_prefix="password-hash",
+)
+
 
 def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
     """Create JWT access token"""
@@ -30,6 +39,18 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     # Truncate to 72 bytes for bcrypt compatibility
     password_bytes = password.encode('utf-8')[:72]
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the hashing pool, without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash on the hashing pool, without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, get_password_hash, password)
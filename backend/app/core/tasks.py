@@ -0,0 +1,45 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[None]]
+
+
+async def run_periodically(name: str, interval_seconds: float, job: Job) -> None:
+    """Run a job forever, sleeping between runs. Failures are logged, never fatal"""
+    while True:
+        try:
+            await job()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Background job %s failed", name)
+        await asyncio.sleep(interval_seconds)
+
+
+class BackgroundJobs:
+    """Periodic jobs started and stopped with the app lifespan"""
+
+    def __init__(self):
+        self._jobs: List[tuple] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def add(self, name: str, interval_seconds: float, job: Job) -> None:
+        """Register a job to run every interval_seconds"""
+        self._jobs.append((name, interval_seconds, job))
+
+    def start(self) -> None:
+        for name, interval_seconds, job in self._jobs:
+            task = asyncio.create_task(run_periodically(name, interval_seconds, job), name=name)
+            self._tasks.append(task)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+
+background_jobs = BackgroundJobs()
@@ -1,7 +1,92 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from typing import Optional
+import hmac
+from fastapi import FastAPI, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.cache import invalidation_relay
 from app.core.config import settings
-from app.api.v1 import auth, matches, clips, health
+from app.core.database import engine
+from app.core.metrics import (
+    CONTENT_TYPE,
+    MetricsMiddleware,
+    flush_metrics,
+    instrument_engine,
+    metrics_directory,
+    render_metrics
+)
+from app.core.query_inspector import QueryInspectorMiddleware, query_inspector
+from app.core.tasks import background_jobs
+from app.api.v1 import auth, matches, clips, leaderboard, dashboard, health
+from app.services.archive import archive_old_matches
+from app.services.partitions import maintain_partitions
+from app.services.uploads import discard_abandoned_uploads
+from app.services.challenge_service import sweep_expired_challenges
+from app.services.game_service import enforce_turn_deadlines
+from app.services.video import requeue_pending_clips, video_pipeline
+from app.services.notification import notification_bus
+from app.services.leaderboard import rebuild_leaderboard
+
+background_jobs.add(
+    "challenge-sweep",
+    settings.CHALLENGE_SWEEP_INTERVAL_SECONDS,
+    sweep_expired_challenges,
+)
+background_jobs.add(
+    "turn-deadlines",
+    settings.TURN_SCHEDULER_INTERVAL_SECONDS,
+    enforce_turn_deadlines,
+)
+background_jobs.add(
+    "leaderboard-rebuild",
+    settings.LEADERBOARD_REBUILD_MINUTES * 60,
+    rebuild_leaderboard,
+)
+background_jobs.add(
+    "video-requeue",
+    settings.VIDEO_REQUEUE_INTERVAL_SECONDS,
+    requeue_pending_clips,
+)
+background_jobs.add(
+    "match-archival",
+    settings.ARCHIVE_INTERVAL_MINUTES * 60,
+    archive_old_matches,
+)
+background_jobs.add(
+    "upload-cleanup",
+    settings.UPLOAD_CLEANUP_INTERVAL_MINUTES * 60,
+    discard_abandoned_uploads,
+)
+if settings.METRICS_ENABLED and metrics_directory is not None:
+    background_jobs.add(
+        "metrics-flush",
+        settings.METRICS_FLUSH_SECONDS,
+        flush_metrics,
+    )
+if engine.dialect.name == "postgresql":
+    background_jobs.add(
+        "partition-maintenance",
+        settings.PARTITION_MAINTENANCE_HOURS * 3600,
+        maintain_partitions,
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.VIDEO_PROCESSING_ENABLED:
+        await video_pipeline.start()
+    await notification_bus.start()
+    await invalidation_relay.start()
+    background_jobs.start()
+    yield
+    await background_jobs.stop()
+    if settings.METRICS_ENABLED:
+        # Keep this worker's final counts in the totals after it exits
+        await flush_metrics()
+    await video_pipeline.stop()
+    await invalidation_relay.stop()
+    await notification_bus.stop()
+
 
 app = FastAPI(
     title="SK8 API",
@@ -9,6 +94,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/api/docs" if settings.DEBUG else None,
     redoc_url="/api/redoc" if settings.DEBUG else None,
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -19,6 +105,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.QUERY_INSPECTOR_ENABLED:
+    app.add_middleware(QueryInspectorMiddleware)
+    query_inspector.install(engine)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(engine)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics(authorization: Optional[str] = Header(None)):
+        if settings.METRICS_TOKEN and not hmac.compare_digest(
+            (authorization or "").encode(), f"Bearer {settings.METRICS_TOKEN}".encode()
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid metrics token"
+            )
+        return PlainTextResponse(await render_metrics(), media_type=CONTENT_TYPE)
+
+
 @app.get("/")
 async def root():
     return {
@@ -32,4 +138,6 @@ async def root():
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(matches.router, prefix="/api/v1/matches", tags=["matches"])
 app.include_router(clips.router, prefix="/api/v1/clips", tags=["clips"])
+app.include_router(dashboard.router, prefix="/api/v1/dashboard", tags=["dashboard"])
+app.include_router(leaderboard.router, prefix="/api/v1/leaderboard", tags=["leaderboard"])
 app.include_router(health.router, prefix="/api/v1", tags=["health"])
@@ -1,6 +1,9 @@
 from app.models.user import User, StanceEnum
 from app.models.match import Match, MatchModeEnum, MatchStatusEnum
-from app.models.clip import Clip, ClipTypeEnum, ClipStatusEnum
+from app.models.clip import Clip, ClipTypeEnum, ClipStatusEnum, ClipProcessingStatusEnum
+from app.models.archive import ArchivedMatch, ArchivedClip
+from app.models.matchmaking import MatchmakingEntry
+from app.models.challenge import ChallengeCode
 
 __all__ = [
     "User",
@@ -11,4 +14,9 @@ __all__ = [
     "Clip",
     "ClipTypeEnum",
     "ClipStatusEnum",
+    "ClipProcessingStatusEnum",
+    "ArchivedMatch",
+    "ArchivedClip",
+    "MatchmakingEntry",
+    "ChallengeCode",
 ]
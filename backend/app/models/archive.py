@@ -0,0 +1,48 @@
+from sqlalchemy import Column, DateTime, Index, Table
+from sqlalchemy.sql import func
+from app.core.database import Base
+from app.models.match import Match
+from app.models.clip import Clip
+
+
+def archive_columns(table: Table) -> list:
+    """Copies of a hot table's columns, minus foreign keys, indexes and defaults"""
+    return [
+        Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable)
+        for column in table.columns
+    ]
+
+
+class ArchivedMatch(Base):
+    """
+    COMPLETED/ABANDONED match moved out of `matches` by the archival job
+    Same columns as Match, read-only; its clips are in clips_archive
+    """
+    __table__ = Table(
+        "matches_archive",
+        Base.metadata,
+        *archive_columns(Match.__table__),
+        Column("archived_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+        # Match history reads the archive in the same (completed_at, id) order
+        Index("ix_matches_archive_player1_status_completed_at", "player1_id", "status", "completed_at"),
+        Index("ix_matches_archive_player2_status_completed_at", "player2_id", "status", "completed_at"),
+    )
+
+    def __repr__(self):
+        return f"<ArchivedMatch {self.id[:8]} - {self.mode.value} - {self.status.value}>"
+
+
+class ArchivedClip(Base):
+    """Clip of an archived match, same columns as Clip"""
+    __table__ = Table(
+        "clips_archive",
+        Base.metadata,
+        *archive_columns(Clip.__table__),
+        Column("archived_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+        Index("ix_clips_archive_match_id_uploaded_at", "match_id", "uploaded_at", "id"),
+    )
+
+    preview_sprite = Clip.preview_sprite
+
+    def __repr__(self):
+        return f"<ArchivedClip {self.id[:8]} - {self.trick_name} - {self.status.value}>"
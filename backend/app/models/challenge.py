@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, DateTime
+from app.core.database import Base
+
+
+class ChallengeCode(Base):
+    """
+    An open challenge invite: its code and the match it starts
+    Codes need to be unique across all matches, which the partitioned
+    matches table can't enforce (a unique index there has to include
+    created_at), so they live in this small plain table. The row also
+    carries the match's partition key, so accepting reads one partition.
+    Rows go once the challenge is accepted or has expired
+    """
+    __tablename__ = "challenge_codes"
+
+    code = Column(String(32), primary_key=True)
+    match_id = Column(String, nullable=False)
+    match_created_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<ChallengeCode {self.code} - {self.match_id[:8]}>"
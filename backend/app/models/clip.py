@@ -1,7 +1,8 @@
-from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, Enum, ForeignKey, JSON
+from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, Enum, ForeignKey, Index, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
+from datetime import datetime
 import enum
 import uuid
 
@@ -18,6 +19,13 @@ class ClipStatusEnum(str, enum.Enum):
     DISPUTED = "disputed"
 
 
+class ClipProcessingStatusEnum(str, enum.Enum):
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    READY = "ready"
+    FAILED = "failed"
+
+
 class Clip(Base):
     __tablename__ = "clips"
 
@@ -28,12 +36,15 @@ class Clip(Base):
     user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
     
     # Clip Info
-    clip_type = Column(Enum(ClipTypeEnum), nullable=False)
-    status = Column(Enum(ClipStatusEnum), nullable=False, default=ClipStatusEnum.PENDING)
+    clip_type = Column(Enum(ClipTypeEnum, native_enum=False), nullable=False)
+    status = Column(Enum(ClipStatusEnum, native_enum=False), nullable=False, default=ClipStatusEnum.PENDING)
     
     # Video Storage
     video_url = Column(String, nullable=False)
     thumbnail_url = Column(String)
+    rendition_url = Column(String)  # Normalized, lower-bitrate copy for reviewers
+    processing_status = Column(Enum(ClipProcessingStatusEnum, native_enum=False), index=True)
+    processing_started_at = Column(DateTime(timezone=True))  # When a worker claimed it
     duration_seconds = Column(Float, nullable=False)
     file_size_bytes = Column(Integer, nullable=False)
     
@@ -52,7 +63,9 @@ class Clip(Base):
     
     # Timestamps
     recorded_at = Column(DateTime(timezone=True), nullable=False)
-    uploaded_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Set in Python: SQLite's CURRENT_TIMESTAMP has whole seconds and a
+    # different text form than bound datetimes, which breaks keyset paging
+    uploaded_at = Column(DateTime(timezone=True), default=datetime.utcnow, server_default=func.now(), nullable=False)
     judged_at = Column(DateTime(timezone=True))
     
     # Extra data (renamed from 'metadata' to avoid SQLAlchemy conflict)
@@ -62,5 +75,19 @@ class Clip(Base):
     match = relationship("Match", back_populates="clips")
     user = relationship("User", back_populates="clips")
 
+    __table_args__ = (
+        # Clip listing pages walk a match's clips in (uploaded_at, id) order
+        Index("ix_clips_match_id_uploaded_at", "match_id", "uploaded_at", "id"),
+        # On PostgreSQL, range-partitioned by month on this column (migration 009).
+        # The primary key there is (id, uploaded_at) and match_id has no
+        # database-level foreign key; the ORM mapping is unchanged
+        {"info": {"partition_key": "uploaded_at"}},
+    )
+
+    @property
+    def preview_sprite(self):
+        """Timeline sprite layout written by the video pipeline, if any"""
+        return (self.extra_data or {}).get("preview_sprite")
+
     def __repr__(self):
         return f"<Clip {self.id[:8]} - {self.trick_name} - {self.status.value}>"
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, Enum, ForeignKey, JSON
+from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, Enum, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
+from datetime import datetime
 import enum
 import uuid
 
@@ -29,8 +30,8 @@ class Match(Base):
     player2_id = Column(String, ForeignKey("users.id"), nullable=True, index=True)  # Nullable for pending challenges
     
     # Match Config
-    mode = Column(Enum(MatchModeEnum), nullable=False, default=MatchModeEnum.NORMAL)
-    status = Column(Enum(MatchStatusEnum), nullable=False, default=MatchStatusEnum.PENDING)
+    mode = Column(Enum(MatchModeEnum, native_enum=False), nullable=False, default=MatchModeEnum.NORMAL)
+    status = Column(Enum(MatchStatusEnum, native_enum=False), nullable=False, default=MatchStatusEnum.PENDING)
     
     # Game State
     current_turn_user_id = Column(String, ForeignKey("users.id"))
@@ -44,12 +45,19 @@ class Match(Base):
     gps_anchor_lat = Column(Float)
     gps_anchor_lng = Column(Float)
     
+    # Challenge invite (unique code for O(1) accept lookups)
+    challenge_code = Column(String(32), unique=True, index=True)
+    challenge_expires_at = Column(DateTime(timezone=True))
+    
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, server_default=func.now(), nullable=False)
     started_at = Column(DateTime(timezone=True))
     completed_at = Column(DateTime(timezone=True))
     last_activity = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    # Bumped on every write; UPDATEs only apply to the version they read
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    
     # Extra data
     extra_data = Column(JSON)
     
@@ -60,5 +68,19 @@ class Match(Base):
     winner = relationship("User", foreign_keys=[winner_id])
     clips = relationship("Clip", back_populates="match", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Lets the challenge sweep find stale PENDING invites without a table scan
+        Index("ix_matches_status_challenge_expires_at", "status", "challenge_expires_at"),
+        # Match history pages walk these in (completed_at, id) order per player
+        Index("ix_matches_player1_status_completed_at", "player1_id", "status", "completed_at"),
+        Index("ix_matches_player2_status_completed_at", "player2_id", "status", "completed_at"),
+        # On PostgreSQL, range-partitioned by month on this column (migration 009).
+        # The primary key there is (id, created_at) and challenge codes are
+        # only unique per (challenge_code, created_at), so the challenge_codes
+        # registry enforces them; the ORM mapping is unchanged
+        {"info": {"partition_key": "created_at"}},
+    )
+    __mapper_args__ = {"version_id_col": version}
+
     def __repr__(self):
         return f"<Match {self.id[:8]} - {self.mode.value} - {self.status.value}>"
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, Float, DateTime, Enum, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+from app.models.match import MatchModeEnum
+
+
+class MatchmakingEntry(Base):
+    """
+    A player waiting for an opponent
+    Kept in the database rather than in process memory so players whose
+    requests land on different workers still find each other
+    """
+    __tablename__ = "matchmaking_queue"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    mode = Column(Enum(MatchModeEnum, native_enum=False), nullable=False)
+    gps_lat = Column(Float, nullable=False)
+    gps_lng = Column(Float, nullable=False)
+    cell = Column(String(12), nullable=False)  # Geohash at the queue's precision
+    joined_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Partner search reads the few cells around a player, oldest first
+        Index("ix_matchmaking_queue_mode_cell_joined_at", "mode", "cell", "joined_at"),
+    )
+
+    def __repr__(self):
+        return f"<MatchmakingEntry {self.user_id[:8]} - {self.mode.value} - {self.cell}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, Enum
+from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -20,12 +20,14 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     
     # Skater Identity
-    stance = Column(Enum(StanceEnum), nullable=False)
+    stance = Column(Enum(StanceEnum, native_enum=False), nullable=False)
     
     # Stats
     wins = Column(Integer, default=0, nullable=False)
     losses = Column(Integer, default=0, nullable=False)
     current_streak = Column(Integer, default=0, nullable=False)
+    rating = Column(Float, default=1500.0, server_default="1500", nullable=False)  # Elo
+    rated_games = Column(Integer, default=0, server_default="0", nullable=False)
     
     # Profile
     display_name = Column(String(100))
@@ -46,5 +48,12 @@ class User(Base):
     matches_as_p2 = relationship("Match", foreign_keys="Match.player2_id", back_populates="player2")
     clips = relationship("Clip", back_populates="user")
 
+    __table_args__ = (
+        # Leaderboard pages and ranks without Redis walk these in score order
+        Index("ix_users_wins_id", "wins", "id"),
+        Index("ix_users_current_streak_id", "current_streak", "id"),
+        Index("ix_users_rating_id", "rating", "id"),
+    )
+
     def __repr__(self):
         return f"<User {self.username} ({self.stance.value})>"
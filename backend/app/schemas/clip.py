@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional
-from app.models.clip import ClipTypeEnum, ClipStatusEnum
+from app.models.clip import ClipTypeEnum, ClipStatusEnum, ClipProcessingStatusEnum
 
 
 class ClipUploadRequest(BaseModel):
@@ -16,11 +16,61 @@ class ClipUploadRequest(BaseModel):
     trick_description: Optional[str] = Field(None, max_length=500)
 
 
+class UploadPartUrl(BaseModel):
+    """Presigned URL for one part of a multipart upload"""
+    part_number: int
+    url: str
+
+
+class UploadedPart(BaseModel):
+    """A part the client has finished uploading"""
+    part_number: int = Field(..., ge=1, le=10000)
+    etag: str
+
+
 class ClipUploadResponse(BaseModel):
-    """Schema for upload URL response"""
+    """
+    Schema for upload URL response
+    Small clips get a single upload_url; large clips get a multipart upload
+    with one URL per part_size chunk that can be uploaded in parallel
+    """
+    clip_id: str
+    upload_url: Optional[str] = None
+    expires_in: int
+    upload_id: Optional[str] = None
+    part_size: Optional[int] = None
+    part_urls: list[UploadPartUrl] = []
+
+
+class ClipUploadPartsResponse(BaseModel):
+    """Schema for resuming a multipart upload"""
     clip_id: str
-    upload_url: str
+    upload_id: str
+    part_size: int
     expires_in: int
+    uploaded_parts: list[UploadedPart]
+    part_urls: list[UploadPartUrl]
+
+
+class ClipUploadComplete(BaseModel):
+    """Schema for finishing an upload; parts are only used for multipart"""
+    parts: Optional[list[UploadedPart]] = None
+
+
+class ClipViewUrlResponse(BaseModel):
+    """Schema for a presigned clip view URL"""
+    url: str
+    expires_in: int
+
+
+class ClipPreviewSprite(BaseModel):
+    """Timeline sprite sheet: tile i covers [i, i + 1) * interval_seconds"""
+    url: str
+    columns: int
+    rows: int
+    tile_width: int
+    tile_height: int
+    interval_seconds: float
 
 
 class ClipResponse(BaseModel):
@@ -32,6 +82,9 @@ class ClipResponse(BaseModel):
     status: ClipStatusEnum
     video_url: str
     thumbnail_url: Optional[str] = None
+    preview_sprite: Optional[ClipPreviewSprite] = None
+    rendition_url: Optional[str] = None
+    processing_status: Optional[ClipProcessingStatusEnum] = None
     duration_seconds: float
     file_size_bytes: int
     trick_name: Optional[str] = None
@@ -59,3 +112,4 @@ class ClipListResponse(BaseModel):
     """Schema for list of clips"""
     clips: list[ClipResponse]
     total: int
+    next_cursor: Optional[str] = None
@@ -0,0 +1,36 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from app.models.user import StanceEnum
+from app.schemas.clip import ClipResponse
+from app.schemas.match import MatchResponse
+from app.schemas.user import UserResponse
+
+
+class OpponentSummary(BaseModel):
+    """Public profile bits shown next to a match"""
+    id: str
+    username: str
+    display_name: Optional[str] = None
+    avatar_url: Optional[str] = None
+    stance: StanceEnum
+    wins: int
+    losses: int
+    current_streak: int
+    rating: float
+
+    class Config:
+        from_attributes = True
+
+
+class DashboardMatch(MatchResponse):
+    """Active match with everything the home screen draws for it"""
+    opponent: Optional[OpponentSummary] = None
+    my_turn: bool
+    awaiting_my_judgement: List[ClipResponse] = []
+
+
+class DashboardResponse(BaseModel):
+    """Schema for the app's home screen in one request"""
+    user: UserResponse
+    active_matches: List[DashboardMatch]
+    awaiting_judgement_count: int
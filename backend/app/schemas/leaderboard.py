@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from app.services.leaderboard import Board
+
+
+class LeaderboardEntry(BaseModel):
+    """One ranked player"""
+    rank: int  # 1-based
+    user_id: str
+    username: str
+    score: float
+
+
+class LeaderboardResponse(BaseModel):
+    """Schema for a page of a leaderboard"""
+    board: Board
+    total: int
+    offset: int
+    entries: List[LeaderboardEntry]
+
+
+class LeaderboardRankResponse(BaseModel):
+    """Schema for the current user's standing on a board"""
+    board: Board
+    total: int
+    rank: Optional[int] = None  # 1-based, None until the player qualifies
+    score: Optional[float] = None
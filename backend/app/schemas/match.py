@@ -53,3 +53,10 @@ class MatchListResponse(BaseModel):
     """Schema for list of matches"""
     matches: list[MatchResponse]
     total: int
+    next_cursor: Optional[str] = None
+
+
+class MatchmakingResponse(BaseModel):
+    """Schema for matchmaking queue state"""
+    status: str  # "waiting" or "matched"
+    match: Optional[MatchResponse] = None
@@ -31,6 +31,7 @@ class UserResponse(UserBase):
     wins: int
     losses: int
     current_streak: int
+    rating: float
     is_active: bool
     is_verified: bool
     created_at: datetime
@@ -1,2 +1,3 @@
 from app.services.game_service import GameService
 from app.services.storage_service import StorageService
+from app.services.challenge_service import ChallengeService
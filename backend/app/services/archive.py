@@ -0,0 +1,136 @@
+"""
+Hot/cold archival of finished matches
+
+Matches that finished more than ARCHIVE_AFTER_DAYS ago move, together with
+their clips, from matches/clips into matches_archive/clips_archive in
+batches: one INSERT ... SELECT and one DELETE per table per batch, each
+batch its own transaction. Every worker runs the job; the batch's matches
+are locked with SKIP LOCKED so concurrent runs take disjoint batches. The
+hot tables keep only live and recent games,
+so the active-match, turn and dashboard queries and their indexes stay
+small. Read paths that can reach an old match go through get_match /
+get_clip, which fall back to the archive
+"""
+from datetime import datetime, timedelta
+from typing import List, Optional, Union
+import logging
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.archive import ArchivedClip, ArchivedMatch
+from app.models.clip import Clip
+from app.models.match import Match, MatchStatusEnum
+from app.services.match_cache import match_cache
+from app.services.notification import notification_bus
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = (MatchStatusEnum.COMPLETED, MatchStatusEnum.ABANDONED)
+
+AnyMatch = Union[Match, ArchivedMatch]
+AnyClip = Union[Clip, ArchivedClip]
+
+
+def archivable_matches(cutoff: datetime, batch_size: int):
+    """
+    Ids of the next finished matches to archive, locked until commit
+    A concurrent run skips locked rows rather than archiving them twice;
+    SQLite has no row locks and ignores the clause
+    """
+    return (
+        select(Match.id)
+        .where(
+            Match.status.in_(FINISHED_STATUSES),
+            Match.last_activity < cutoff
+        )
+        .order_by(Match.last_activity)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+
+
+class ArchiveService:
+    """Moves finished matches to the archive tables and reads them back"""
+
+    @staticmethod
+    async def archive_batch(db: AsyncSession, cutoff: datetime, batch_size: int) -> List[str]:
+        """Archive up to batch_size matches last active before cutoff, returns their ids"""
+        result = await db.execute(archivable_matches(cutoff, batch_size))
+        match_ids = list(result.scalars().all())
+        if not match_ids:
+            return []
+
+        clip_columns = [column.name for column in Clip.__table__.columns]
+        match_columns = [column.name for column in Match.__table__.columns]
+
+        # Clips first: they reference the match rows being removed
+        await db.execute(
+            insert(ArchivedClip.__table__).from_select(
+                clip_columns,
+                select(*Clip.__table__.columns).where(Clip.match_id.in_(match_ids))
+            )
+        )
+        await db.execute(
+            insert(ArchivedMatch.__table__).from_select(
+                match_columns,
+                select(*Match.__table__.columns).where(Match.id.in_(match_ids))
+            )
+        )
+        await db.execute(delete(Clip).where(Clip.match_id.in_(match_ids)))
+        await db.execute(delete(Match).where(Match.id.in_(match_ids)))
+        await db.commit()
+
+        for match_id in match_ids:
+            match_cache.discard(match_id)
+            # Other workers drop their cached copy when this reaches them
+            await notification_bus.publish({"type": "match_archived", "match_id": match_id})
+        return match_ids
+
+    @staticmethod
+    async def archive_finished_matches(
+        db: AsyncSession,
+        older_than: timedelta,
+        batch_size: int = settings.ARCHIVE_BATCH_SIZE
+    ) -> int:
+        """Archive every finished match idle for longer than older_than, returns count"""
+        cutoff = datetime.utcnow() - older_than
+        archived = 0
+        while True:
+            batch = await ArchiveService.archive_batch(db, cutoff, batch_size)
+            archived += len(batch)
+            if len(batch) < batch_size:
+                return archived
+
+    @staticmethod
+    async def get_match(db: AsyncSession, match_id: str) -> Optional[AnyMatch]:
+        """Match by id from the hot table (through the cache), else the archive"""
+        match = await match_cache.get(db, match_id)
+        if match is None:
+            match = await db.get(ArchivedMatch, match_id)
+        return match
+
+    @staticmethod
+    async def get_clip(db: AsyncSession, clip_id: str) -> Optional[AnyClip]:
+        clip = await db.get(Clip, clip_id)
+        if clip is None:
+            clip = await db.get(ArchivedClip, clip_id)
+        return clip
+
+    @staticmethod
+    def clip_model(match: AnyMatch):
+        """Table holding a match's clips"""
+        return ArchivedClip if isinstance(match, ArchivedMatch) else Clip
+
+
+async def archive_old_matches() -> None:
+    """Background job: move matches finished ARCHIVE_AFTER_DAYS ago to the archive"""
+    async with AsyncSessionLocal() as db:
+        archived = await ArchiveService.archive_finished_matches(
+            db, timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+        )
+
+    if archived:
+        logger.info("Archived %d finished matches", archived)
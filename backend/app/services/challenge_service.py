@@ -0,0 +1,176 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import delete, select, update, or_
+from fastapi import HTTPException, status
+from datetime import datetime, timedelta
+import logging
+import secrets
+import uuid
+
+from app.models.challenge import ChallengeCode
+from app.models.match import Match, MatchStatusEnum, MatchModeEnum
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.turn_scheduler import turn_scheduler
+from app.services.notification import notification_bus, match_event
+from app.services.match_cache import match_cache
+
+logger = logging.getLogger(__name__)
+
+
+class ChallengeService:
+    """Challenge invites, found through the challenge_codes registry"""
+
+    CODE_ATTEMPTS = 3
+
+    @staticmethod
+    def generate_code() -> str:
+        """Generate a short URL-safe challenge code"""
+        return secrets.token_urlsafe(8)
+
+    @staticmethod
+    async def create_challenge(
+        db: AsyncSession,
+        player1_id: str,
+        mode: MatchModeEnum,
+        gps_lat: float,
+        gps_lng: float
+    ) -> Match:
+        """Create a PENDING match that expires after CHALLENGE_TTL_HOURS"""
+        created_at = datetime.utcnow()
+        expires_at = created_at + timedelta(hours=settings.CHALLENGE_TTL_HOURS)
+
+        for _ in range(ChallengeService.CODE_ATTEMPTS):
+            code = ChallengeService.generate_code()
+            match = Match(
+                id=str(uuid.uuid4()),
+                player1_id=player1_id,
+                player2_id=None,  # Will be filled when someone accepts
+                mode=mode,
+                status=MatchStatusEnum.PENDING,
+                gps_anchor_lat=gps_lat,
+                gps_anchor_lng=gps_lng,
+                challenge_code=code,
+                challenge_expires_at=expires_at,
+                created_at=created_at,
+            )
+            db.add(match)
+            db.add(ChallengeCode(
+                code=code,
+                match_id=match.id,
+                match_created_at=created_at,
+                expires_at=expires_at,
+            ))
+            try:
+                await db.commit()
+            except IntegrityError:
+                # Code collision in the registry - roll back and draw again
+                await db.rollback()
+                continue
+
+            await db.refresh(match)
+            return match
+
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Could not allocate a challenge code, try again"
+        )
+
+    @staticmethod
+    async def accept_challenge(db: AsyncSession, challenge_code: str, user_id: str) -> Match:
+        """
+        Accept a challenge with two key lookups and one conditional update
+        The update only succeeds while the match is still PENDING and unexpired,
+        so two players racing for the same code cannot both join
+        """
+        entry = await db.get(ChallengeCode, challenge_code)
+        match = None
+        if entry is not None:
+            # Full partition key, so PostgreSQL reads a single partition
+            result = await db.execute(
+                select(Match).where(
+                    Match.id == entry.match_id,
+                    Match.created_at == entry.match_created_at
+                )
+            )
+            match = result.scalar_one_or_none()
+
+        if not match or match.status != MatchStatusEnum.PENDING:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Challenge not found or already accepted"
+            )
+
+        if match.player1_id == user_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cannot accept your own challenge"
+            )
+
+        now = datetime.utcnow()
+        result = await db.execute(
+            update(Match)
+            .where(
+                Match.id == match.id,
+                Match.status == MatchStatusEnum.PENDING,
+                or_(
+                    Match.challenge_expires_at.is_(None),
+                    Match.challenge_expires_at > now
+                )
+            )
+            .values(
+                player2_id=user_id,
+                status=MatchStatusEnum.ACTIVE,
+                current_turn_user_id=match.player1_id,  # P1 sets first trick
+                started_at=now,
+                last_activity=now,
+                version=match.version + 1,
+            )
+            .execution_options(synchronize_session="fetch")
+        )
+
+        if result.rowcount != 1:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Challenge not found or already accepted"
+            )
+
+        await db.execute(delete(ChallengeCode).where(ChallengeCode.code == challenge_code))
+        await db.commit()
+        await match_cache.store(match)
+        turn_scheduler.schedule_match(match)
+        await notification_bus.publish(match_event("match_started", match))
+
+        return match
+
+    @staticmethod
+    async def expire_stale_challenges(db: AsyncSession) -> int:
+        """Mark PENDING challenges past their TTL as ABANDONED, returns count"""
+        result = await db.execute(
+            update(Match)
+            .where(
+                Match.status == MatchStatusEnum.PENDING,
+                Match.challenge_expires_at <= datetime.utcnow()
+            )
+            .values(status=MatchStatusEnum.ABANDONED, version=Match.version + 1)
+            .returning(Match.id)
+            .execution_options(synchronize_session=False)
+        )
+        expired_ids = result.scalars().all()
+        await db.execute(delete(ChallengeCode).where(ChallengeCode.expires_at <= datetime.utcnow()))
+        await db.commit()
+
+        for match_id in expired_ids:
+            match_cache.discard(match_id)
+
+        return len(expired_ids)
+
+
+async def sweep_expired_challenges() -> None:
+    """Background job: expire stale challenge invites"""
+    async with AsyncSessionLocal() as db:
+        expired = await ChallengeService.expire_stale_challenges(db)
+
+    if expired:
+        logger.info("Expired %d stale challenges", expired)
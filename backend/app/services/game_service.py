@@ -1,14 +1,25 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy import select, update, and_
 from fastapi import HTTPException, status
 from datetime import datetime, timedelta
-from typing import Optional, Tuple
-import math
+from typing import List, Optional, Tuple
+import logging
 
 from app.models.match import Match, MatchStatusEnum, MatchModeEnum
 from app.models.clip import Clip, ClipTypeEnum, ClipStatusEnum
 from app.models.user import User
 from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.principal_cache import mark_users_changed
+from app.services.turn_scheduler import turn_scheduler, turn_deadline
+from app.services.notification import notification_bus, match_event
+from app.services.match_cache import match_cache
+from app.services.leaderboard import leaderboard, queue_stats_update
+from app.services.rating import RatingService
+from app.services.gps import haversine_miles
+
+logger = logging.getLogger(__name__)
 
 
 class GameService:
@@ -20,17 +31,7 @@ class GameService:
     @staticmethod
     def calculate_gps_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
         """Calculate distance between two GPS coordinates in miles using Haversine formula"""
-        R = 3959  # Earth's radius in miles
-        
-        lat1_rad = math.radians(lat1)
-        lat2_rad = math.radians(lat2)
-        delta_lat = math.radians(lat2 - lat1)
-        delta_lng = math.radians(lng2 - lng1)
-        
-        a = math.sin(delta_lat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lng / 2) ** 2
-        c = 2 * math.asin(math.sqrt(a))
-        
-        return R * c
+        return haversine_miles(lat1, lng1, lat2, lng2)
     
     @staticmethod
     async def create_match(
@@ -42,30 +43,51 @@ class GameService:
         gps_lng: float
     ) -> Match:
         """Create a new match between two players"""
-        
-        if player1_id == player2_id:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Cannot create match with yourself"
-            )
-        
-        # Create match with P1 starting first
-        match = Match(
-            player1_id=player1_id,
-            player2_id=player2_id,
-            mode=mode,
-            status=MatchStatusEnum.ACTIVE,
-            current_turn_user_id=player1_id,  # P1 sets first trick
-            gps_anchor_lat=gps_lat,
-            gps_anchor_lng=gps_lng,
-            started_at=datetime.utcnow()
+        matches = await GameService.create_matches(
+            db, [(player1_id, player2_id, mode, gps_lat, gps_lng)]
         )
-        
-        db.add(match)
+        return matches[0]
+    
+    @staticmethod
+    async def create_matches(
+        db: AsyncSession,
+        pairings: List[Tuple[str, str, MatchModeEnum, float, float]]
+    ) -> List[Match]:
+        """
+        Create many matches in a single commit
+        Each pairing is (player1_id, player2_id, mode, gps_lat, gps_lng)
+        """
+        now = datetime.utcnow()
+        matches = []
+        
+        for player1_id, player2_id, mode, gps_lat, gps_lng in pairings:
+            if player1_id == player2_id:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Cannot create match with yourself"
+                )
+            
+            # Create match with P1 starting first
+            matches.append(Match(
+                player1_id=player1_id,
+                player2_id=player2_id,
+                mode=mode,
+                status=MatchStatusEnum.ACTIVE,
+                current_turn_user_id=player1_id,  # P1 sets first trick
+                gps_anchor_lat=gps_lat,
+                gps_anchor_lng=gps_lng,
+                created_at=now,
+                started_at=now,
+                last_activity=now
+            ))
+        
+        db.add_all(matches)
         await db.commit()
-        await db.refresh(match)
         
-        return match
+        for match in matches:
+            turn_scheduler.schedule_match(match)
+        
+        return matches
     
     @staticmethod
     async def validate_turn(match: Match, user_id: str) -> None:
@@ -82,6 +104,21 @@ class GameService:
                 detail="Not your turn"
             )
     
+    @staticmethod
+    async def validate_clip(match: Match, user_id: str, clip: Clip) -> None:
+        """Check a clip can be submitted now: the user's turn and within GPS range"""
+        await GameService.validate_turn(match, user_id)
+        
+        gps_valid, distance = await GameService.validate_gps(match, clip.gps_lat, clip.gps_lng)
+        clip.gps_distance_from_anchor_miles = distance
+        clip.gps_verified = gps_valid
+        
+        if not gps_valid:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"GPS too far from anchor: {distance:.2f} miles (max: {settings.GPS_RADIUS_MILES})"
+            )
+    
     @staticmethod
     async def validate_gps(match: Match, clip_lat: float, clip_lng: float) -> Tuple[bool, float]:
         """
@@ -104,23 +141,69 @@ class GameService:
         return is_valid, distance
     
     @staticmethod
-    async def validate_timeout(match: Match, db: AsyncSession) -> None:
-        """Check if current player exceeded turn timeout"""
-        if match.status != MatchStatusEnum.ACTIVE:
-            return
+    async def expire_turns(db: AsyncSession, match_ids: List[str]) -> int:
+        """
+        Forfeit matches whose current player ran out of time, in one transaction
+        Each forfeit is a conditional update on the match version, so a move
+        that lands while the batch is running wins over the timeout
+        Returns the number of matches forfeited
+        """
+        if not match_ids:
+            return 0
         
-        if not match.last_activity:
-            return
+        result = await db.execute(
+            select(Match).where(
+                Match.id.in_(match_ids),
+                Match.status == MatchStatusEnum.ACTIVE
+            )
+        )
+        now = datetime.utcnow()
+        forfeited = []
+        
+        for match in result.scalars().all():
+            deadline = turn_deadline(match.mode, match.last_activity)
+            if deadline is None:
+                continue
+            if deadline > now:
+                # Someone moved since this deadline was scheduled
+                turn_scheduler.schedule(match.id, deadline)
+                continue
+            
+            # Current player timed out - opponent wins
+            loser_id = match.current_turn_user_id
+            winner_id = match.player2_id if loser_id == match.player1_id else match.player1_id
+            updated = await db.execute(
+                update(Match)
+                .where(
+                    Match.id == match.id,
+                    Match.status == MatchStatusEnum.ACTIVE,
+                    Match.version == match.version
+                )
+                .values(
+                    status=MatchStatusEnum.COMPLETED,
+                    winner_id=winner_id,
+                    completed_at=now,
+                    last_activity=match.last_activity,
+                    version=match.version + 1
+                )
+                .execution_options(synchronize_session="fetch")
+            )
+            if updated.rowcount != 1:
+                continue
+            
+            await GameService.update_player_stats(db, match)
+            forfeited.append(match)
         
-        # Calculate timeout based on mode
-        if match.mode == MatchModeEnum.NORMAL:
-            timeout_delta = timedelta(minutes=settings.NORMAL_MODE_TIMEOUT_MINUTES)
-        else:
-            timeout_delta = timedelta(hours=settings.LONG_MODE_TIMEOUT_HOURS)
+        await db.commit()
+        await leaderboard.apply_committed(db)
+        
+        for match in forfeited:
+            await match_cache.store(match)
+            await notification_bus.publish(
+                match_event("match_forfeited", match, forfeited_by=match.current_turn_user_id, reason="timeout")
+            )
         
-        if datetime.utcnow() > match.last_activity + timeout_delta:
-            # Current player timed out - they auto-forfeit
-            await GameService.forfeit_match(db, match, match.current_turn_user_id)
+        return len(forfeited)
     
     @staticmethod
     async def submit_trick_set(
@@ -133,18 +216,7 @@ class GameService:
         Player sets a trick (starts their turn)
         This means they're challenging opponent to match it
         """
-        await GameService.validate_turn(match, user_id)
-        
-        # Validate GPS
-        gps_valid, distance = await GameService.validate_gps(match, clip.gps_lat, clip.gps_lng)
-        clip.gps_distance_from_anchor_miles = distance
-        clip.gps_verified = gps_valid
-        
-        if not gps_valid:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"GPS too far from anchor: {distance:.2f} miles (max: {settings.GPS_RADIUS_MILES})"
-            )
+        await GameService.validate_clip(match, user_id, clip)
         
         # Auto-approve their set clip
         clip.status = ClipStatusEnum.APPROVED
@@ -155,8 +227,8 @@ class GameService:
         match.current_turn_user_id = opponent_id
         match.last_activity = datetime.utcnow()
         
-        await db.commit()
-        await db.refresh(match)
+        await GameService.commit_transition(db, match)
+        await notification_bus.publish(match_event("turn_switched", match, clip_id=clip.id))
         
         return match
     
@@ -171,25 +243,14 @@ class GameService:
         Player attempts to match opponent's trick
         Clip gets marked as pending - opponent must judge it
         """
-        await GameService.validate_turn(match, user_id)
-        
-        # Validate GPS
-        gps_valid, distance = await GameService.validate_gps(match, clip.gps_lat, clip.gps_lng)
-        clip.gps_distance_from_anchor_miles = distance
-        clip.gps_verified = gps_valid
-        
-        if not gps_valid:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"GPS too far from anchor: {distance:.2f} miles (max: {settings.GPS_RADIUS_MILES})"
-            )
+        await GameService.validate_clip(match, user_id, clip)
         
         # Leave as pending - opponent needs to judge
         clip.status = ClipStatusEnum.PENDING
         match.last_activity = datetime.utcnow()
         
-        await db.commit()
-        await db.refresh(match)
+        await GameService.commit_transition(db, match)
+        await notification_bus.publish(match_event("attempt_submitted", match, clip_id=clip.id))
         
         return match
     
@@ -256,8 +317,12 @@ class GameService:
             match.completed_at = datetime.utcnow()
             await GameService.update_player_stats(db, match)
         
-        await db.commit()
-        await db.refresh(match)
+        await GameService.commit_transition(db, match)
+        
+        event_type = "match_completed" if match.status == MatchStatusEnum.COMPLETED else "clip_judged"
+        await notification_bus.publish(
+            match_event(event_type, match, clip_id=clip.id, clip_status=clip.status.value)
+        )
         
         return match
     
@@ -285,28 +350,114 @@ class GameService:
         match.winner_id = match.player2_id if forfeiting_user_id == match.player1_id else match.player1_id
         match.completed_at = datetime.utcnow()
         
+        match.last_activity = datetime.utcnow()
+        
         await GameService.update_player_stats(db, match)
-        await db.commit()
-        await db.refresh(match)
+        await GameService.commit_transition(db, match)
+        await notification_bus.publish(
+            match_event("match_forfeited", match, forfeited_by=forfeiting_user_id, reason="forfeit")
+        )
         
         return match
     
+    @staticmethod
+    async def commit_transition(db: AsyncSession, match: Match) -> None:
+        """
+        Commit one game action as a single transaction
+        The match UPDATE is conditional on the version this request read
+        (mapper version_id_col); if another request moved first nothing is
+        written and the caller gets a 409 to reload and retry
+        """
+        match_id = match.id
+        try:
+            await db.commit()
+        except StaleDataError:
+            # Rollback expires match; our cached copy may be the stale one
+            await db.rollback()
+            match_cache.discard(match_id)
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Match was updated by another move, reload and try again"
+            )
+        
+        await match_cache.store(match)
+        await leaderboard.apply_committed(db)
+        turn_scheduler.schedule_match(match)
+    
     @staticmethod
     async def update_player_stats(db: AsyncSession, match: Match) -> None:
-        """Update win/loss records and streaks after match completion"""
+        """
+        Update win/loss records, streaks and ratings after match completion (caller commits)
+        Increments run in SQL, so concurrent results for the same player add up
+        """
         if not match.winner_id:
             return
         
-        winner = await db.get(User, match.winner_id)
         loser_id = match.player1_id if match.winner_id == match.player2_id else match.player2_id
-        loser = await db.get(User, loser_id)
         
-        if winner:
-            winner.wins += 1
-            winner.current_streak += 1
+        result = await db.execute(
+            select(User.id, User.rating, User.rated_games)
+            .where(User.id.in_([match.winner_id, loser_id]))
+        )
+        ratings = {row.id: row for row in result.all()}
+        winner_delta, loser_delta = RatingService.rating_deltas(
+            ratings[match.winner_id].rating,
+            ratings[match.winner_id].rated_games,
+            ratings[loser_id].rating,
+            ratings[loser_id].rated_games
+        )
         
-        if loser:
-            loser.losses += 1
-            loser.current_streak = 0
+        # Deltas are applied relative to the stored rating, so two results
+        # for the same player landing together both count
+        changes = {
+            match.winner_id: {
+                "wins": User.wins + 1,
+                "current_streak": User.current_streak + 1,
+                "rating": User.rating + winner_delta,
+                "rated_games": User.rated_games + 1,
+            },
+            loser_id: {
+                "losses": User.losses + 1,
+                "current_streak": 0,
+                "rating": User.rating + loser_delta,
+                "rated_games": User.rated_games + 1,
+            },
+        }
+        stats = (User.id, User.wins, User.losses, User.current_streak, User.rating)
+        rows = []
+        # Rows are locked in id order, not winner first: two matches between
+        # the same pair finishing together with opposite winners would
+        # otherwise lock them in opposite orders and deadlock
+        for user_id in sorted(changes):
+            result = await db.execute(
+                update(User)
+                .where(User.id == user_id)
+                .values(**changes[user_id])
+                .returning(*stats)
+                .execution_options(synchronize_session=False)
+            )
+            rows.extend(tuple(row) for row in result.all())
         
-        await db.commit()
+        # Core UPDATEs skip ORM events, so flag the cached principals directly
+        mark_users_changed(db, [match.winner_id, loser_id])
+        queue_stats_update(db, rows)
+
+
+async def enforce_turn_deadlines() -> None:
+    """Background job: forfeit matches whose turn deadline has passed"""
+    now = datetime.utcnow()
+    
+    if turn_scheduler.needs_rebuild(now):
+        async with AsyncSessionLocal() as db:
+            await turn_scheduler.rebuild(db)
+    
+    while True:
+        match_ids = turn_scheduler.pop_due(now, settings.TURN_SCHEDULER_BATCH_SIZE)
+        if not match_ids:
+            break
+        
+        async with AsyncSessionLocal() as db:
+            forfeited = await GameService.expire_turns(db, match_ids)
+        
+        if forfeited:
+            logger.info("Forfeited %d matches on turn timeout", forfeited)
@@ -0,0 +1,132 @@
+from typing import List, Sequence, Tuple, Union
+import math
+import numpy as np
+
+EARTH_RADIUS_MILES = 3959
+MILES_PER_DEGREE_LAT = 69.09
+
+Coordinates = Union[np.ndarray, Sequence[Tuple[float, float]]]
+
+
+def haversine_miles(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in miles (scalar)"""
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_lat = math.radians(lat2 - lat1)
+    delta_lng = math.radians(lng2 - lng1)
+
+    a = math.sin(delta_lat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lng / 2) ** 2
+    c = 2 * math.asin(math.sqrt(min(a, 1.0)))
+
+    return EARTH_RADIUS_MILES * c
+
+
+def batch_distances(points: Coordinates, anchors: Coordinates) -> np.ndarray:
+    """
+    Haversine distance in miles from every point to every anchor
+    points is (n, 2) and anchors is (m, 2) as (lat, lng) pairs; returns an
+    (n, m) matrix computed in one vectorized pass
+    """
+    points_rad = np.radians(np.asarray(points, dtype=np.float64).reshape(-1, 2))
+    anchors_rad = np.radians(np.asarray(anchors, dtype=np.float64).reshape(-1, 2))
+
+    lat1 = points_rad[:, 0:1]
+    lng1 = points_rad[:, 1:2]
+    lat2 = anchors_rad[:, 0]
+    lng2 = anchors_rad[:, 1]
+
+    a = (
+        np.sin((lat2 - lat1) * 0.5) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) * 0.5) ** 2
+    )
+    np.clip(a, 0.0, 1.0, out=a)
+
+    return (2 * EARTH_RADIUS_MILES) * np.arcsin(np.sqrt(a))
+
+
+def distances_from_anchor(points: Coordinates, anchor_lat: float, anchor_lng: float) -> np.ndarray:
+    """Distance in miles from each point to a single anchor, shape (n,)"""
+    return batch_distances(points, [(anchor_lat, anchor_lng)])[:, 0]
+
+
+def within_radius(points: Coordinates, anchors: Coordinates, radius_miles: float) -> np.ndarray:
+    """Boolean (n, m) mask of which points are within radius of which anchors"""
+    return batch_distances(points, anchors) <= radius_miles
+
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(lat: float, lng: float, precision: int) -> str:
+    """Encode a coordinate as a geohash string of the given length"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # Geohash interleaves bits starting with longitude
+
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits = bits << 1
+            rng[1] = mid
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """(lat_degrees, lng_degrees) covered by one cell at this precision"""
+    total_bits = precision * 5
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def geohash_precision_for_radius(radius_miles: float) -> int:
+    """Finest precision whose cells are still at least radius_miles tall"""
+    precision = 1
+    while precision < 12:
+        lat_degrees, _ = geohash_cell_size(precision + 1)
+        if lat_degrees * MILES_PER_DEGREE_LAT < radius_miles:
+            break
+        precision += 1
+    return precision
+
+
+def geohash_cells_within(lat: float, lng: float, radius_miles: float, precision: int) -> List[str]:
+    """
+    Every cell that intersects the bounding box of a radius around a point
+    At mid latitudes and a radius no larger than a cell this is the 3x3
+    neighbourhood; it widens towards the poles as cells narrow
+    """
+    cell_lat, cell_lng = geohash_cell_size(precision)
+    delta_lat = radius_miles / MILES_PER_DEGREE_LAT
+    cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+    delta_lng = min(radius_miles / (MILES_PER_DEGREE_LAT * cos_lat), 180.0)
+
+    lat_steps = math.ceil(delta_lat / cell_lat)
+    lng_steps = math.ceil(delta_lng / cell_lng)
+
+    cells = []
+    seen = set()
+    for i in range(-lat_steps, lat_steps + 1):
+        cell_center_lat = min(max(lat + i * cell_lat, -90.0), 90.0)
+        for j in range(-lng_steps, lng_steps + 1):
+            cell_center_lng = (lng + j * cell_lng + 180.0) % 360.0 - 180.0
+            cell = geohash_encode(cell_center_lat, cell_center_lng, precision)
+            if cell not in seen:
+                seen.add(cell)
+                cells.append(cell)
+    return cells
@@ -0,0 +1,271 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import enum
+import logging
+import uuid
+
+from sqlalchemy import Float, and_, cast, event, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.redis import get_redis
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+_PENDING_STATS_KEY = "sk8_leaderboard_stats"
+
+_CHANGED_KEY = "sk8:leaderboard:changed"
+_REBUILD_LOCK_KEY = "sk8:leaderboard:rebuild-lock"
+_REBUILD_LOCK_SECONDS = 600
+
+# Delete the lock only if it still holds our token; it may have expired
+# and been taken by another worker since
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# (user_id, wins, losses, current_streak, rating)
+StatsRow = Tuple[str, int, int, int, float]
+
+
+class Board(str, enum.Enum):
+    WINS = "wins"
+    STREAK = "streak"
+    WIN_RATE = "win_rate"
+    RATING = "rating"
+
+
+def board_scores(wins: int, losses: int, current_streak: int, rating: float) -> Dict[Board, Optional[float]]:
+    """Score per board, None where the player does not qualify"""
+    games = wins + losses
+    if games == 0:
+        return {board: None for board in Board}
+
+    return {
+        Board.WINS: wins,
+        Board.STREAK: current_streak,
+        Board.WIN_RATE: wins / games if games >= settings.LEADERBOARD_MIN_GAMES else None,
+        Board.RATING: rating,
+    }
+
+
+def board_score_column(board: Board):
+    """SQL expression for a board's score, the same values board_scores gives"""
+    if board == Board.WINS:
+        return User.wins
+    if board == Board.STREAK:
+        return User.current_streak
+    if board == Board.RATING:
+        return User.rating
+    return cast(User.wins, Float) / (User.wins + User.losses)
+
+
+def board_members(board: Board):
+    """WHERE clause for the players board_scores puts on a board"""
+    games = User.wins + User.losses
+    minimum = settings.LEADERBOARD_MIN_GAMES if board == Board.WIN_RATE else 1
+    return and_(User.is_active.is_(True), games > 0, games >= minimum)
+
+
+class Leaderboard:
+    """
+    Ranked boards kept up to date as matches complete
+    With Redis enabled the boards are sorted sets shared by every worker,
+    built by the leaderboard-rebuild job as the app starts. Until then, or
+    without Redis, or while it is failing, pages and ranks are read straight
+    from the users table, the source of truth, so every worker agrees. Ties
+    go to the higher user id either way, as ZREVRANGE orders them
+    """
+
+    def __init__(self):
+        self._built = False
+        self._rebuild_lock = asyncio.Lock()
+
+    @staticmethod
+    def _redis_key(board: Board) -> str:
+        return f"sk8:leaderboard:{board.value}"
+
+    async def update(self, rows: Iterable[StatsRow]) -> None:
+        """Apply fresh stats for some players to every board"""
+        redis = get_redis()
+        if redis is None:
+            return
+
+        pipe = redis.pipeline(transaction=False)
+        for user_id, wins, losses, current_streak, rating in rows:
+            # A rebuild in progress replays these once its snapshot is live
+            pipe.sadd(_CHANGED_KEY, user_id)
+            for board, score in board_scores(wins, losses, current_streak, rating).items():
+                if score is None:
+                    pipe.zrem(self._redis_key(board), user_id)
+                else:
+                    pipe.zadd(self._redis_key(board), {user_id: score})
+
+        try:
+            await pipe.execute()
+        except Exception:
+            logger.warning("Redis leaderboard update failed", exc_info=True)
+
+    async def page(self, db: AsyncSession, board: Board, offset: int, limit: int) -> Tuple[int, List[Tuple[str, float]]]:
+        """(board size, [(user_id, score)]) for ranks offset .. offset + limit - 1"""
+        redis = get_redis()
+        if redis is not None and self._built:
+            try:
+                key = self._redis_key(board)
+                total = await redis.zcard(key)
+                entries = await redis.zrevrange(key, offset, offset + limit - 1, withscores=True)
+                return total, [(member, float(score)) for member, score in entries]
+            except Exception:
+                logger.warning("Redis leaderboard read failed", exc_info=True)
+
+        score = board_score_column(board)
+        total = await db.scalar(select(func.count()).select_from(User).where(board_members(board)))
+        result = await db.execute(
+            select(User.id, score)
+            .where(board_members(board))
+            .order_by(score.desc(), User.id.desc())
+            .offset(offset)
+            .limit(limit)
+        )
+        return total, [(user_id, float(value)) for user_id, value in result.all()]
+
+    async def rank(self, db: AsyncSession, board: Board, user_id: str) -> Tuple[Optional[int], Optional[float], int]:
+        """(0-based rank or None, score, board size) for one player"""
+        redis = get_redis()
+        if redis is not None and self._built:
+            try:
+                key = self._redis_key(board)
+                rank = await redis.zrevrank(key, user_id)
+                score = await redis.zscore(key, user_id)
+                total = await redis.zcard(key)
+                return rank, (float(score) if score is not None else None), total
+            except Exception:
+                logger.warning("Redis leaderboard read failed", exc_info=True)
+
+        score = board_score_column(board)
+        total = await db.scalar(select(func.count()).select_from(User).where(board_members(board)))
+        mine = await db.scalar(select(score).where(User.id == user_id, board_members(board)))
+        if mine is None:
+            return None, None, total
+
+        ahead = await db.scalar(
+            select(func.count())
+            .select_from(User)
+            .where(
+                board_members(board),
+                or_(score > mine, and_(score == mine, User.id > user_id))
+            )
+        )
+        return ahead, float(mine), total
+
+    async def rebuild(self, db: AsyncSession) -> int:
+        """
+        Recompute the Redis boards from the users table, returns players indexed
+        When another worker holds the rebuild lock, its boards are about to
+        go live, so this worker starts reading them too
+        """
+        redis = get_redis()
+        if redis is None:
+            return 0
+
+        async with self._rebuild_lock:
+            token = uuid.uuid4().hex
+            try:
+                # One worker at a time: they share the staging keys and the changed set
+                acquired = await redis.set(_REBUILD_LOCK_KEY, token, nx=True, ex=_REBUILD_LOCK_SECONDS)
+            except Exception:
+                logger.warning("Redis leaderboard rebuild failed", exc_info=True)
+                return 0
+            if not acquired:
+                self._built = True
+                return 0
+
+            try:
+                # Anything updated from here on is replayed after the switch
+                await redis.delete(_CHANGED_KEY)
+
+                scores: Dict[Board, Dict[str, float]] = {board: {} for board in Board}
+                result = await db.stream(
+                    select(User.id, User.wins, User.losses, User.current_streak, User.rating)
+                    .where(User.is_active.is_(True))
+                    .execution_options(yield_per=5000)
+                )
+                async for user_id, wins, losses, current_streak, rating in result:
+                    for board, score in board_scores(wins, losses, current_streak, rating).items():
+                        if score is not None:
+                            scores[board][user_id] = score
+
+                await self._rebuild_redis(redis, scores)
+                self._built = True
+
+                # The snapshot may predate results other workers pushed
+                # meanwhile; re-read those players now that it is live
+                changed = await redis.smembers(_CHANGED_KEY)
+                if changed:
+                    result = await db.execute(
+                        select(User.id, User.wins, User.losses, User.current_streak, User.rating)
+                        .where(User.id.in_(changed), User.is_active.is_(True))
+                    )
+                    await self.update(result.all())
+                return len(scores[Board.WINS])
+            except Exception:
+                logger.warning("Redis leaderboard rebuild failed", exc_info=True)
+                return 0
+            finally:
+                try:
+                    await redis.eval(_RELEASE_LOCK_SCRIPT, 1, _REBUILD_LOCK_KEY, token)
+                except Exception:
+                    logger.warning("Could not release the leaderboard rebuild lock", exc_info=True)
+
+    async def _rebuild_redis(self, redis, scores: Dict[Board, Dict[str, float]]) -> None:
+        for board, members in scores.items():
+            key = self._redis_key(board)
+            staging = f"{key}:rebuild"
+            await redis.delete(staging)
+            items = list(members.items())
+            for start in range(0, len(items), 5000):
+                await redis.zadd(staging, dict(items[start:start + 5000]))
+            if items:
+                # Readers switch to the new board atomically
+                await redis.rename(staging, key)
+            else:
+                await redis.delete(key)
+
+    async def apply_committed(self, db: AsyncSession) -> None:
+        """Push stats changed by a just-committed transaction onto the boards"""
+        rows = db.info.pop(_PENDING_STATS_KEY, None)
+        if rows:
+            await self.update(rows)
+
+    def clear(self) -> None:
+        self._built = False
+
+
+def queue_stats_update(db: AsyncSession, rows: Iterable[StatsRow]) -> None:
+    """Hold new stats until the transaction commits (see apply_committed)"""
+    db.info.setdefault(_PENDING_STATS_KEY, []).extend(rows)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_pending_stats(session):
+    session.info.pop(_PENDING_STATS_KEY, None)
+
+
+leaderboard = Leaderboard()
+
+
+async def rebuild_leaderboard() -> None:
+    """Background job: build the Redis boards at startup, then resync them with the users table"""
+    if get_redis() is None:
+        return
+
+    async with AsyncSessionLocal() as db:
+        indexed = await leaderboard.rebuild(db)
+    if indexed:
+        logger.info("Rebuilt leaderboard with %d players", indexed)
@@ -0,0 +1,57 @@
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TieredCache, snapshot_model, restore_model
+from app.core.config import settings
+from app.models.match import Match
+from app.services.notification import notification_bus
+
+
+class MatchCache:
+    """
+    Match rows by id for the request hot path, written through by GameService
+    Every committed transition stores the fresh row before its event is
+    published, so the shared tier never lags the database. Other workers
+    drop their local copy when the event reaches them over Redis, and
+    changes that publish no event (expired challenges, archival) discard
+    the row through the invalidation relay. The local tier follows
+    TieredCache: on with a single worker or with the relay, skipped
+    otherwise
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.matches = TieredCache("match", max_entries, ttl_seconds)
+
+    async def get(self, db: AsyncSession, match_id: str) -> Optional[Match]:
+        """
+        Match attached to db, from cache when possible
+        A cached row is merged with load=False - no SELECT - so it can be
+        modified and flushed like one that was just loaded
+        """
+        data = await self.matches.get(match_id)
+        if data is not None:
+            return await db.merge(restore_model(Match, data), load=False)
+
+        match = await db.get(Match, match_id)
+        if match is not None:
+            await self.store(match)
+        return match
+
+    async def store(self, match: Match) -> None:
+        await self.matches.set(match.id, snapshot_model(match))
+
+    def discard(self, match_id: str) -> None:
+        self.matches.discard(match_id)
+
+    def forget_local(self, match_id: str) -> None:
+        self.matches.local.delete(match_id)
+
+    def clear(self) -> None:
+        self.matches.local.clear()
+
+
+match_cache = MatchCache(settings.MATCH_CACHE_MAX_ENTRIES, settings.MATCH_CACHE_TTL_SECONDS)
+
+# Every match event means the row changed; the shared tier already has it
+notification_bus.add_listener(lambda match_id, event_type: match_cache.forget_local(match_id))
@@ -0,0 +1,113 @@
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from app.models.match import Match, MatchModeEnum
+from app.models.matchmaking import MatchmakingEntry
+from app.core.config import settings
+from app.services.game_service import GameService
+from app.services.gps import (
+    distances_from_anchor,
+    geohash_encode,
+    geohash_precision_for_radius,
+    geohash_cells_within
+)
+
+
+class MatchmakingQueue:
+    """
+    Waiting players bucketed by (mode, geohash cell) in matchmaking_queue
+    Cells are at least GPS_RADIUS_MILES across, so a partner can only be in
+    the handful of cells around a player - never a scan of the whole queue.
+    The table is shared by every worker. A joining player's row is committed
+    before the partner search, and a pair is only formed by deleting both
+    rows in one transaction, so two players joining at once on different
+    workers still meet and nobody is paired twice
+    """
+
+    def __init__(self, radius_miles: float, wait_minutes: int):
+        self.radius_miles = radius_miles
+        self.precision = geohash_precision_for_radius(radius_miles)
+        self.wait = timedelta(minutes=wait_minutes)
+
+    async def join(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        mode: MatchModeEnum,
+        gps_lat: float,
+        gps_lng: float
+    ) -> Optional[Match]:
+        """
+        Add a player, pairing them straight away if someone is close enough
+        Returns the new match, or None if the player is now waiting
+        """
+        await db.execute(delete(MatchmakingEntry).where(MatchmakingEntry.user_id == user_id))
+        entry = MatchmakingEntry(
+            user_id=user_id,
+            mode=mode,
+            gps_lat=gps_lat,
+            gps_lng=gps_lng,
+            cell=geohash_encode(gps_lat, gps_lng, self.precision),
+            joined_at=datetime.utcnow(),
+        )
+        db.add(entry)
+        await db.commit()
+
+        for partner in await self._candidates(db, entry):
+            taken = await db.execute(
+                delete(MatchmakingEntry)
+                .where(MatchmakingEntry.user_id.in_([partner.user_id, user_id]))
+                .execution_options(synchronize_session=False)
+            )
+            if taken.rowcount == 2:
+                # Whoever waited longest sets the first trick at their spot
+                first, second = sorted((partner, entry), key=lambda e: (e.joined_at, e.user_id))
+                matches = await GameService.create_matches(db, [
+                    (first.user_id, second.user_id, mode, first.gps_lat, first.gps_lng)
+                ])
+                return matches[0]
+
+            # Someone else got there first; if it was us they paired, stop
+            await db.rollback()
+            if not await self.is_waiting(db, user_id):
+                return None
+
+        return None
+
+    async def leave(self, db: AsyncSession, user_id: str) -> bool:
+        result = await db.execute(delete(MatchmakingEntry).where(MatchmakingEntry.user_id == user_id))
+        await db.commit()
+        return result.rowcount == 1
+
+    async def is_waiting(self, db: AsyncSession, user_id: str) -> bool:
+        result = await db.execute(
+            select(MatchmakingEntry.user_id).where(MatchmakingEntry.user_id == user_id)
+        )
+        return result.scalar_one_or_none() is not None
+
+    async def _candidates(self, db: AsyncSession, entry: MatchmakingEntry) -> List[MatchmakingEntry]:
+        """Other players within radius in the surrounding cells, longest-waiting first"""
+        cells = geohash_cells_within(entry.gps_lat, entry.gps_lng, self.radius_miles, self.precision)
+        result = await db.execute(
+            select(MatchmakingEntry)
+            .where(
+                MatchmakingEntry.mode == entry.mode,
+                MatchmakingEntry.cell.in_(cells),
+                MatchmakingEntry.user_id != entry.user_id,
+                MatchmakingEntry.joined_at >= datetime.utcnow() - self.wait,
+            )
+            .order_by(MatchmakingEntry.joined_at, MatchmakingEntry.user_id)
+        )
+        candidates = result.scalars().all()
+        if not candidates:
+            return []
+
+        distances = distances_from_anchor(
+            [(c.gps_lat, c.gps_lng) for c in candidates], entry.gps_lat, entry.gps_lng
+        )
+        return [c for c, distance in zip(candidates, distances) if distance <= self.radius_miles]
+
+
+matchmaking_queue = MatchmakingQueue(settings.GPS_RADIUS_MILES, settings.MATCHMAKING_WAIT_MINUTES)
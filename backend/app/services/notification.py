@@ -0,0 +1,148 @@
+"""
+Match event bus
+
+GameService publishes an event after every committed state change; SSE
+streams subscribe per match. With Redis enabled, events go through Redis
+pub/sub so every worker sees them - each worker holds a single pattern
+subscription and fans out to its own local subscribers. Without Redis
+everything stays in-process, which is all a single worker or the tests
+need; more than one worker (WEB_CONCURRENCY) won't start without it
+"""
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+import json
+import logging
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.models.match import Match
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "sk8:match:"
+
+# (event type, JSON payload) - serialized once, written as-is by every stream
+Event = Tuple[str, str]
+
+
+def match_event(event_type: str, match: Match, **extra) -> dict:
+    """Event payload: the type plus the match state a client needs to redraw"""
+    return {
+        "type": event_type,
+        "match_id": match.id,
+        "status": match.status.value,
+        "current_turn_user_id": match.current_turn_user_id,
+        "player1_letters": match.player1_letters,
+        "player2_letters": match.player2_letters,
+        "winner_id": match.winner_id,
+        "at": datetime.utcnow().isoformat(),
+        **extra,
+    }
+
+
+class NotificationBus:
+    """
+    Per-match fan-out of events to bounded subscriber queues
+    A subscriber that stops reading loses its oldest events rather than
+    holding memory or slowing publishers down
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._callbacks: List[Callable[[str, str], None]] = []
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """
+        Start relaying events from Redis
+        Refuses to start several workers without it: a live stream would only
+        see the moves its own worker handled, and miss the rest silently
+        """
+        if get_redis() is None:
+            if settings.WEB_CONCURRENCY > 1:
+                raise RuntimeError(
+                    f"WEB_CONCURRENCY={settings.WEB_CONCURRENCY} needs REDIS_ENABLED=True "
+                    "(and the redis package) so match events reach every worker"
+                )
+            return
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen(), name="notification-listener")
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    async def publish(self, event: dict) -> None:
+        """Send an event to every subscriber of its match; never raises"""
+        message = json.dumps(event, default=str)
+        match_id = event["match_id"]
+
+        redis = get_redis()
+        if redis is not None and self.relaying:
+            try:
+                await redis.publish(f"{CHANNEL_PREFIX}{match_id}", message)
+                return
+            except Exception:
+                logger.warning("Redis publish failed, delivering locally", exc_info=True)
+
+        self._deliver(match_id, event["type"], message)
+
+    @asynccontextmanager
+    async def subscribe(self, match_id: str) -> AsyncIterator[asyncio.Queue]:
+        """Queue of Events for one match, registered for the duration of the block"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(match_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(match_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[match_id]
+
+    def add_listener(self, callback: Callable[[str, str], None]) -> None:
+        """Call callback(match_id, event_type) for every event relayed from Redis"""
+        self._callbacks.append(callback)
+
+    @property
+    def relaying(self) -> bool:
+        """True while events from other workers are arriving over Redis"""
+        return self._listener is not None
+
+    def subscriber_count(self, match_id: str) -> int:
+        return len(self._subscribers.get(match_id, ()))
+
+    def _deliver(self, match_id: str, event_type: str, message: str) -> None:
+        for queue in self._subscribers.get(match_id, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait((event_type, message))
+
+    async def _listen(self) -> None:
+        """Relay Redis pub/sub messages to local subscribers, reconnecting on errors"""
+        while True:
+            try:
+                pubsub = get_redis().pubsub()
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    match_id = message["channel"][len(CHANNEL_PREFIX):]
+                    event_type = json.loads(message["data"])["type"]
+                    for callback in self._callbacks:
+                        callback(match_id, event_type)
+                    self._deliver(match_id, event_type, message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Redis subscription lost, retrying", exc_info=True)
+                await asyncio.sleep(1)
+
+
+notification_bus = NotificationBus(settings.NOTIFICATION_QUEUE_SIZE)
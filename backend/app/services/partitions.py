@@ -0,0 +1,174 @@
+"""
+Monthly range partitions for matches and clips on PostgreSQL
+
+Migration 009 partitions matches by created_at and clips by uploaded_at,
+one partition per calendar month (`matches_p202610`) plus a DEFAULT
+partition that catches anything outside them. Queries bounded on the key
+only touch the months they cover. The maintenance job keeps
+PARTITION_MONTHS_AHEAD months created ahead of time so new rows never land
+in the default partition. With PARTITION_RETENTION_MONTHS set, it retires
+old months by dropping whole partitions instead of deleting rows. Both
+tables are plain on SQLite and the job isn't registered there
+"""
+from datetime import date, datetime
+from typing import List, Optional
+import logging
+import re
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.clip import Clip
+from app.models.match import Match, MatchStatusEnum
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = [Match.__table__, Clip.__table__]
+
+# Matches that can still change; a month holding one of them is never dropped
+LIVE_STATUSES = (MatchStatusEnum.PENDING, MatchStatusEnum.ACTIVE, MatchStatusEnum.DISPUTED)
+
+
+def month_start(moment: datetime) -> date:
+    return date(moment.year, moment.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def clips_since(match) -> datetime:
+    """
+    Lower bound on uploaded_at for a match's clips, so reading them skips
+    every clips partition older than the match
+    A clip is never uploaded before its match was created. The bound is the
+    start of that month rather than created_at itself: pruning is by whole
+    months anyway, and rows stamped by a database clock that disagrees with
+    the app's by a few hours can't fall outside it
+    """
+    return datetime(match.created_at.year, match.created_at.month, 1)
+
+
+def partition_name(table_name: str, month: date) -> str:
+    return f"{table_name}_p{month:%Y%m}"
+
+
+def partition_month(table_name: str, name: str) -> Optional[date]:
+    """Month a partition covers, None for the default partition or anything else"""
+    found = re.fullmatch(rf"{re.escape(table_name)}_p(\d{{4}})(\d{{2}})", name)
+    return date(int(found.group(1)), int(found.group(2)), 1) if found else None
+
+
+class PartitionService:
+    """Creates and drops the monthly partitions of matches and clips"""
+
+    @staticmethod
+    async def list_partitions(db: AsyncSession, table_name: str) -> List[str]:
+        result = await db.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = :table_name"
+            ),
+            {"table_name": table_name}
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def create_partition(db: AsyncSession, table_name: str, key: str, month: date) -> str:
+        """
+        Add the partition for one month
+        Created standalone and attached, rather than CREATE ... PARTITION OF:
+        rows already sitting in the default partition for that month are
+        moved over first (attaching would fail on them otherwise), and ATTACH
+        doesn't block reads and writes on the parent table
+        """
+        name = partition_name(table_name, month)
+        start, end = month, add_months(month, 1)
+
+        await db.execute(text(f"CREATE TABLE {name} (LIKE {table_name} INCLUDING DEFAULTS)"))
+        await db.execute(text(
+            f"WITH moved AS ("
+            f"DELETE FROM {table_name}_default WHERE {key} >= '{start}' AND {key} < '{end}' RETURNING *"
+            f") INSERT INTO {name} SELECT * FROM moved"
+        ))
+        await db.execute(text(
+            f"ALTER TABLE {table_name} ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')"
+        ))
+        await db.commit()
+        return name
+
+    @staticmethod
+    async def ensure_future_partitions(
+        db: AsyncSession,
+        months_ahead: int,
+        today: Optional[datetime] = None
+    ) -> List[str]:
+        """Create any missing partitions from this month to months_ahead out, returns their names"""
+        this_month = month_start(today or datetime.utcnow())
+        created = []
+        for table in PARTITIONED_TABLES:
+            existing = set(await PartitionService.list_partitions(db, table.name))
+            for offset in range(months_ahead + 1):
+                month = add_months(this_month, offset)
+                if partition_name(table.name, month) not in existing:
+                    created.append(await PartitionService.create_partition(
+                        db, table.name, table.info["partition_key"], month
+                    ))
+        return created
+
+    @staticmethod
+    async def drop_expired_partitions(
+        db: AsyncSession,
+        retention_months: int,
+        today: Optional[datetime] = None
+    ) -> List[str]:
+        """
+        Drop partitions for months older than retention_months, returns their names
+        Stops at the month of the oldest live match, so neither that match
+        nor any clip uploaded for it since can be dropped. A finished match's
+        clips can sit in later clips partitions than the match itself (it
+        was created in March, the last attempt uploaded in April), and with
+        no foreign key left nothing would remove them, so they are deleted
+        before the match partition goes. Clips are never older than their
+        match, which bounds that delete to the months from the match's on
+        """
+        cutoff = add_months(month_start(today or datetime.utcnow()), -retention_months)
+        oldest_live = (await db.execute(
+            select(func.min(Match.created_at)).where(Match.status.in_(LIVE_STATUSES))
+        )).scalar_one()
+        if oldest_live is not None:
+            cutoff = min(cutoff, month_start(oldest_live))
+
+        dropped = []
+        for table in PARTITIONED_TABLES:
+            for name in await PartitionService.list_partitions(db, table.name):
+                month = partition_month(table.name, name)
+                if month is not None and add_months(month, 1) <= cutoff:
+                    if table is Match.__table__:
+                        await db.execute(text(
+                            f"DELETE FROM clips WHERE uploaded_at >= '{month}' "
+                            f"AND match_id IN (SELECT id FROM {name})"
+                        ))
+                    await db.execute(text(f"DROP TABLE {name}"))
+                    dropped.append(name)
+        await db.commit()
+        return dropped
+
+
+async def maintain_partitions() -> None:
+    """Background job: create upcoming monthly partitions and drop expired ones"""
+    async with AsyncSessionLocal() as db:
+        created = await PartitionService.ensure_future_partitions(db, settings.PARTITION_MONTHS_AHEAD)
+        dropped = []
+        if settings.PARTITION_RETENTION_MONTHS:
+            dropped = await PartitionService.drop_expired_partitions(db, settings.PARTITION_RETENTION_MONTHS)
+
+    if created:
+        logger.info("Created partitions %s", ", ".join(created))
+    if dropped:
+        logger.info("Dropped expired partitions %s", ", ".join(dropped))
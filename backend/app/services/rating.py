@@ -0,0 +1,260 @@
+"""
+Elo skill rating
+
+Ratings move incrementally when a match completes (GameService) and can be
+replayed from the full match history with different parameters:
+
+    python -m app.services.rating --k 24 --provisional-k 48 --dry-run
+
+The replay splits history into player-disjoint waves - every match in a
+wave involves players the other matches in it don't - so each wave is a
+handful of NumPy array ops and the result is identical to a one-by-one
+replay in completion order
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+import argparse
+import asyncio
+import logging
+import time
+
+import numpy as np
+from sqlalchemy import bindparam, select, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.principal_cache import mark_users_changed, principal_cache
+from app.models.archive import ArchivedMatch
+from app.models.match import Match, MatchStatusEnum
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RatingParams:
+    initial: float = 1500.0  # Matches the users.rating column default
+    k: float = settings.RATING_K
+    provisional_k: float = settings.RATING_PROVISIONAL_K
+    provisional_games: int = settings.RATING_PROVISIONAL_GAMES
+    scale: float = 400.0
+
+
+class RatingService:
+    """Elo updates for completed matches"""
+
+    @staticmethod
+    def expected_score(rating: float, opponent_rating: float, scale: float = 400.0) -> float:
+        """Probability the first player beats the second"""
+        return 1.0 / (1.0 + 10.0 ** ((opponent_rating - rating) / scale))
+
+    @staticmethod
+    def k_factor(rated_games: int, params: RatingParams) -> float:
+        """New players move faster until their rating settles"""
+        return params.provisional_k if rated_games < params.provisional_games else params.k
+
+    @staticmethod
+    def rating_deltas(
+        winner_rating: float,
+        winner_games: int,
+        loser_rating: float,
+        loser_games: int,
+        params: RatingParams = RatingParams()
+    ) -> Tuple[float, float]:
+        """(winner delta, loser delta) for one result"""
+        expected = RatingService.expected_score(winner_rating, loser_rating, params.scale)
+        return (
+            RatingService.k_factor(winner_games, params) * (1.0 - expected),
+            -RatingService.k_factor(loser_games, params) * (1.0 - expected),
+        )
+
+
+def assign_waves(player1: np.ndarray, player2: np.ndarray) -> np.ndarray:
+    """
+    Wave number per match, in order: one past the last wave either player
+    appeared in. Matches sharing a wave share no players, and each player's
+    matches keep their original order across waves
+    """
+    last = [-1] * (int(max(player1.max(), player2.max())) + 1)
+    waves = np.empty(len(player1), dtype=np.int64)
+    for i, (a, b) in enumerate(zip(player1.tolist(), player2.tolist())):
+        wave = max(last[a], last[b]) + 1
+        last[a] = last[b] = wave
+        waves[i] = wave
+    return waves
+
+
+def replay_chunk(
+    ratings: np.ndarray,
+    games: np.ndarray,
+    winners: np.ndarray,
+    losers: np.ndarray,
+    params: RatingParams
+) -> None:
+    """Apply a chronological chunk of results to ratings/games in place"""
+    if len(winners) == 0:
+        return
+
+    waves = assign_waves(winners, losers)
+    order = np.argsort(waves, kind="stable")
+    boundaries = np.flatnonzero(np.diff(waves[order])) + 1
+
+    for wave in np.split(order, boundaries):
+        w, l = winners[wave], losers[wave]
+        expected = 1.0 / (1.0 + 10.0 ** ((ratings[l] - ratings[w]) / params.scale))
+        k_w = np.where(games[w] < params.provisional_games, params.provisional_k, params.k)
+        k_l = np.where(games[l] < params.provisional_games, params.provisional_k, params.k)
+        # Fancy-index assignment is safe: no player appears twice in a wave
+        ratings[w] += k_w * (1.0 - expected)
+        ratings[l] -= k_l * (1.0 - expected)
+        games[w] += 1
+        games[l] += 1
+
+
+async def recompute_ratings(
+    db: AsyncSession,
+    params: RatingParams = RatingParams(),
+    chunk_size: int = 100_000,
+    dry_run: bool = False
+) -> Dict[str, float]:
+    """
+    Replay every completed match in completion order and rewrite ratings
+    Returns summary stats; with dry_run nothing is written. Only players
+    whose rating moved are written, and their cached principals dropped.
+    The rating leaderboard picks the new values up on its next rebuild
+
+    Nothing is locked while the replay runs. Stored ratings and history
+    are read from one snapshot, and the result is written as the change
+    against that snapshot, so a match completing meanwhile keeps its live
+    update on top of the replayed rating. Players deleted since their
+    games still count for their opponents, entering at params.initial
+    """
+    started = time.perf_counter()
+
+    if db.get_bind().dialect.name == "postgresql":
+        # Both reads below see the same committed state
+        await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+    result = await db.execute(select(User.id, User.rating, User.rated_games))
+    stored = result.all()
+    user_ids: List[str] = [user_id for user_id, _, _ in stored]
+    stored_ratings = np.fromiter((rating for _, rating, _ in stored), dtype=np.float64, count=len(stored))
+    stored_games = np.fromiter((played for _, _, played in stored), dtype=np.int64, count=len(stored))
+    index = {user_id: i for i, user_id in enumerate(user_ids)}
+    ratings = np.full(len(user_ids), params.initial, dtype=np.float64)
+    games = np.zeros(len(user_ids), dtype=np.int64)
+
+    # Older history lives in the archive table
+    history = union_all(*(
+        select(model.winner_id, model.player1_id, model.player2_id, model.completed_at, model.id)
+        .where(
+            model.status == MatchStatusEnum.COMPLETED,
+            model.winner_id.is_not(None),
+            model.player2_id.is_not(None)
+        )
+        for model in (Match, ArchivedMatch)
+    )).subquery()
+    stream = await db.stream(
+        select(history.c.winner_id, history.c.player1_id, history.c.player2_id)
+        .order_by(history.c.completed_at, history.c.id)
+        .execution_options(yield_per=chunk_size)
+    )
+
+    replayed = 0
+    async for rows in stream.partitions(chunk_size):
+        # The archive has no foreign keys; its players may be gone from users
+        for _, p1, p2 in rows:
+            index.setdefault(p1, len(index))
+            index.setdefault(p2, len(index))
+        if len(index) > len(ratings):
+            missing = len(index) - len(ratings)
+            ratings = np.concatenate([ratings, np.full(missing, params.initial)])
+            games = np.concatenate([games, np.zeros(missing, dtype=np.int64)])
+
+        winners = np.fromiter((index[winner] for winner, _, _ in rows), dtype=np.int64, count=len(rows))
+        losers = np.fromiter(
+            (index[p2 if winner == p1 else p1] for winner, p1, p2 in rows),
+            dtype=np.int64,
+            count=len(rows)
+        )
+        replay_chunk(ratings, games, winners, losers, params)
+        replayed += len(rows)
+    # End the snapshot; the writes below apply to whatever is current
+    await db.rollback()
+
+    ratings, games = ratings[:len(user_ids)], games[:len(user_ids)]
+    # Live updates sum the same deltas in Python floats, so allow for rounding
+    changed = np.flatnonzero(
+        ~np.isclose(ratings, stored_ratings, rtol=0.0, atol=1e-9) | (games != stored_games)
+    )
+
+    if not dry_run and len(changed):
+        users = User.__table__
+        shift = (
+            update(users)
+            .where(users.c.id == bindparam("user_id"))
+            .values(
+                rating=users.c.rating + bindparam("rating_change"),
+                rated_games=users.c.rated_games + bindparam("games_change")
+            )
+        )
+        for start in range(0, len(changed), chunk_size):
+            await db.execute(
+                shift,
+                [
+                    {
+                        "user_id": user_ids[i],
+                        "rating_change": float(ratings[i] - stored_ratings[i]),
+                        "games_change": int(games[i] - stored_games[i]),
+                    }
+                    for i in changed[start:start + chunk_size].tolist()
+                ]
+            )
+        # Bulk UPDATEs skip the ORM hooks that drop cached principals
+        mark_users_changed(db, (user_ids[i] for i in changed.tolist()))
+        await db.commit()
+
+    return {
+        "players": len(user_ids),
+        "matches": replayed,
+        "changed": len(changed),
+        "seconds": time.perf_counter() - started,
+        "mean_rating": float(ratings.mean()) if len(ratings) else params.initial,
+        "max_rating": float(ratings.max()) if len(ratings) else params.initial,
+    }
+
+
+async def _main(params: RatingParams, dry_run: bool) -> None:
+    async with AsyncSessionLocal() as db:
+        summary = await recompute_ratings(db, params, dry_run=dry_run)
+    # Let the scheduled Redis deletes of cached principals finish before exiting
+    await principal_cache.users.wait_pending()
+    print(
+        f"{summary['matches']} matches over {summary['players']} players in {summary['seconds']:.1f}s, "
+        f"{summary['changed']} changed, "
+        f"mean {summary['mean_rating']:.0f}, max {summary['max_rating']:.0f}"
+        + (" (dry run)" if dry_run else "")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay match history and rewrite Elo ratings")
+    parser.add_argument("--initial", type=float, default=RatingParams.initial)
+    parser.add_argument("--k", type=float, default=settings.RATING_K)
+    parser.add_argument("--provisional-k", type=float, default=settings.RATING_PROVISIONAL_K)
+    parser.add_argument("--provisional-games", type=int, default=settings.RATING_PROVISIONAL_GAMES)
+    parser.add_argument("--dry-run", action="store_true", help="Report only, don't write ratings")
+    args = parser.parse_args()
+
+    params = RatingParams(
+        initial=args.initial,
+        k=args.k,
+        provisional_k=args.provisional_k,
+        provisional_games=args.provisional_games,
+    )
+    asyncio.run(_main(params, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,56 @@
+from typing import List, Tuple
+import asyncio
+import time
 import boto3
 from botocore.config import Config
 from botocore.exceptions import ClientError
+from app.core.cache import TTLCache
 from app.core.config import settings
 
 
 class StorageService:
     """Handle S3 video storage"""
     
+    # boto3 clients are thread-safe; credential resolution and endpoint setup
+    # happen once per process instead of on every call
+    _client = None
+    
+    # Presigned view URLs keyed by (clip_id, expires_in), reused for half
+    # their lifetime so a cached URL always has at least half left
+    _view_urls = TTLCache(
+        max_entries=settings.PRESIGNED_URL_CACHE_SIZE,
+        ttl_seconds=settings.PRESIGNED_URL_CACHE_TTL_SECONDS,
+    )
+    
     @staticmethod
     def get_s3_client():
-        """Get configured S3 client"""
-        config = Config(
-            signature_version='s3v4',
-            s3={'addressing_style': 'path'}
-        )
+        """Get the shared, configured S3 client"""
+        if StorageService._client is None:
+            config = Config(
+                signature_version='s3v4',
+                s3={'addressing_style': 'path'}
+            )
+            
+            StorageService._client = boto3.client(
+                's3',
+                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                region_name=settings.S3_REGION,
+                endpoint_url=settings.S3_ENDPOINT_URL,
+                config=config
+            )
         
-        return boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.S3_REGION,
-            endpoint_url=settings.S3_ENDPOINT_URL,
-            config=config
-        )
+        return StorageService._client
+    
+    @staticmethod
+    def set_s3_client(client) -> None:
+        """Swap the shared client (local S3 stand-ins in tests and benchmarks)"""
+        StorageService._client = client
+        StorageService._view_urls.clear()
+    
+    @staticmethod
+    def clip_key(clip_id: str) -> str:
+        return f"clips/{clip_id}.mp4"
     
     @staticmethod
     async def generate_upload_url(clip_id: str, file_size: int, expires_in: int = 300) -> str:
@@ -32,14 +60,14 @@ class StorageService:
         """
         s3_client = StorageService.get_s3_client()
         
-        key = f"clips/{clip_id}.mp4"
-        
         try:
-            presigned_url = s3_client.generate_presigned_url(
+            # Signing is pure CPU work - keep it off the event loop
+            presigned_url = await asyncio.to_thread(
+                s3_client.generate_presigned_url,
                 'put_object',
                 Params={
                     'Bucket': settings.S3_BUCKET_NAME,
-                    'Key': key,
+                    'Key': StorageService.clip_key(clip_id),
                     'ContentType': 'video/mp4'
                 },
                 ExpiresIn=expires_in
@@ -49,24 +77,195 @@ class StorageService:
             raise Exception(f"Failed to generate upload URL: {str(e)}")
     
     @staticmethod
-    async def get_clip_url(clip_id: str) -> str:
-        """Get public/signed URL for viewing a clip"""
+    async def create_multipart_upload(clip_id: str) -> str:
+        """Start a multipart upload for a clip, returns the upload id"""
+        s3_client = StorageService.get_s3_client()
+        
+        try:
+            response = await asyncio.to_thread(
+                s3_client.create_multipart_upload,
+                Bucket=settings.S3_BUCKET_NAME,
+                Key=StorageService.clip_key(clip_id),
+                ContentType='video/mp4'
+            )
+            return response['UploadId']
+        except ClientError as e:
+            raise Exception(f"Failed to start multipart upload: {str(e)}")
+    
+    @staticmethod
+    async def generate_part_urls(
+        clip_id: str,
+        upload_id: str,
+        part_numbers: List[int],
+        expires_in: int = 3600
+    ) -> List[Tuple[int, str]]:
+        """Presigned PUT URLs for the given parts, signed in one thread hop"""
+        s3_client = StorageService.get_s3_client()
+        key = StorageService.clip_key(clip_id)
+        
+        def sign_all():
+            return [
+                (part_number, s3_client.generate_presigned_url(
+                    'upload_part',
+                    Params={
+                        'Bucket': settings.S3_BUCKET_NAME,
+                        'Key': key,
+                        'UploadId': upload_id,
+                        'PartNumber': part_number
+                    },
+                    ExpiresIn=expires_in
+                ))
+                for part_number in part_numbers
+            ]
+        
+        try:
+            return await asyncio.to_thread(sign_all)
+        except ClientError as e:
+            raise Exception(f"Failed to generate part URLs: {str(e)}")
+    
+    @staticmethod
+    async def list_uploaded_parts(clip_id: str, upload_id: str) -> List[dict]:
+        """Parts S3 already has for an upload: [{part_number, etag, size}]"""
+        s3_client = StorageService.get_s3_client()
+        
+        def list_all():
+            parts = []
+            marker = 0
+            while True:
+                response = s3_client.list_parts(
+                    Bucket=settings.S3_BUCKET_NAME,
+                    Key=StorageService.clip_key(clip_id),
+                    UploadId=upload_id,
+                    PartNumberMarker=marker
+                )
+                for part in response.get('Parts', []):
+                    parts.append({
+                        'part_number': part['PartNumber'],
+                        'etag': part['ETag'],
+                        'size': part['Size']
+                    })
+                if not response.get('IsTruncated'):
+                    return parts
+                marker = response['NextPartNumberMarker']
+        
+        # ClientError propagates: callers tell a finished upload (NoSuchUpload) apart
+        return await asyncio.to_thread(list_all)
+    
+    @staticmethod
+    async def complete_multipart_upload(clip_id: str, upload_id: str, parts: List[dict]) -> None:
+        """Stitch uploaded parts ([{part_number, etag}]) into the clip object"""
+        s3_client = StorageService.get_s3_client()
+        
+        await asyncio.to_thread(
+            s3_client.complete_multipart_upload,
+            Bucket=settings.S3_BUCKET_NAME,
+            Key=StorageService.clip_key(clip_id),
+            UploadId=upload_id,
+            MultipartUpload={
+                'Parts': [
+                    {'PartNumber': part['part_number'], 'ETag': part['etag']}
+                    for part in sorted(parts, key=lambda p: p['part_number'])
+                ]
+            }
+        )
+    
+    @staticmethod
+    async def generate_view_url(clip_id: str, expires_in: int = 3600) -> str:
+        """Presigned GET URL for a clip, served from cache while fresh"""
+        url, _ = await StorageService.generate_view_url_with_expiry(clip_id, expires_in)
+        return url
+    
+    @staticmethod
+    async def generate_view_url_with_expiry(clip_id: str, expires_in: int = 3600) -> Tuple[str, int]:
+        """Presigned GET URL for a clip and the seconds it has left, cached URLs included"""
+        cache_key = (clip_id, expires_in)
+        cached = StorageService._view_urls.get(cache_key)
+        if cached is not None:
+            url, expires_at = cached
+            return url, int(expires_at - time.monotonic())
+        
+        signed_at = time.monotonic()
+        s3_client = StorageService.get_s3_client()
+        
+        try:
+            url = await asyncio.to_thread(
+                s3_client.generate_presigned_url,
+                'get_object',
+                Params={
+                    'Bucket': settings.S3_BUCKET_NAME,
+                    'Key': StorageService.clip_key(clip_id)
+                },
+                ExpiresIn=expires_in
+            )
+        except ClientError as e:
+            raise Exception(f"Failed to generate view URL: {str(e)}")
+        
+        StorageService._view_urls.set(cache_key, (url, signed_at + expires_in), expires_in / 2)
+        return url, expires_in
+    
+    @staticmethod
+    def rendition_key(clip_id: str) -> str:
+        return f"renditions/{clip_id}.mp4"
+    
+    @staticmethod
+    def thumbnail_key(clip_id: str) -> str:
+        return f"thumbnails/{clip_id}.jpg"
+    
+    @staticmethod
+    def sprite_key(clip_id: str) -> str:
+        return f"previews/{clip_id}_sprite.webp"
+    
+    @staticmethod
+    async def get_object_url(key: str) -> str:
+        """Get public URL for an object in the clips bucket"""
         # If bucket is public, return direct URL
         if settings.S3_ENDPOINT_URL:
-            return f"{settings.S3_ENDPOINT_URL}/{settings.S3_BUCKET_NAME}/clips/{clip_id}.mp4"
+            return f"{settings.S3_ENDPOINT_URL}/{settings.S3_BUCKET_NAME}/{key}"
         else:
-            return f"https://{settings.S3_BUCKET_NAME}.s3.{settings.S3_REGION}.amazonaws.com/clips/{clip_id}.mp4"
+            return f"https://{settings.S3_BUCKET_NAME}.s3.{settings.S3_REGION}.amazonaws.com/{key}"
+    
+    @staticmethod
+    async def abort_multipart_upload(clip_id: str, upload_id: str) -> None:
+        """Drop an unfinished upload and the parts S3 is holding for it"""
+        s3_client = StorageService.get_s3_client()
+        
+        await asyncio.to_thread(
+            s3_client.abort_multipart_upload,
+            Bucket=settings.S3_BUCKET_NAME,
+            Key=StorageService.clip_key(clip_id),
+            UploadId=upload_id
+        )
+    
+    @staticmethod
+    async def clip_exists(clip_id: str) -> bool:
+        """Whether the clip object is in the bucket"""
+        s3_client = StorageService.get_s3_client()
+        
+        try:
+            await asyncio.to_thread(
+                s3_client.head_object,
+                Bucket=settings.S3_BUCKET_NAME,
+                Key=StorageService.clip_key(clip_id)
+            )
+            return True
+        except ClientError:
+            return False
+    
+    @staticmethod
+    async def get_clip_url(clip_id: str) -> str:
+        """Get public/signed URL for viewing a clip"""
+        return await StorageService.get_object_url(StorageService.clip_key(clip_id))
     
     @staticmethod
     async def delete_clip(clip_id: str) -> bool:
         """Delete a clip from S3"""
         s3_client = StorageService.get_s3_client()
-        key = f"clips/{clip_id}.mp4"
         
         try:
-            s3_client.delete_object(
+            await asyncio.to_thread(
+                s3_client.delete_object,
                 Bucket=settings.S3_BUCKET_NAME,
-                Key=key
+                Key=StorageService.clip_key(clip_id)
             )
             return True
         except ClientError:
@@ -0,0 +1,111 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+import heapq
+
+from app.models.match import Match, MatchStatusEnum, MatchModeEnum
+from app.core.config import settings
+
+
+def turn_timeout(mode: MatchModeEnum) -> timedelta:
+    """How long a player has to act on their turn"""
+    if mode == MatchModeEnum.NORMAL:
+        return timedelta(minutes=settings.NORMAL_MODE_TIMEOUT_MINUTES)
+    return timedelta(hours=settings.LONG_MODE_TIMEOUT_HOURS)
+
+
+def as_naive_utc(value: datetime) -> datetime:
+    """Normalize DB timestamps (aware on Postgres, naive on SQLite) to naive UTC"""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def turn_deadline(mode: MatchModeEnum, last_activity: Optional[datetime]) -> Optional[datetime]:
+    """Naive-UTC moment the current turn expires, None if there is no activity yet"""
+    if last_activity is None:
+        return None
+    return as_naive_utc(last_activity) + turn_timeout(mode)
+
+
+class TurnDeadlineScheduler:
+    """
+    Min-heap of turn deadlines for active matches
+    Rescheduling pushes a new entry and leaves the old one in place; stale
+    entries are recognised on pop by comparing with the latest deadline
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime, str]] = []
+        self._deadlines: Dict[str, datetime] = {}
+        self.loaded_at: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def schedule(self, match_id: str, deadline: datetime) -> None:
+        if self._deadlines.get(match_id) == deadline:
+            return
+        self._deadlines[match_id] = deadline
+        heapq.heappush(self._heap, (deadline, match_id))
+
+    def cancel(self, match_id: str) -> None:
+        self._deadlines.pop(match_id, None)
+
+    def schedule_match(self, match: Match) -> None:
+        """Track an ACTIVE match's current turn, forget any other match"""
+        deadline = turn_deadline(match.mode, match.last_activity)
+        if match.status != MatchStatusEnum.ACTIVE or deadline is None:
+            self.cancel(match.id)
+        else:
+            self.schedule(match.id, deadline)
+
+    def next_deadline(self) -> Optional[datetime]:
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime, limit: int) -> List[str]:
+        """Remove and return up to limit match ids whose deadline has passed"""
+        due = []
+        while len(due) < limit:
+            self._discard_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            _, match_id = heapq.heappop(self._heap)
+            del self._deadlines[match_id]
+            due.append(match_id)
+        return due
+
+    def needs_rebuild(self, now: datetime) -> bool:
+        if self.loaded_at is None:
+            return True
+        return now - self.loaded_at >= timedelta(minutes=settings.TURN_SCHEDULER_REBUILD_MINUTES)
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        """Reload every active match's deadline from the database"""
+        result = await db.execute(
+            select(Match.id, Match.mode, Match.last_activity)
+            .where(Match.status == MatchStatusEnum.ACTIVE)
+        )
+
+        deadlines = {}
+        for match_id, mode, last_activity in result:
+            deadline = turn_deadline(mode, last_activity)
+            if deadline is not None:
+                deadlines[match_id] = deadline
+
+        self._deadlines = deadlines
+        self._heap = [(deadline, match_id) for match_id, deadline in deadlines.items()]
+        heapq.heapify(self._heap)
+        self.loaded_at = datetime.utcnow()
+
+    def _discard_stale(self) -> None:
+        while self._heap:
+            deadline, match_id = self._heap[0]
+            if self._deadlines.get(match_id) == deadline:
+                return
+            heapq.heappop(self._heap)
+
+
+turn_scheduler = TurnDeadlineScheduler()
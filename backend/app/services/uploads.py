@@ -0,0 +1,67 @@
+"""
+Cleanup of uploads that were started and never completed
+
+/upload/init writes the clip row with an empty video_url, and only
+/upload/complete fills it in. A row still empty after UPLOAD_ABANDON_HOURS
+belongs to an upload the player gave up on. It is deleted, and its
+multipart upload aborted so S3 stops keeping the parts
+"""
+from datetime import datetime, timedelta
+import logging
+
+from botocore.exceptions import ClientError
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.clip import Clip
+from app.services.storage_service import StorageService
+
+logger = logging.getLogger(__name__)
+
+
+class UploadService:
+    @staticmethod
+    async def discard_abandoned_uploads(db: AsyncSession, older_than: timedelta, batch_size: int = 500) -> int:
+        """Delete clips initialized before older_than and never completed, returns count"""
+        result = await db.execute(
+            select(Clip.id, Clip.extra_data)
+            .where(
+                Clip.video_url == "",
+                Clip.uploaded_at < datetime.utcnow() - older_than
+            )
+            .limit(batch_size)
+        )
+        rows = result.all()
+
+        for clip_id, extra_data in rows:
+            multipart = (extra_data or {}).get("multipart_upload")
+            if not multipart:
+                continue
+            try:
+                await StorageService.abort_multipart_upload(clip_id, multipart["upload_id"])
+            except ClientError:
+                # Already gone; a bucket lifecycle rule may have aborted it
+                logger.warning("Could not abort multipart upload for clip %s", clip_id, exc_info=True)
+
+        if rows:
+            await db.execute(
+                delete(Clip).where(
+                    Clip.id.in_([clip_id for clip_id, _ in rows]),
+                    Clip.video_url == ""
+                )
+            )
+            await db.commit()
+        return len(rows)
+
+
+async def discard_abandoned_uploads() -> None:
+    """Background job: drop uploads left unfinished for UPLOAD_ABANDON_HOURS"""
+    async with AsyncSessionLocal() as db:
+        discarded = await UploadService.discard_abandoned_uploads(
+            db, timedelta(hours=settings.UPLOAD_ABANDON_HOURS)
+        )
+
+    if discarded:
+        logger.info("Discarded %d abandoned uploads", discarded)
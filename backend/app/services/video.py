@@ -0,0 +1,580 @@
+"""
+Post-upload video processing
+
+Uploaded clips are raw phone footage - often 4K, high bitrate and with
+rotation metadata. Once /upload/complete lands, the clip id goes on a
+bounded queue; dispatcher tasks hand each job to a process pool running
+ffmpeg and write the result back to the clips row. Nothing here runs on the
+request path beyond a put_nowait
+"""
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence, Set
+import asyncio
+import io
+import logging
+import math
+import multiprocessing
+import os
+import tempfile
+
+import numpy as np
+from sqlalchemy import and_, or_, select, update
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.clip import Clip, ClipProcessingStatusEnum
+from app.models.user import User
+from app.services.storage_service import StorageService
+from app.utils.watermark import WatermarkOverlay, build_watermark_data, watermark_lines
+
+logger = logging.getLogger(__name__)
+
+# Clips queued for longer than this without being picked up are re-submitted
+REQUEUE_AFTER = timedelta(minutes=1)
+
+# Preview assets: one poster frame plus a timeline sprite sheet
+THUMBNAIL_SIZE = (480, 270)
+SPRITE_TILE_SIZE = (160, 90)
+SPRITE_FRAMES = 10
+SPRITE_COLUMNS = 5
+
+
+def lease_expired(now: datetime):
+    """PROCESSING clips whose worker has had them for longer than the lease"""
+    return and_(
+        Clip.processing_status == ClipProcessingStatusEnum.PROCESSING,
+        or_(
+            Clip.processing_started_at.is_(None),
+            Clip.processing_started_at <= now - timedelta(minutes=settings.TRANSCODE_LEASE_MINUTES),
+        ),
+    )
+
+
+def stream_frame_rate(video: dict) -> str:
+    """
+    Frame rate of a probed video stream as ffmpeg's "num/den"
+    ffprobe reports "0/0" for a rate it couldn't work out, so avg_frame_rate
+    falls back to r_frame_rate, and that to 30 fps
+    """
+    for field in ("avg_frame_rate", "r_frame_rate"):
+        rate = video.get(field) or ""
+        numerator, _, denominator = rate.partition("/")
+        try:
+            if float(numerator) > 0 and float(denominator or 1) > 0:
+                return rate
+        except ValueError:
+            continue
+    return "30/1"
+
+
+def probe_source(source_url: str) -> dict:
+    """Display size, frame rate and audio presence of the source clip"""
+    import ffmpeg
+
+    info = ffmpeg.probe(source_url)
+    video = next(s for s in info["streams"] if s["codec_type"] == "video")
+    width, height = int(video["width"]), int(video["height"])
+
+    # Phones record landscape and flag rotation; ffmpeg autorotates on decode
+    rotation = int(video.get("tags", {}).get("rotate", 0))
+    for side_data in video.get("side_data_list", []):
+        rotation = int(side_data.get("rotation", rotation))
+    if rotation % 180:
+        width, height = height, width
+
+    return {
+        "width": width,
+        "height": height,
+        "frame_rate": stream_frame_rate(video),
+        "has_audio": any(s["codec_type"] == "audio" for s in info["streams"]),
+    }
+
+
+def output_size(width: int, height: int, max_height: int) -> tuple:
+    """Downscale-only target size, both sides even for yuv420p"""
+    if height > max_height:
+        width = round(width * max_height / height)
+        height = max_height
+    return width - width % 2, height - height % 2
+
+
+def _read_frame(stream, frame: np.ndarray) -> bool:
+    """Fill frame from a raw video pipe; False at end of stream"""
+    view = memoryview(frame).cast("B")
+    filled = 0
+    while filled < len(view):
+        count = stream.readinto(view[filled:])
+        if not count:
+            return False
+        filled += count
+    return True
+
+
+def transcode_clip(clip_id: str, source_url: str, watermark: List[str]) -> dict:
+    """
+    Produce the normalized, watermarked rendition for a clip and upload it
+    Runs in a worker process. One ffmpeg reads the presigned URL once,
+    decoding video to raw RGB frames and copying the audio track untouched
+    into a local file. The watermark is blended in with numpy, a second
+    ffmpeg encodes the frames, and a final mux copies that video and
+    encodes the audio to AAC, which every player handles - a single
+    download and a single video decode/encode pass in total
+    """
+    import ffmpeg
+
+    source = probe_source(source_url)
+    width, height = output_size(source["width"], source["height"], settings.TRANSCODE_MAX_HEIGHT)
+    overlay = WatermarkOverlay(watermark, width, height)
+
+    with tempfile.TemporaryDirectory(prefix="sk8-transcode-") as workdir:
+        output_path = os.path.join(workdir, "rendition.mp4")
+        video_path = os.path.join(workdir, "video.mp4") if source["has_audio"] else output_path
+        audio_path = os.path.join(workdir, "audio.mka")
+
+        stream = ffmpeg.input(source_url)
+        outputs = [
+            stream
+            .video
+            # Constant frame rate so the raw stream maps 1:1 onto encoder input
+            .filter("fps", fps=source["frame_rate"])
+            .filter("scale", width, height)
+            .output("pipe:", format="rawvideo", pix_fmt="rgb24")
+        ]
+        if source["has_audio"]:
+            # Matroska takes any codec, so the track is copied as-is
+            outputs.append(stream.audio.output(audio_path, acodec="copy"))
+
+        decoder = (
+            ffmpeg
+            .merge_outputs(*outputs)
+            .global_args("-nostats", "-loglevel", "error")
+            .run_async(pipe_stdout=True, pipe_stderr=True)
+        )
+
+        frames = ffmpeg.input(
+            "pipe:",
+            format="rawvideo",
+            pix_fmt="rgb24",
+            s=f"{width}x{height}",
+            framerate=source["frame_rate"],
+        )
+
+        encoder = (
+            ffmpeg
+            .output(
+                frames,
+                video_path,
+                vcodec="libx264",
+                preset="veryfast",
+                crf=settings.TRANSCODE_CRF,
+                maxrate=settings.TRANSCODE_MAX_BITRATE,
+                bufsize=settings.TRANSCODE_MAX_BITRATE,
+                pix_fmt="yuv420p",
+                movflags="+faststart",
+            )
+            .global_args("-nostats", "-loglevel", "error")
+            .overwrite_output()
+            .run_async(pipe_stdin=True, pipe_stderr=True)
+        )
+
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        try:
+            while _read_frame(decoder.stdout, frame):
+                encoder.stdin.write(overlay.apply(frame).data)
+        finally:
+            encoder.stdin.close()
+            decoder.stdout.close()
+            decoder_error = decoder.stderr.read()
+            encoder_error = encoder.stderr.read()
+            decoder.wait()
+            encoder.wait()
+
+        if decoder.returncode or encoder.returncode:
+            raise RuntimeError(
+                f"ffmpeg failed for clip {clip_id}: "
+                f"{(decoder_error or encoder_error).decode(errors='replace').strip()}"
+            )
+
+        if source["has_audio"]:
+            # Local files only and the video is copied; only the audio is
+            # encoded here, whatever codec the phone recorded it in
+            (
+                ffmpeg
+                .output(
+                    ffmpeg.input(video_path).video,
+                    ffmpeg.input(audio_path).audio,
+                    output_path,
+                    vcodec="copy",
+                    acodec="aac",
+                    audio_bitrate="96k",
+                    movflags="+faststart",
+                )
+                .global_args("-nostats", "-loglevel", "error")
+                .overwrite_output()
+                .run(capture_stderr=True)
+            )
+
+        key = StorageService.rendition_key(clip_id)
+        StorageService.get_s3_client().upload_file(
+            output_path,
+            settings.S3_BUCKET_NAME,
+            key,
+            ExtraArgs={"ContentType": "video/mp4"},
+        )
+        return {
+            "rendition_key": key,
+            "size_bytes": os.path.getsize(output_path),
+            "watermark": overlay.describe(),
+        }
+
+
+def grab_keyframe(source_url: str, timestamp: float, size: tuple) -> Optional[np.ndarray]:
+    """
+    Decode the keyframe at or before timestamp as an RGB array
+    Input-side seeking makes ffmpeg fetch only the byte ranges around that
+    point, and skip_frame=nokey keeps it from decoding anything in between
+    """
+    import ffmpeg
+
+    width, height = size
+    out, _ = (
+        ffmpeg
+        .input(source_url, ss=f"{timestamp:.3f}", skip_frame="nokey", noaccurate_seek=None)
+        .output(
+            "pipe:",
+            vframes=1,
+            format="rawvideo",
+            pix_fmt="rgb24",
+            # Letterbox into a fixed box so frames tile cleanly
+            vf=(
+                f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2"
+            ),
+        )
+        .run(capture_stdout=True, quiet=True)
+    )
+    if len(out) != width * height * 3:
+        return None
+    return np.frombuffer(out, np.uint8).reshape(height, width, 3)
+
+
+def sprite_timestamps(duration_seconds: float, frames: int = SPRITE_FRAMES) -> List[float]:
+    """Start of each equal slice of the clip, one sprite tile per slice"""
+    interval = duration_seconds / frames
+    return [i * interval for i in range(frames)]
+
+
+def build_sprite(tiles: Sequence[np.ndarray], columns: int = SPRITE_COLUMNS) -> np.ndarray:
+    """Lay equally sized RGB tiles out row-major in a single image"""
+    height, width, _ = tiles[0].shape
+    rows = math.ceil(len(tiles) / columns)
+    sprite = np.zeros((rows * height, columns * width, 3), dtype=np.uint8)
+    for index, tile in enumerate(tiles):
+        row, column = divmod(index, columns)
+        sprite[row * height:(row + 1) * height, column * width:(column + 1) * width] = tile
+    return sprite
+
+
+def _encode_image(pixels: np.ndarray, image_format: str, quality: int) -> bytes:
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format=image_format, quality=quality)
+    return buffer.getvalue()
+
+
+def generate_previews(clip_id: str, source_url: str, duration_seconds: float) -> dict:
+    """
+    Poster thumbnail and timeline sprite for a clip
+    Runs in a worker process. Every frame is a single keyframe seek, so
+    the full clip is never downloaded or decoded
+    """
+    s3_client = StorageService.get_s3_client()
+    result = {}
+
+    poster = grab_keyframe(source_url, duration_seconds / 2, THUMBNAIL_SIZE)
+    if poster is not None:
+        key = StorageService.thumbnail_key(clip_id)
+        s3_client.put_object(
+            Bucket=settings.S3_BUCKET_NAME,
+            Key=key,
+            Body=_encode_image(poster, "JPEG", quality=80),
+            ContentType="image/jpeg",
+        )
+        result["thumbnail_key"] = key
+
+    timestamps = sprite_timestamps(duration_seconds)
+    tiles = [grab_keyframe(source_url, t, SPRITE_TILE_SIZE) for t in timestamps]
+    # A seek past the last keyframe yields nothing; reuse the previous tile
+    blank = np.zeros((SPRITE_TILE_SIZE[1], SPRITE_TILE_SIZE[0], 3), np.uint8)
+    for index, tile in enumerate(tiles):
+        if tile is None:
+            tiles[index] = tiles[index - 1] if index else blank
+
+    key = StorageService.sprite_key(clip_id)
+    s3_client.put_object(
+        Bucket=settings.S3_BUCKET_NAME,
+        Key=key,
+        Body=_encode_image(build_sprite(tiles), "WEBP", quality=70),
+        ContentType="image/webp",
+    )
+    result["sprite"] = {
+        "key": key,
+        "columns": SPRITE_COLUMNS,
+        "rows": math.ceil(len(tiles) / SPRITE_COLUMNS),
+        "tile_width": SPRITE_TILE_SIZE[0],
+        "tile_height": SPRITE_TILE_SIZE[1],
+        "interval_seconds": duration_seconds / len(tiles),
+    }
+    return result
+
+
+class VideoPipeline:
+    """
+    Bounded job queue in front of a process pool of ffmpeg workers
+    The queue is the backpressure point: when it is full new clips stay
+    QUEUED in the database and are picked up by requeue_pending later.
+    Every app worker runs a pipeline, so a clip is only processed after a
+    conditional UPDATE claims it; the claim time doubles as a lease that
+    another worker may take over once TRANSCODE_LEASE_MINUTES have passed
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._pool: Optional[Executor] = None
+        self._dispatchers: List[asyncio.Task] = []
+        self._pending: Set[str] = set()
+
+    @property
+    def running(self) -> bool:
+        return self._pool is not None
+
+    async def start(self, executor: Optional[Executor] = None) -> None:
+        """Start dispatching; tests pass a thread pool instead of the process pool"""
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        # spawn, not fork: the parent has a running event loop and threads
+        self._pool = executor or ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self._dispatchers = [
+            asyncio.create_task(self._dispatch(), name=f"video-dispatch-{n}")
+            for n in range(self.workers)
+        ]
+        await self.requeue_pending(older_than=timedelta(0))
+
+    async def stop(self) -> None:
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self._dispatchers.clear()
+
+        if self._pool is not None:
+            # Interrupted clips keep their lease and are taken over once it expires
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._queue = None
+        self._pending.clear()
+
+    async def join(self) -> None:
+        """Wait until every submitted clip has been handled"""
+        if self.running:
+            await self._queue.join()
+
+    def submit(self, clip_id: str) -> bool:
+        """Queue a clip without waiting; False if the pipeline is off or full"""
+        if not self.running:
+            return False
+        if clip_id in self._pending:
+            return True
+
+        try:
+            self._queue.put_nowait(clip_id)
+        except asyncio.QueueFull:
+            logger.warning("Video queue full, clip %s left for requeue", clip_id)
+            return False
+
+        self._pending.add(clip_id)
+        return True
+
+    async def requeue_pending(self, older_than: timedelta = REQUEUE_AFTER) -> int:
+        """Re-submit QUEUED clips and PROCESSING ones whose lease ran out (restarts, full queue)"""
+        if not self.running:
+            return 0
+
+        room = self._queue.maxsize - self._queue.qsize()
+        if room <= 0:
+            return 0
+
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Clip.id)
+                .where(
+                    or_(
+                        and_(
+                            Clip.processing_status == ClipProcessingStatusEnum.QUEUED,
+                            Clip.uploaded_at <= now - older_than,
+                        ),
+                        lease_expired(now),
+                    )
+                )
+                .order_by(Clip.uploaded_at)
+                .limit(room + len(self._pending))
+            )
+            clip_ids = result.scalars().all()
+
+        submitted = 0
+        for clip_id in clip_ids:
+            if clip_id in self._pending:
+                continue
+            if not self.submit(clip_id):
+                break
+            submitted += 1
+        return submitted
+
+    async def _dispatch(self) -> None:
+        while True:
+            clip_id = await self._queue.get()
+            try:
+                await self._process(clip_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Video processing failed for clip %s", clip_id)
+            finally:
+                self._pending.discard(clip_id)
+                self._queue.task_done()
+
+    async def _claim(self, clip_id: str) -> Optional[datetime]:
+        """Take a QUEUED (or abandoned PROCESSING) clip, returns the lease or None"""
+        claimed_at = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(Clip)
+                .where(
+                    Clip.id == clip_id,
+                    or_(
+                        Clip.processing_status == ClipProcessingStatusEnum.QUEUED,
+                        lease_expired(claimed_at),
+                    )
+                )
+                .values(
+                    processing_status=ClipProcessingStatusEnum.PROCESSING,
+                    processing_started_at=claimed_at,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        return claimed_at if result.rowcount == 1 else None
+
+    async def _process(self, clip_id: str) -> None:
+        # Another worker has it, or it is already READY/FAILED
+        lease = await self._claim(clip_id)
+        if lease is None:
+            return
+
+        try:
+            await self._transcode(clip_id, lease)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Video processing failed for clip %s", clip_id)
+            await self._set_status(clip_id, lease, ClipProcessingStatusEnum.FAILED)
+
+    async def _transcode(self, clip_id: str, lease: datetime) -> None:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Clip, User.username)
+                .join(User, User.id == Clip.user_id)
+                .where(Clip.id == clip_id)
+            )
+            clip, username = result.one()
+
+        source_url = await StorageService.generate_view_url(clip_id)
+        loop = asyncio.get_running_loop()
+
+        # Previews first: they are cheap and the timeline needs them sooner
+        try:
+            await self._save_previews(clip_id, lease, source_url, clip.duration_seconds)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Preview generation failed for clip %s", clip_id)
+
+        lines = watermark_lines(clip.match_id, username, clip.gps_lat, clip.gps_lng, clip.recorded_at)
+        result = await loop.run_in_executor(self._pool, transcode_clip, clip_id, source_url, lines)
+
+        rendition_url = await StorageService.get_object_url(result["rendition_key"])
+        await self._set_status(
+            clip_id,
+            lease,
+            ClipProcessingStatusEnum.READY,
+            rendition_url=rendition_url,
+            watermark_data=build_watermark_data(
+                lines,
+                clip.match_id,
+                clip.user_id,
+                clip.gps_lat,
+                clip.gps_lng,
+                clip.recorded_at,
+                overlay=result["watermark"],
+            ),
+        )
+
+    async def _save_previews(self, clip_id: str, lease: datetime, source_url: str, duration_seconds: float) -> None:
+        loop = asyncio.get_running_loop()
+        previews = await loop.run_in_executor(
+            self._pool, generate_previews, clip_id, source_url, duration_seconds
+        )
+
+        async with AsyncSessionLocal() as db:
+            clip = await db.get(Clip, clip_id)
+            if clip is None or clip.processing_started_at != lease:
+                return
+            if "thumbnail_key" in previews:
+                clip.thumbnail_url = await StorageService.get_object_url(previews["thumbnail_key"])
+            sprite = dict(previews["sprite"])
+            sprite["url"] = await StorageService.get_object_url(sprite.pop("key"))
+            # Reassign so the JSON column is flagged as changed
+            clip.extra_data = {**(clip.extra_data or {}), "preview_sprite": sprite}
+            await db.commit()
+
+    async def _set_status(
+        self,
+        clip_id: str,
+        lease: datetime,
+        processing_status: ClipProcessingStatusEnum,
+        **values
+    ) -> bool:
+        """Finish a claimed clip; False if its lease was taken over meanwhile"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(Clip)
+                .where(
+                    Clip.id == clip_id,
+                    Clip.processing_status == ClipProcessingStatusEnum.PROCESSING,
+                    Clip.processing_started_at == lease,
+                )
+                .values(processing_status=processing_status, **values)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+        if result.rowcount != 1:
+            logger.warning("Clip %s was taken over by another worker, result dropped", clip_id)
+            return False
+        return True
+
+
+video_pipeline = VideoPipeline(settings.TRANSCODE_WORKERS, settings.TRANSCODE_QUEUE_SIZE)
+
+
+async def requeue_pending_clips() -> None:
+    """Background job: pick up clips the queue had no room for"""
+    submitted = await video_pipeline.requeue_pending()
+    if submitted:
+        logger.info("Requeued %d clips for video processing", submitted)
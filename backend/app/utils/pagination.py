@@ -0,0 +1,24 @@
+from fastapi import HTTPException, status
+from datetime import datetime
+from typing import Tuple
+import base64
+import json
+
+
+def encode_cursor(timestamp: datetime, row_id: str) -> str:
+    """Opaque keyset cursor for the (timestamp, id) of the last row on a page"""
+    raw = json.dumps([timestamp.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Inverse of encode_cursor, 400 on anything that is not a cursor we issued"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(timestamp), str(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
@@ -0,0 +1,56 @@
+"""
+Fast path for large list responses
+
+A list endpoint normally builds its response model from ORM rows
+(from_attributes validation), FastAPI validates that model again against
+response_model, walks it with jsonable_encoder and finally calls json.dumps.
+Rows straight out of our own database don't need any of that: RowSerializer
+copies a schema's fields off each row into a plain dict and orjson encodes
+dicts, datetimes and enums natively. The route keeps its response_model so
+the OpenAPI schema is unchanged, and returns the response itself so FastAPI
+skips its own validation. Encode with dumps / RowResponse so UTC datetimes
+come out with a "Z" suffix, as Pydantic writes them, not "+00:00"
+"""
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Type
+
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+import orjson
+
+DUMPS_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def dumps(value: Any) -> bytes:
+    """orjson.dumps with the options that match Pydantic's JSON output"""
+    return orjson.dumps(value, option=DUMPS_OPTIONS)
+
+
+class RowResponse(ORJSONResponse):
+    """ORJSONResponse encoding datetimes the way response_model would"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class RowSerializer:
+    """
+    Dicts with a response schema's fields, read straight off trusted rows
+    No validation or coercion happens, so the schema must only have fields
+    the rows already hold in JSON-ready form (nested models as plain dicts)
+    """
+
+    def __init__(self, schema: Type[BaseModel]):
+        self.fields = tuple(schema.model_fields)
+        if len(self.fields) > 1:
+            self._getter = attrgetter(*self.fields)
+        else:
+            single = attrgetter(*self.fields)
+            self._getter = lambda obj: (single(obj),)
+
+    def row(self, obj: Any) -> Dict[str, Any]:
+        return dict(zip(self.fields, self._getter(obj)))
+
+    def rows(self, objs: Iterable[Any]) -> List[Dict[str, Any]]:
+        fields, getter = self.fields, self._getter
+        return [dict(zip(fields, getter(obj))) for obj in objs]
@@ -0,0 +1,109 @@
+"""
+Burned-in clip watermark
+
+The overlay is rendered once per clip with Pillow, then alpha-blended into
+each decoded frame with integer numpy ops while the transcoder streams it,
+so watermarking never costs a second encode
+"""
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+
+WATERMARK_VERSION = 1
+OPACITY = 0.8
+MARGIN_RATIO = 0.02
+FONT_HEIGHT_RATIO = 1 / 32
+PADDING = 6
+
+
+def watermark_lines(
+    match_id: str,
+    username: str,
+    gps_lat: float,
+    gps_lng: float,
+    recorded_at: datetime
+) -> List[str]:
+    """Text burned into a clip, top to bottom"""
+    return [
+        f"SK8 {match_id[:8]} @{username}",
+        f"{gps_lat:.5f}, {gps_lng:.5f}",
+        recorded_at.strftime("%Y-%m-%d %H:%M:%S UTC"),
+    ]
+
+
+class WatermarkOverlay:
+    """
+    Text box rendered once for a frame size, blended into frames in place
+    Only the box region is touched; alpha and premultiplied color are kept
+    as uint32 so the blend is exact integer math with no per-frame allocs
+    beyond the region itself
+    """
+
+    def __init__(self, lines: List[str], frame_width: int, frame_height: int, opacity: float = OPACITY):
+        from PIL import Image, ImageDraw, ImageFont
+
+        font_size = max(10, round(frame_height * FONT_HEIGHT_RATIO))
+        font = ImageFont.load_default(size=font_size)
+        text = "\n".join(lines)
+
+        measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+        left, top, right, bottom = measure.multiline_textbbox((0, 0), text, font=font)
+        margin = round(frame_height * MARGIN_RATIO)
+        width = min(right - left + 2 * PADDING, frame_width - 2 * margin)
+        height = min(bottom - top + 2 * PADDING, frame_height - 2 * margin)
+
+        tile = Image.new("RGBA", (width, height), (0, 0, 0, 110))
+        draw = ImageDraw.Draw(tile)
+        draw.multiline_text((PADDING - left, PADDING - top), text, font=font, fill=(255, 255, 255, 255))
+
+        rgba = np.asarray(tile, dtype=np.uint32)
+        self._alpha = (rgba[..., 3:4] * opacity).astype(np.uint32)
+        self._inverse_alpha = 255 - self._alpha
+        self._color = rgba[..., :3] * self._alpha
+
+        self.x = margin
+        self.y = frame_height - margin - height
+        self.width = width
+        self.height = height
+        self.font_size = font_size
+        self.opacity = opacity
+
+    def apply(self, frame: np.ndarray) -> np.ndarray:
+        """Blend into an (H, W, 3) uint8 RGB frame in place"""
+        region = frame[self.y:self.y + self.height, self.x:self.x + self.width]
+        region[...] = (region * self._inverse_alpha + self._color + 127) // 255
+        return frame
+
+    def describe(self) -> dict:
+        return {
+            "x": self.x,
+            "y": self.y,
+            "width": self.width,
+            "height": self.height,
+            "font_size": self.font_size,
+            "opacity": self.opacity,
+        }
+
+
+def build_watermark_data(
+    lines: List[str],
+    match_id: str,
+    user_id: str,
+    gps_lat: float,
+    gps_lng: float,
+    recorded_at: datetime,
+    overlay: Optional[dict] = None
+) -> dict:
+    """What goes in Clip.watermark_data so a watermark can be checked later"""
+    return {
+        "version": WATERMARK_VERSION,
+        "match_id": match_id,
+        "user_id": user_id,
+        "gps_lat": gps_lat,
+        "gps_lng": gps_lng,
+        "recorded_at": recorded_at.isoformat(),
+        "lines": lines,
+        "position": "bottom-left",
+        "overlay": overlay,
+    }
@@ -0,0 +1,71 @@
+"""
+Micro-benchmark: scalar Haversine loop vs the vectorized batch kernel
+
+Run from backend/ with the app's .env in place:
+    python -m benchmarks.bench_gps
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.gps import haversine_miles, batch_distances
+
+
+def best_of(repeats: int, fn) -> float:
+    """Best wall time in seconds over a few runs"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(point_counts, anchor_counts, repeats: int) -> None:
+    rng = np.random.default_rng(42)
+
+    print(f"{'points':>8} {'anchors':>8} {'scalar ms':>10} {'batch ms':>10} {'speedup':>8}")
+    for n_points in point_counts:
+        points = np.column_stack([
+            rng.uniform(33.5, 34.5, n_points),
+            rng.uniform(-118.8, -117.8, n_points),
+        ])
+        point_list = points.tolist()
+
+        for n_anchors in anchor_counts:
+            anchors = points[:n_anchors].copy()
+            anchor_list = anchors.tolist()
+
+            def scalar():
+                return [
+                    [haversine_miles(lat, lng, a_lat, a_lng) for a_lat, a_lng in anchor_list]
+                    for lat, lng in point_list
+                ]
+
+            def batch():
+                return batch_distances(points, anchors)
+
+            # Same answers before timing anything
+            assert np.allclose(np.array(scalar()), batch())
+
+            scalar_s = best_of(repeats, scalar)
+            batch_s = best_of(repeats, batch)
+            print(
+                f"{n_points:>8} {n_anchors:>8} {scalar_s * 1000:>10.2f} "
+                f"{batch_s * 1000:>10.3f} {scalar_s / batch_s:>7.1f}x"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, nargs="+", default=[1, 100, 1_000, 10_000])
+    parser.add_argument("--anchors", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    run(args.points, args.anchors, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
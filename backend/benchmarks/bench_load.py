@@ -0,0 +1,288 @@
+"""
+End-to-end load test: simulated players playing full games of SKATE
+
+Players register in pairs. One creates a challenge and the other accepts
+it, then they play to five letters through the real routes. Each round is
+upload init and complete for the trick, the same for the attempt, and then
+a judgement. Both players check their history at the end. Everything runs
+in-process against the ASGI app. It uses a throwaway SQLite file, the
+in-memory S3 stand-in from the tests and Redis switched off, so the
+numbers are for comparing runs rather than predicting production.
+
+Reports latency percentiles and throughput per endpoint.
+--save-baseline writes the results to JSON. --baseline compares a run
+against that file, and --max-regression turns a slower p95 into a
+non-zero exit.
+
+Run from backend/ with the app's .env in place:
+    python -m benchmarks.bench_load --players 2000 --concurrency 50
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.api import deps
+from app.core.config import settings
+from app.core.database import Base, get_db
+from app.main import app
+from app.services.storage_service import StorageService
+from tests.fake_s3 import FakeS3Client
+
+SPOT = (34.0522, -118.2437)
+
+
+class RequestFailed(Exception):
+    pass
+
+
+class Recorder:
+    """Latency samples and error counts per endpoint (method + route template)"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, method: str, route: str, url: Optional[str] = None, **kwargs) -> dict:
+        endpoint = f"{method} {route}"
+        start = time.perf_counter()
+        response = await client.request(method, url or route, **kwargs)
+        self.latencies[endpoint].append(time.perf_counter() - start)
+
+        if response.status_code >= 400:
+            self.errors[endpoint] += 1
+            raise RequestFailed(f"{endpoint}: {response.status_code} {response.text[:200]}")
+        return response.json()
+
+    def summary(self, wall_seconds: float) -> dict:
+        endpoints = {}
+        for endpoint, samples in sorted(self.latencies.items()):
+            p50, p95, p99 = np.percentile(np.array(samples) * 1000, [50, 95, 99])
+            endpoints[endpoint] = {
+                "count": len(samples),
+                "errors": self.errors.get(endpoint, 0),
+                "p50_ms": round(float(p50), 3),
+                "p95_ms": round(float(p95), 3),
+                "p99_ms": round(float(p99), 3),
+                "rps": round(len(samples) / wall_seconds, 1),
+            }
+        total = sum(len(samples) for samples in self.latencies.values())
+        return {
+            "wall_seconds": round(wall_seconds, 2),
+            "requests": total,
+            "rps": round(total / wall_seconds, 1),
+            "endpoints": endpoints,
+        }
+
+
+async def register(client: httpx.AsyncClient, rec: Recorder, username: str) -> dict:
+    token = await rec.call(client, "POST", "/api/v1/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "password": "loadtest-password",
+        "stance": "regular",
+    })
+    return {"Authorization": f"Bearer {token['access_token']}"}
+
+
+async def upload_clip(client: httpx.AsyncClient, rec: Recorder, headers: dict, match_id: str, clip_type: str, rng: random.Random) -> str:
+    """Init and complete one small clip; the bytes themselves go straight to S3"""
+    init = await rec.call(client, "POST", "/api/v1/clips/upload/init", headers=headers, json={
+        "match_id": match_id,
+        "clip_type": clip_type,
+        "gps_lat": SPOT[0] + rng.uniform(-0.001, 0.001),
+        "gps_lng": SPOT[1] + rng.uniform(-0.001, 0.001),
+        "duration_seconds": rng.uniform(5, 30),
+        "file_size_bytes": rng.randint(1, 6) * 1024 * 1024,
+        "trick_name": rng.choice(["kickflip", "heelflip", "tre flip", "hardflip", "nollie bigspin"]),
+    })
+    clip_id = init["clip_id"]
+    await rec.call(
+        client, "POST", "/api/v1/clips/upload/complete/{clip_id}",
+        url=f"/api/v1/clips/upload/complete/{clip_id}", headers=headers
+    )
+    return clip_id
+
+
+async def play_game(client: httpx.AsyncClient, rec: Recorder, index: int, land_rate: float, seed: int) -> int:
+    """One full game between two new players, returns rounds played"""
+    rng = random.Random(seed + index)
+    challenger = await register(client, rec, f"load{index}a")
+    opponent = await register(client, rec, f"load{index}b")
+
+    challenge = await rec.call(client, "POST", "/api/v1/matches/challenge/create", headers=challenger, json={
+        "gps_lat": SPOT[0],
+        "gps_lng": SPOT[1],
+    })
+    match_id = challenge["match_id"]
+    match = await rec.call(
+        client, "POST", "/api/v1/matches/challenge/accept/{challenge_code}",
+        url=f"/api/v1/matches/challenge/accept/{challenge['challenge_code']}", headers=opponent
+    )
+    players = {match["player1_id"]: challenger, match["player2_id"]: opponent}
+
+    rounds = 0
+    while match["status"] == "active":
+        setter_id = match["current_turn_user_id"]
+        setter = players[setter_id]
+        attempter = next(headers for user_id, headers in players.items() if user_id != setter_id)
+
+        await upload_clip(client, rec, setter, match_id, "trick_set", rng)
+        attempt_id = await upload_clip(client, rec, attempter, match_id, "trick_match", rng)
+        match = await rec.call(client, "POST", "/api/v1/clips/judge", headers=setter, json={
+            "clip_id": attempt_id,
+            "approved": rng.random() < land_rate,
+        })
+        rounds += 1
+
+    for headers in (challenger, opponent):
+        await rec.call(client, "GET", "/api/v1/matches/history", headers=headers)
+    return rounds
+
+
+def use_sqlite_file(path: Path):
+    """
+    Point the app at a fresh SQLite file
+    One pooled connection: SQLite takes one writer at a time anyway, and
+    queueing for the pool is fairer than sleeping in SQLite's busy handler
+    """
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{path}",
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=120,
+    )
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _enable_wal(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    sessions = async_sessionmaker(engine, expire_on_commit=False, autocommit=False, autoflush=False)
+
+    async def get_load_db():
+        async with sessions() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = get_load_db
+    app.dependency_overrides[deps.get_db] = get_load_db
+    return engine
+
+
+async def run(players: int, concurrency: int, land_rate: float, seed: int) -> dict:
+    # Hashing dominates otherwise; this measures the game, not bcrypt
+    settings.BCRYPT_ROUNDS = 4
+    settings.REDIS_ENABLED = False
+    settings.VIDEO_PROCESSING_ENABLED = False
+    StorageService.set_s3_client(FakeS3Client())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = use_sqlite_file(Path(tmp) / "load.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        rec = Recorder()
+        gate = asyncio.Semaphore(concurrency)
+        failures: List[str] = []
+        rounds: List[int] = []
+
+        async def one_game(index: int) -> None:
+            async with gate:
+                try:
+                    rounds.append(await play_game(client, rec, index, land_rate, seed))
+                except RequestFailed as e:
+                    failures.append(str(e))
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load") as client:
+            started = time.perf_counter()
+            await asyncio.gather(*(one_game(i) for i in range(players // 2)))
+            wall_seconds = time.perf_counter() - started
+
+        await engine.dispose()
+
+    result = rec.summary(wall_seconds)
+    result.update({
+        "players": players,
+        "concurrency": concurrency,
+        "games_completed": len(rounds),
+        "games_failed": len(failures),
+        "mean_rounds": round(sum(rounds) / len(rounds), 2) if rounds else 0,
+    })
+    for failure in failures[:5]:
+        print(f"failed: {failure}", file=sys.stderr)
+    return result
+
+
+def report(result: dict, baseline: Optional[dict]) -> List[str]:
+    """Print the results table, returns endpoints whose p95 regressed vs baseline"""
+    print(
+        f"{result['players']} players, {result['games_completed']} games "
+        f"({result['games_failed']} failed, {result['mean_rounds']} rounds avg), "
+        f"{result['requests']} requests in {result['wall_seconds']}s = {result['rps']} req/s"
+    )
+    header = f"{'endpoint':<54} {'count':>6} {'err':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8}"
+    if baseline:
+        header += f" {'p95 vs base':>12}"
+    print(header)
+
+    deltas = {}
+    for endpoint, stats in result["endpoints"].items():
+        line = (
+            f"{endpoint:<54} {stats['count']:>6} {stats['errors']:>4} {stats['p50_ms']:>8.2f} "
+            f"{stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} {stats['rps']:>8.1f}"
+        )
+        base = (baseline or {}).get("endpoints", {}).get(endpoint)
+        if base:
+            deltas[endpoint] = (stats["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100
+            line += f" {deltas[endpoint]:>+11.1f}%"
+        print(line)
+
+    if baseline:
+        change = (result["rps"] - baseline["rps"]) / baseline["rps"] * 100
+        print(f"throughput vs baseline: {baseline['rps']} -> {result['rps']} req/s ({change:+.1f}%)")
+    return deltas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50, help="Games in flight at once")
+    parser.add_argument("--land-rate", type=float, default=0.5, help="Chance an attempt is judged landed")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", type=Path, help="Compare against a saved run")
+    parser.add_argument("--save-baseline", type=Path, help="Write this run's results as JSON")
+    parser.add_argument("--max-regression", type=float, help="Exit 1 if any endpoint's p95 is this many %% worse than baseline")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.players, args.concurrency, args.land_rate, args.seed))
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    deltas = report(result, baseline)
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"saved baseline to {args.save_baseline}")
+
+    regressed = [e for e, delta in deltas.items() if args.max_regression is not None and delta > args.max_regression]
+    if regressed or result["games_failed"]:
+        for endpoint in regressed:
+            print(f"p95 regression over {args.max_regression}%: {endpoint}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
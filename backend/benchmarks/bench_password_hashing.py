@@ -0,0 +1,85 @@
+"""
+Event-loop lag under a burst of concurrent logins
+
+Runs the same burst of password checks twice - inline bcrypt (the old
+handlers) and the hashing pool - while a 1 ms ticker measures how late the
+event loop wakes it up. Late ticks are what every other request on the
+worker feels.
+
+Run from backend/ with the app's .env in place:
+    python -m benchmarks.bench_password_hashing --logins 32
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.core.security import get_password_hash, verify_password, verify_password_async
+
+TICK_SECONDS = 0.001
+
+
+async def ticker(lags: list, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append(time.perf_counter() - start - TICK_SECONDS)
+
+
+async def inline_login(password: str, hashed: str) -> bool:
+    # What the handlers used to do: bcrypt directly inside the coroutine
+    return verify_password(password, hashed)
+
+
+async def pooled_login(password: str, hashed: str) -> bool:
+    return await verify_password_async(password, hashed)
+
+
+async def measure(login, logins: int, password: str, hashed: str) -> dict:
+    lags = []
+    stop = asyncio.Event()
+    tick_task = asyncio.create_task(ticker(lags, stop))
+    await asyncio.sleep(0.05)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(login(password, hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await tick_task
+    assert all(results)
+
+    lags_ms = sorted(lag * 1000 for lag in lags)
+    return {
+        "elapsed_s": elapsed,
+        "ticks": len(lags_ms),
+        "p50_ms": statistics.median(lags_ms),
+        "p99_ms": lags_ms[int(len(lags_ms) * 0.99) - 1] if len(lags_ms) > 1 else lags_ms[-1],
+        "max_ms": lags_ms[-1],
+    }
+
+
+async def run(logins: int) -> None:
+    password = "testpass123"
+    hashed = get_password_hash(password)
+
+    print(f"{logins} concurrent logins")
+    print(f"{'mode':>8} {'total s':>8} {'ticks':>6} {'lag p50 ms':>11} {'lag p99 ms':>11} {'lag max ms':>11}")
+    for name, login in (("inline", inline_login), ("pool", pooled_login)):
+        stats = await measure(login, logins, password, hashed)
+        print(
+            f"{name:>8} {stats['elapsed_s']:>8.2f} {stats['ticks']:>6} "
+            f"{stats['p50_ms']:>11.2f} {stats['p99_ms']:>11.2f} {stats['max_ms']:>11.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=32)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.logins))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Full-history rating replay: one match at a time vs player-disjoint waves
+
+Generates a synthetic history (random pairings over a player pool) and
+replays it both ways with the same parameters, checking they agree.
+
+Run from backend/ with the app's .env in place:
+    python -m benchmarks.bench_rating_replay --matches 1000000 --players 50000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.rating import RatingParams, RatingService, replay_chunk
+
+
+def sequential(winners: np.ndarray, losers: np.ndarray, players: int, params: RatingParams) -> list:
+    ratings = [params.initial] * players
+    games = [0] * players
+    for w, l in zip(winners.tolist(), losers.tolist()):
+        up, down = RatingService.rating_deltas(ratings[w], games[w], ratings[l], games[l], params)
+        ratings[w] += up
+        ratings[l] += down
+        games[w] += 1
+        games[l] += 1
+    return ratings
+
+
+def waves(winners: np.ndarray, losers: np.ndarray, players: int, params: RatingParams, chunk: int) -> np.ndarray:
+    ratings = np.full(players, params.initial)
+    games = np.zeros(players, dtype=np.int64)
+    for start in range(0, len(winners), chunk):
+        replay_chunk(ratings, games, winners[start:start + chunk], losers[start:start + chunk], params)
+    return ratings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=1_000_000)
+    parser.add_argument("--players", type=int, default=50_000)
+    parser.add_argument("--chunk", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    params = RatingParams()
+    winners = rng.integers(0, args.players, args.matches)
+    losers = (winners + rng.integers(1, args.players, args.matches)) % args.players
+
+    print(f"{args.matches} matches, {args.players} players")
+
+    start = time.perf_counter()
+    expected = sequential(winners, losers, args.players, params)
+    sequential_s = time.perf_counter() - start
+    print(f"{'sequential':>10} {sequential_s:8.2f} s")
+
+    start = time.perf_counter()
+    result = waves(winners, losers, args.players, params, args.chunk)
+    waves_s = time.perf_counter() - start
+    print(f"{'waves':>10} {waves_s:8.2f} s  ({sequential_s / waves_s:.1f}x)")
+
+    assert np.allclose(result, expected)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+List response serialization: response_model path vs the orjson fast path
+
+The old path is what FastAPI did for /clips/match/{id} and /matches/history:
+build the list model from ORM rows, validate it against response_model,
+jsonable_encoder, json.dumps. The fast path is RowSerializer + orjson. Both
+bodies are checked to decode to the same JSON before timing. Times are
+process CPU per request.
+
+Run from backend/ with the app's .env in place:
+    python -m benchmarks.bench_serialization
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.models.clip import Clip, ClipTypeEnum, ClipStatusEnum, ClipProcessingStatusEnum
+from app.models.match import Match, MatchModeEnum, MatchStatusEnum
+from app.schemas.clip import ClipResponse, ClipListResponse
+from app.schemas.match import MatchResponse, MatchListResponse
+from app.utils.serialization import RowSerializer
+
+
+def make_matches(count: int) -> list:
+    started = datetime(2026, 1, 1)
+    return [
+        Match(
+            id=f"match-{i:08d}",
+            player1_id="player-one",
+            player2_id=f"player-{i:08d}",
+            mode=MatchModeEnum.NORMAL,
+            status=MatchStatusEnum.COMPLETED,
+            player1_letters=5,
+            player2_letters=i % 5,
+            winner_id=f"player-{i:08d}",
+            gps_anchor_lat=34.05,
+            gps_anchor_lng=-118.24,
+            created_at=started + timedelta(minutes=i),
+            started_at=started + timedelta(minutes=i, seconds=30),
+            completed_at=started + timedelta(minutes=i + 20, microseconds=i),
+            last_activity=started + timedelta(minutes=i + 20),
+        )
+        for i in range(count)
+    ]
+
+
+def make_clips(count: int) -> list:
+    uploaded = datetime(2026, 1, 1)
+    return [
+        Clip(
+            id=f"clip-{i:08d}",
+            match_id="match-00000001",
+            user_id="player-one",
+            clip_type=ClipTypeEnum.TRICK_SET,
+            status=ClipStatusEnum.APPROVED,
+            video_url=f"https://sk8-clips.s3.amazonaws.com/clips/match-00000001/clip-{i:08d}.mp4",
+            thumbnail_url=f"https://sk8-clips.s3.amazonaws.com/thumbnails/clip-{i:08d}.jpg",
+            processing_status=ClipProcessingStatusEnum.READY,
+            duration_seconds=12.5,
+            file_size_bytes=8_000_000,
+            trick_name="kickflip",
+            gps_lat=34.05,
+            gps_lng=-118.24,
+            gps_distance_from_anchor_miles=0.1,
+            gps_verified=True,
+            recorded_at=uploaded + timedelta(minutes=i),
+            uploaded_at=uploaded + timedelta(minutes=i, seconds=40),
+            judged_at=uploaded + timedelta(minutes=i + 1),
+            extra_data={"preview_sprite": {
+                "url": f"https://sk8-clips.s3.amazonaws.com/previews/clip-{i:08d}_sprite.webp",
+                "columns": 5,
+                "rows": 2,
+                "tile_width": 160,
+                "tile_height": 90,
+                "interval_seconds": 1.25,
+            }},
+        )
+        for i in range(count)
+    ]
+
+
+def cpu_ms(repeats: int, fn) -> float:
+    """Best process CPU time in ms over a few runs"""
+    timings = []
+    for _ in range(repeats):
+        start = time.process_time()
+        fn()
+        timings.append(time.process_time() - start)
+    return min(timings) * 1000
+
+
+def run(row_counts, repeats: int) -> None:
+    cases = [
+        ("matches", make_matches, MatchListResponse, RowSerializer(MatchResponse)),
+        ("clips", make_clips, ClipListResponse, RowSerializer(ClipResponse)),
+    ]
+
+    print(f"{'list':>8} {'rows':>7} {'model ms':>10} {'fast ms':>10} {'speedup':>8}")
+    for name, make_rows, list_schema, serializer in cases:
+        field = create_response_field(name=f"bench_{name}", type_=list_schema)
+
+        for count in row_counts:
+            rows = make_rows(count)
+
+            def model_path():
+                content = list_schema(**{name: rows, "total": count})
+                payload = asyncio.run(serialize_response(field=field, response_content=content))
+                return JSONResponse(payload).body
+
+            def fast_path():
+                return ORJSONResponse({name: serializer.rows(rows), "total": count}).body
+
+            old, new = json.loads(model_path()), json.loads(fast_path())
+            new.pop("next_cursor", None)
+            old.pop("next_cursor", None)
+            assert old == new
+
+            model_ms = cpu_ms(repeats, model_path)
+            fast_ms = cpu_ms(repeats, fast_path)
+            print(f"{name:>8} {count:>7} {model_ms:>10.2f} {fast_ms:>10.2f} {model_ms / fast_ms:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    run(args.rows, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
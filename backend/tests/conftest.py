@@ -2,20 +2,27 @@ import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import StaticPool
 
 from app.main import app
+from app.api import deps
 from app.core.database import Base, get_db
-from app.models import user, match, clip
+from app.core.principal_cache import principal_cache
+from app.core.query_inspector import query_inspector as inspector
+from app.services.match_cache import match_cache
+from app.services.leaderboard import leaderboard
+from app.services.storage_service import StorageService
+from tests.fake_s3 import FakeS3Client
+from app.models import user, match, clip, archive, matchmaking, challenge
 
 # Test database URL
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
-# Create test engine
+# Create test engine - StaticPool keeps every session on the same in-memory DB
 engine = create_async_engine(
     TEST_DATABASE_URL,
     echo=False,
-    poolclass=NullPool,
+    poolclass=StaticPool,
 )
 
 TestSessionLocal = async_sessionmaker(
@@ -32,11 +39,29 @@ async def override_get_db():
 
 
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[deps.get_db] = override_get_db
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "postgres: needs a PostgreSQL database in TEST_POSTGRES_URL")
+
+
+@pytest.fixture(autouse=True)
+def fake_s3():
+    """Route all storage calls to an in-memory S3 stand-in"""
+    s3 = FakeS3Client()
+    StorageService.set_s3_client(s3)
+    yield s3
+    StorageService.set_s3_client(None)
 
 
 @pytest_asyncio.fixture
 async def client():
     """Create test client"""
+    principal_cache.clear()
+    match_cache.clear()
+    leaderboard.clear()
+    
     # Create tables
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -64,3 +89,11 @@ async def db_session():
     
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+
+
+@pytest.fixture
+def query_inspector():
+    """Query inspector on the test engine; use query_inspector.capture()"""
+    inspector.install(engine)
+    yield inspector
+    inspector.uninstall(engine)
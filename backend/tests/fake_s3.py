@@ -0,0 +1,107 @@
+"""In-memory stand-in for the boto3 S3 client used by StorageService"""
+from typing import Dict, Tuple
+from urllib.parse import urlencode
+import hashlib
+import uuid
+
+from botocore.exceptions import ClientError
+
+
+def _error(code: str, operation: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}}, operation)
+
+
+class FakeS3Client:
+    """
+    Implements the subset of the S3 client API the app calls
+    Objects live in a dict keyed by (bucket, key); presigned URLs point at
+    a fake host and encode the operation so tests can assert on them
+    """
+
+    def __init__(self, endpoint: str = "https://fake-s3.local"):
+        self.endpoint = endpoint
+        self.objects: Dict[Tuple[str, str], bytes] = {}
+        self.uploads: Dict[str, dict] = {}
+        self.presign_calls = 0
+
+    def generate_presigned_url(self, ClientMethod: str, Params: dict = None, ExpiresIn: int = 3600, HttpMethod: str = None) -> str:
+        self.presign_calls += 1
+        params = dict(Params or {})
+        bucket = params.pop("Bucket")
+        key = params.pop("Key")
+        query = urlencode({"op": ClientMethod, "expires": ExpiresIn, **params})
+        return f"{self.endpoint}/{bucket}/{key}?{query}"
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes = b"", **kwargs) -> dict:
+        if hasattr(Body, "read"):
+            Body = Body.read()
+        self.objects[(Bucket, Key)] = Body
+        return {"ETag": f'"{hashlib.md5(Body).hexdigest()}"'}
+
+    def head_object(self, Bucket: str, Key: str) -> dict:
+        if (Bucket, Key) not in self.objects:
+            raise _error("404", "HeadObject")
+        return {"ContentLength": len(self.objects[(Bucket, Key)])}
+
+    def get_object(self, Bucket: str, Key: str, Range: str = None) -> dict:
+        if (Bucket, Key) not in self.objects:
+            raise _error("NoSuchKey", "GetObject")
+        body = self.objects[(Bucket, Key)]
+        if Range:
+            start, end = Range.replace("bytes=", "").split("-")
+            body = body[int(start):int(end) + 1 if end else None]
+        return {"Body": _Body(body), "ContentLength": len(body)}
+
+    def delete_object(self, Bucket: str, Key: str) -> dict:
+        self.objects.pop((Bucket, Key), None)
+        return {}
+
+    def create_multipart_upload(self, Bucket: str, Key: str, **kwargs) -> dict:
+        upload_id = uuid.uuid4().hex
+        self.uploads[upload_id] = {"bucket": Bucket, "key": Key, "parts": {}}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body: bytes) -> dict:
+        if UploadId not in self.uploads:
+            raise _error("NoSuchUpload", "UploadPart")
+        etag = f'"{hashlib.md5(Body).hexdigest()}"'
+        self.uploads[UploadId]["parts"][PartNumber] = (etag, Body)
+        return {"ETag": etag}
+
+    def list_parts(self, Bucket: str, Key: str, UploadId: str, PartNumberMarker: int = 0, MaxParts: int = 1000) -> dict:
+        if UploadId not in self.uploads:
+            raise _error("NoSuchUpload", "ListParts")
+        numbers = sorted(n for n in self.uploads[UploadId]["parts"] if n > PartNumberMarker)
+        page = numbers[:MaxParts]
+        parts = [
+            {"PartNumber": n, "ETag": self.uploads[UploadId]["parts"][n][0], "Size": len(self.uploads[UploadId]["parts"][n][1])}
+            for n in page
+        ]
+        truncated = len(numbers) > MaxParts
+        return {"Parts": parts, "IsTruncated": truncated, "NextPartNumberMarker": page[-1] if page else 0}
+
+    def complete_multipart_upload(self, Bucket: str, Key: str, UploadId: str, MultipartUpload: dict) -> dict:
+        upload = self.uploads.get(UploadId)
+        if upload is None:
+            raise _error("NoSuchUpload", "CompleteMultipartUpload")
+        body = b""
+        for part in MultipartUpload["Parts"]:
+            etag, data = upload["parts"].get(part["PartNumber"], (None, None))
+            if etag != part["ETag"]:
+                raise _error("InvalidPart", "CompleteMultipartUpload")
+            body += data
+        self.objects[(Bucket, Key)] = body
+        del self.uploads[UploadId]
+        return {"Location": f"{self.endpoint}/{Bucket}/{Key}"}
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str) -> dict:
+        self.uploads.pop(UploadId, None)
+        return {}
+
+
+class _Body:
+    def __init__(self, data: bytes):
+        self._data = data
+
+    def read(self) -> bytes:
+        return self._data
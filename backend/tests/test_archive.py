@@ -0,0 +1,114 @@
+import pytest
+from datetime import datetime, timedelta
+from httpx import AsyncClient
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects import postgresql
+
+from app.models.archive import ArchivedClip, ArchivedMatch
+from app.models.clip import Clip
+from app.models.match import Match
+from app.services.archive import ArchiveService, archivable_matches
+from app.services.notification import notification_bus
+from app.services.rating import recompute_ratings
+from tests.conftest import TestSessionLocal
+from tests.test_clips import start_match, init_upload
+from tests.test_matches import create_challenge
+
+
+async def finished_match_with_clip(client: AsyncClient) -> tuple:
+    tony, rodney, match_id = await start_match(client)
+    clip = await init_upload(client, tony, match_id, "trick_set")
+    await client.post(f"/api/v1/clips/upload/complete/{clip['clip_id']}", headers=tony)
+    await client.post(f"/api/v1/matches/{match_id}/forfeit", headers=tony)
+    return tony, rodney, match_id, clip["clip_id"]
+
+
+async def count(model) -> int:
+    async with TestSessionLocal() as session:
+        return (await session.execute(select(func.count()).select_from(model))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_old_finished_matches_move_to_archive(client: AsyncClient):
+    """Test only finished matches past the cutoff are archived, clips included"""
+    tony, rodney, old_id, clip_id = await finished_match_with_clip(client)
+    recent = await create_challenge(client, tony)
+    await client.post(
+        f"/api/v1/matches/challenge/accept/{recent['challenge_code']}",
+        headers=rodney
+    )
+    await client.post(f"/api/v1/matches/{recent['match_id']}/forfeit", headers=rodney)
+    recent_id = recent["match_id"]
+    live = await create_challenge(client, tony)
+    async with TestSessionLocal() as session:
+        await session.execute(
+            update(Match)
+            .where(Match.id.in_([old_id, live["match_id"]]))
+            .values(last_activity=datetime.utcnow() - timedelta(days=120))
+        )
+        await session.commit()
+
+        archived = await ArchiveService.archive_finished_matches(session, timedelta(days=90), batch_size=1)
+
+    assert archived == 1
+    assert await count(Match) == 2
+    assert await count(Clip) == 0
+    assert await count(ArchivedMatch) == 1
+    assert await count(ArchivedClip) == 1
+
+    async with TestSessionLocal() as session:
+        assert (await session.get(ArchivedMatch, old_id)).winner_id is not None
+        assert await session.get(Match, recent_id) is not None
+
+
+@pytest.mark.asyncio
+async def test_reads_fall_back_to_archive(client: AsyncClient):
+    """Test an archived match still reads like any other"""
+    tony, rodney, match_id, clip_id = await finished_match_with_clip(client)
+    async with TestSessionLocal() as session:
+        await session.execute(
+            update(Match).where(Match.id == match_id).values(last_activity=datetime(2020, 1, 1))
+        )
+        await session.commit()
+        await ArchiveService.archive_finished_matches(session, timedelta(days=90))
+
+    response = await client.get(f"/api/v1/matches/{match_id}", headers=tony)
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+
+    history = (await client.get("/api/v1/matches/history", headers=rodney)).json()
+    assert history["total"] == 1
+    assert [m["id"] for m in history["matches"]] == [match_id]
+
+    clips = (await client.get(f"/api/v1/clips/match/{match_id}", headers=tony)).json()
+    assert [c["id"] for c in clips["clips"]] == [clip_id]
+
+    response = await client.get(f"/api/v1/clips/{clip_id}/url", headers=rodney)
+    assert response.status_code == 200
+
+    async with TestSessionLocal() as session:
+        summary = await recompute_ratings(session, dry_run=True)
+    assert summary["matches"] == 1
+
+
+def test_archive_batches_skip_rows_locked_by_other_workers():
+    """Test concurrent archival runs on PostgreSQL take disjoint batches"""
+    statement = archivable_matches(datetime(2026, 1, 1), 500)
+
+    assert str(statement.compile(dialect=postgresql.dialect())).endswith("FOR UPDATE SKIP LOCKED")
+
+
+@pytest.mark.asyncio
+async def test_archiving_announces_the_match(client: AsyncClient):
+    """Test archived matches are announced so every worker drops its cached copy"""
+    tony, rodney, match_id, clip_id = await finished_match_with_clip(client)
+
+    async with notification_bus.subscribe(match_id) as events:
+        async with TestSessionLocal() as session:
+            await session.execute(
+                update(Match).where(Match.id == match_id).values(last_activity=datetime(2020, 1, 1))
+            )
+            await session.commit()
+            await ArchiveService.archive_finished_matches(session, timedelta(days=90))
+
+        assert events.get_nowait()[0] == "match_archived"
@@ -1,5 +1,43 @@
+import asyncio
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.core import cache
+from app.core.cache import invalidation_relay
+from app.core.config import settings
+from app.core.principal_cache import principal_cache
+from app.models.user import User
+
+
+class FakeRedis:
+    """Just enough Redis for invalidations published by one worker to reach another"""
+
+    def __init__(self):
+        self.data = {}
+        self.messages = asyncio.Queue()
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def publish(self, channel, message):
+        await self.messages.put(message)
+
+    def pubsub(self):
+        return self
+
+    async def subscribe(self, channel):
+        pass
+
+    async def listen(self):
+        while True:
+            yield {"type": "message", "data": await self.messages.get()}
 
 
 @pytest.mark.asyncio
@@ -111,3 +149,70 @@ async def test_get_current_user(client: AsyncClient):
     assert data["stance"] == "regular"
     assert data["wins"] == 0
     assert data["losses"] == 0
+
+
+@pytest.mark.asyncio
+async def test_current_user_cache_invalidated(client: AsyncClient, db_session):
+    """Test cached principals pick up profile and is_active changes"""
+    reg_response = await client.post(
+        "/api/v1/auth/register",
+        json={
+            "username": "cache_test",
+            "email": "cache@example.com",
+            "password": "testpass123",
+            "stance": "regular"
+        }
+    )
+    headers = {"Authorization": f"Bearer {reg_response.json()['access_token']}"}
+    
+    # Warm the cache
+    response = await client.get("/api/v1/auth/me", headers=headers)
+    assert response.json()["display_name"] is None
+    
+    result = await db_session.execute(select(User).where(User.username == "cache_test"))
+    user = result.scalar_one()
+    user.display_name = "Cache Test"
+    await db_session.commit()
+    
+    response = await client.get("/api/v1/auth/me", headers=headers)
+    assert response.json()["display_name"] == "Cache Test"
+    
+    user.is_active = False
+    await db_session.commit()
+    
+    response = await client.get("/api/v1/auth/me", headers=headers)
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_cached_user_skips_local_tier_without_relay(monkeypatch):
+    """Test several workers with no invalidation relay never keep users in process"""
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 4)
+
+    await principal_cache.users.set("u1", {"id": "u1"})
+
+    assert principal_cache.users.local.get("u1") is None
+    assert await principal_cache.users.get("u1") is None
+
+
+@pytest.mark.asyncio
+async def test_user_invalidation_reaches_other_workers(monkeypatch):
+    """Test a user dropped on another worker leaves this worker's local tier"""
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 4)
+    redis = FakeRedis()
+    monkeypatch.setattr(cache, "get_redis", lambda: redis)
+    await invalidation_relay.start()
+    try:
+        await principal_cache.users.set("u1", {"id": "u1"})
+        assert principal_cache.users.local.get("u1") is not None
+
+        # What another worker's principal_cache.invalidate_user sends
+        await invalidation_relay.publish("user", "u1")
+        for _ in range(50):
+            if principal_cache.users.local.get("u1") is None:
+                break
+            await asyncio.sleep(0.01)
+
+        assert principal_cache.users.local.get("u1") is None
+    finally:
+        await invalidation_relay.stop()
@@ -0,0 +1,325 @@
+import json
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from fastapi import HTTPException
+from httpx import AsyncClient
+from sqlalchemy import delete
+
+from app.core.config import settings
+from app.models.clip import Clip, ClipTypeEnum, ClipStatusEnum
+from app.models.match import Match
+from app.services import storage_service
+from app.services.game_service import GameService
+from app.services.match_cache import match_cache
+from app.services.uploads import UploadService
+from tests.conftest import TestSessionLocal
+from tests.test_matches import register, create_challenge
+
+
+async def start_match(client: AsyncClient) -> tuple:
+    """Two registered players with an accepted challenge"""
+    tony = await register(client, "tony")
+    rodney = await register(client, "rodney")
+    challenge = await create_challenge(client, tony)
+    await client.post(
+        f"/api/v1/matches/challenge/accept/{challenge['challenge_code']}",
+        headers=rodney
+    )
+    return tony, rodney, challenge["match_id"]
+
+
+async def init_upload(client: AsyncClient, headers: dict, match_id: str, clip_type: str, **extra) -> dict:
+    response = await client.post(
+        "/api/v1/clips/upload/init",
+        json={
+            "match_id": match_id,
+            "clip_type": clip_type,
+            "gps_lat": 34.05,
+            "gps_lng": -118.24,
+            "duration_seconds": 10,
+            "file_size_bytes": 5 * 1024 * 1024,
+            "trick_name": "kickflip",
+            **extra
+        },
+        headers=headers
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_upload_init_presigns_against_storage(client: AsyncClient, fake_s3):
+    """Test upload init returns a presigned PUT for the clip key"""
+    tony, _, match_id = await start_match(client)
+
+    data = await init_upload(client, tony, match_id, "trick_set")
+
+    assert data["upload_url"].startswith(f"{fake_s3.endpoint}/")
+    assert f"clips/{data['clip_id']}.mp4" in data["upload_url"]
+    assert "op=put_object" in data["upload_url"]
+
+
+@pytest.mark.asyncio
+async def test_view_url_is_cached(client: AsyncClient, fake_s3):
+    """Test repeated view URL requests reuse one presigned URL"""
+    tony, rodney, match_id = await start_match(client)
+    clip = await init_upload(client, tony, match_id, "trick_set")
+    presigned = fake_s3.presign_calls
+
+    first = await client.get(f"/api/v1/clips/{clip['clip_id']}/url", headers=rodney)
+    second = await client.get(f"/api/v1/clips/{clip['clip_id']}/url", headers=tony)
+
+    assert first.status_code == 200
+    assert first.json()["url"] == second.json()["url"]
+    assert "op=get_object" in first.json()["url"]
+    assert fake_s3.presign_calls == presigned + 1
+
+
+@pytest.mark.asyncio
+async def test_cached_view_url_reports_remaining_lifetime(client: AsyncClient, monkeypatch):
+    """Test a view URL served from cache says how long it really has left"""
+    tony, rodney, match_id = await start_match(client)
+    clip = await init_upload(client, tony, match_id, "trick_set")
+    clock = SimpleNamespace(monotonic=lambda: 0.0)
+    monkeypatch.setattr(storage_service, "time", clock)
+
+    first = await client.get(f"/api/v1/clips/{clip['clip_id']}/url", headers=rodney)
+    clock.monotonic = lambda: 1000.0
+    second = await client.get(f"/api/v1/clips/{clip['clip_id']}/url", headers=rodney)
+
+    assert first.json()["expires_in"] == 3600
+    assert second.json()["url"] == first.json()["url"]
+    assert second.json()["expires_in"] == 2600
+
+
+@pytest.mark.asyncio
+async def test_view_url_for_clip_whose_match_is_gone(client: AsyncClient):
+    """Test a clip left behind by a dropped match is not found rather than an error"""
+    tony, _, match_id = await start_match(client)
+    clip = await init_upload(client, tony, match_id, "trick_set")
+    async with TestSessionLocal() as session:
+        await session.execute(delete(Match).where(Match.id == match_id))
+        await session.commit()
+    match_cache.clear()  # Dropped partitions leave cached rows to expire
+
+    response = await client.get(f"/api/v1/clips/{clip['clip_id']}/url", headers=tony)
+
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_multipart_upload_resume_and_complete(client: AsyncClient, fake_s3):
+    """Test a large clip uploads in parts, resumes, and completes"""
+    tony, _, match_id = await start_match(client)
+    size = 12 * 1024 * 1024
+
+    data = await init_upload(client, tony, match_id, "trick_set", file_size_bytes=size)
+
+    assert data["upload_url"] is None
+    assert [p["part_number"] for p in data["part_urls"]] == [1, 2, 3]
+    assert all("op=upload_part" in p["url"] for p in data["part_urls"])
+
+    # Only the first part makes it before the connection drops
+    key = f"clips/{data['clip_id']}.mp4"
+    fake_s3.upload_part(Bucket=settings.S3_BUCKET_NAME, Key=key, UploadId=data["upload_id"], PartNumber=1, Body=b"a" * 10)
+
+    incomplete = await client.post(f"/api/v1/clips/upload/complete/{data['clip_id']}", headers=tony)
+    assert incomplete.status_code == 400
+
+    resume = await client.get(f"/api/v1/clips/upload/{data['clip_id']}/parts", headers=tony)
+    assert resume.status_code == 200
+    resumed = resume.json()
+    assert [p["part_number"] for p in resumed["uploaded_parts"]] == [1]
+    assert [p["part_number"] for p in resumed["part_urls"]] == [2, 3]
+
+    for part_number in (2, 3):
+        fake_s3.upload_part(Bucket=settings.S3_BUCKET_NAME, Key=key, UploadId=data["upload_id"], PartNumber=part_number, Body=b"b" * 10)
+
+    response = await client.post(f"/api/v1/clips/upload/complete/{data['clip_id']}", headers=tony)
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "approved"
+    assert fake_s3.objects[(settings.S3_BUCKET_NAME, key)] == b"a" * 10 + b"b" * 20
+
+
+@pytest.mark.asyncio
+async def test_multipart_complete_validates_before_stitching(client: AsyncClient, fake_s3):
+    """Test a rejected completion leaves the multipart upload open for a retry"""
+    tony, rodney, match_id = await start_match(client)
+    data = await init_upload(client, tony, match_id, "trick_set", file_size_bytes=12 * 1024 * 1024)
+    # Too far from the anchor once it gets to the server
+    async with TestSessionLocal() as session:
+        clip = await session.get(Clip, data["clip_id"])
+        clip.gps_lat = 35.0
+        await session.commit()
+
+    key = f"clips/{data['clip_id']}.mp4"
+    for number in (1, 2, 3):
+        fake_s3.upload_part(Bucket=settings.S3_BUCKET_NAME, Key=key, UploadId=data["upload_id"], PartNumber=number, Body=b"x")
+
+    response = await client.post(f"/api/v1/clips/upload/complete/{data['clip_id']}", headers=tony)
+
+    assert response.status_code == 400
+    assert data["upload_id"] in fake_s3.uploads
+    assert (settings.S3_BUCKET_NAME, key) not in fake_s3.objects
+
+
+@pytest.mark.asyncio
+async def test_multipart_complete_retry_after_s3_finished(client: AsyncClient, fake_s3):
+    """Test completing again succeeds when S3 already stitched the parts"""
+    tony, _, match_id = await start_match(client)
+    data = await init_upload(client, tony, match_id, "trick_set", file_size_bytes=12 * 1024 * 1024)
+    key = f"clips/{data['clip_id']}.mp4"
+    etags = [
+        fake_s3.upload_part(Bucket=settings.S3_BUCKET_NAME, Key=key, UploadId=data["upload_id"], PartNumber=n, Body=b"x")["ETag"]
+        for n in (1, 2, 3)
+    ]
+    # An earlier request completed the upload, then failed before committing
+    fake_s3.complete_multipart_upload(
+        Bucket=settings.S3_BUCKET_NAME,
+        Key=key,
+        UploadId=data["upload_id"],
+        MultipartUpload={"Parts": [{"PartNumber": n, "ETag": etag} for n, etag in zip((1, 2, 3), etags)]}
+    )
+
+    response = await client.post(f"/api/v1/clips/upload/complete/{data['clip_id']}", headers=tony)
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "approved"
+
+
+@pytest.mark.asyncio
+async def test_abandoned_uploads_are_discarded(client: AsyncClient, fake_s3):
+    """Test clips never completed are deleted and their parts aborted"""
+    tony, _, match_id = await start_match(client)
+    abandoned = await init_upload(client, tony, match_id, "trick_set", file_size_bytes=12 * 1024 * 1024)
+    fresh = await init_upload(client, tony, match_id, "trick_set")
+    async with TestSessionLocal() as session:
+        clip = await session.get(Clip, abandoned["clip_id"])
+        clip.uploaded_at = datetime.utcnow() - timedelta(days=2)
+        await session.commit()
+
+        assert await UploadService.discard_abandoned_uploads(session, timedelta(hours=24)) == 1
+
+    async with TestSessionLocal() as session:
+        assert await session.get(Clip, abandoned["clip_id"]) is None
+        assert await session.get(Clip, fresh["clip_id"]) is not None
+    assert abandoned["upload_id"] not in fake_s3.uploads
+
+
+@pytest.mark.asyncio
+async def test_complete_upload_queues_processing(client: AsyncClient):
+    """Test a completed upload is marked for transcoding without waiting on it"""
+    tony, _, match_id = await start_match(client)
+    clip = await init_upload(client, tony, match_id, "trick_set")
+
+    response = await client.post(f"/api/v1/clips/upload/complete/{clip['clip_id']}", headers=tony)
+
+    assert response.status_code == 200
+    assert response.json()["processing_status"] == "queued"
+    assert response.json()["rendition_url"] is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_judgements_conflict(client: AsyncClient):
+    """Test two judges reading the same match version cannot both apply"""
+    tony, rodney, match_id = await start_match(client)
+    trick = await init_upload(client, tony, match_id, "trick_set")
+    await client.post(f"/api/v1/clips/upload/complete/{trick['clip_id']}", headers=tony)
+    attempt = await init_upload(client, rodney, match_id, "trick_match")
+    await client.post(f"/api/v1/clips/upload/complete/{attempt['clip_id']}", headers=rodney)
+
+    async with TestSessionLocal() as first, TestSessionLocal() as second:
+        loaded = []
+        for session in (first, second):
+            match = await session.get(Match, match_id)
+            clip = await session.get(Clip, attempt["clip_id"])
+            loaded.append((session, match, clip))
+
+        session, match, clip = loaded[0]
+        judged = await GameService.judge_clip(session, match, clip, match.player1_id, approved=False)
+        assert judged.player2_letters == 1
+
+        session, match, clip = loaded[1]
+        with pytest.raises(HTTPException) as conflict:
+            await GameService.judge_clip(session, match, clip, match.player1_id, approved=False)
+        assert conflict.value.status_code == 409
+
+    response = await client.get(f"/api/v1/matches/{match_id}", headers=tony)
+    assert response.json()["player2_letters"] == 1
+
+
+async def add_clips(match_id: str, user_id: str, count: int, tied: bool = True) -> None:
+    """
+    Insert clips straight into the database
+    With tied, several share each uploaded_at; otherwise the insert sets it
+    """
+    started = datetime.utcnow()  # Clips never predate their match
+    async with TestSessionLocal() as session:
+        for i in range(count):
+            clip = Clip(
+                match_id=match_id,
+                user_id=user_id,
+                clip_type=ClipTypeEnum.TRICK_SET,
+                status=ClipStatusEnum.APPROVED,
+                video_url=f"https://fake-s3.local/sk8-clips/clips/{i}.mp4",
+                duration_seconds=10,
+                file_size_bytes=1024,
+                gps_lat=34.05,
+                gps_lng=-118.24,
+                recorded_at=started,
+            )
+            if tied:
+                clip.uploaded_at = started + timedelta(seconds=i // 3)  # Ties broken by id
+            session.add(clip)
+        await session.commit()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("tied", [True, False])
+async def test_match_clips_page_with_cursor(client: AsyncClient, tied):
+    """Test clip listing pages in (uploaded_at, id) order and reports the full total"""
+    tony, _, match_id = await start_match(client)
+    match = (await client.get(f"/api/v1/matches/{match_id}", headers=tony)).json()
+    # Untied, uploaded_at comes from the insert as for real uploads
+    await add_clips(match_id, match["player1_id"], 7, tied=tied)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get(f"/api/v1/clips/match/{match_id}", params=params, headers=tony)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 7
+        seen.extend(data["clips"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+
+    keys = [(c["uploaded_at"], c["id"]) for c in seen]
+    assert len(set(keys)) == 7
+    assert keys == sorted(keys)
+
+
+@pytest.mark.asyncio
+async def test_match_clips_stream_as_ndjson(client: AsyncClient):
+    """Test the streaming listing sends every clip, one JSON object per line"""
+    tony, rodney, match_id = await start_match(client)
+    match = (await client.get(f"/api/v1/matches/{match_id}", headers=tony)).json()
+    await add_clips(match_id, match["player1_id"], 7)
+
+    response = await client.get(f"/api/v1/clips/match/{match_id}/stream", headers=rodney)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    clips = [json.loads(line) for line in response.text.splitlines()]
+    paged = (await client.get(f"/api/v1/clips/match/{match_id}", headers=tony)).json()["clips"]
+    assert clips == paged
+
+    outsider = await register(client, "eric")
+    response = await client.get(f"/api/v1/clips/match/{match_id}/stream", headers=outsider)
+    assert response.status_code == 403
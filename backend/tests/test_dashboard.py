@@ -0,0 +1,82 @@
+import pytest
+from httpx import AsyncClient
+
+from tests.test_clips import init_upload
+from tests.test_matches import register, create_challenge
+
+
+async def play_opening_trick(client: AsyncClient, tony: dict, opponent: str) -> str:
+    """Accepted match where tony has set a trick the opponent has matched"""
+    challenger = await register(client, opponent)
+    challenge = await create_challenge(client, tony)
+    await client.post(
+        f"/api/v1/matches/challenge/accept/{challenge['challenge_code']}",
+        headers=challenger
+    )
+    match_id = challenge["match_id"]
+    trick = await init_upload(client, tony, match_id, "trick_set")
+    await client.post(f"/api/v1/clips/upload/complete/{trick['clip_id']}", headers=tony)
+    attempt = await init_upload(client, challenger, match_id, "trick_match")
+    await client.post(f"/api/v1/clips/upload/complete/{attempt['clip_id']}", headers=challenger)
+    return match_id
+
+
+@pytest.mark.asyncio
+async def test_dashboard_lists_matches_opponents_and_clips_to_judge(client: AsyncClient):
+    """Test the dashboard shows each match with its opponent and pending attempts"""
+    tony = await register(client, "tony")
+    match_id = await play_opening_trick(client, tony, "rodney")
+
+    response = await client.get("/api/v1/dashboard", headers=tony)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["user"]["username"] == "tony"
+    assert data["awaiting_judgement_count"] == 1
+    [match] = data["active_matches"]
+    assert match["id"] == match_id
+    assert match["opponent"]["username"] == "rodney"
+    assert [clip["clip_type"] for clip in match["awaiting_my_judgement"]] == ["trick_match"]
+
+
+@pytest.mark.asyncio
+async def test_dashboard_skips_attempts_not_uploaded(client: AsyncClient):
+    """Test an attempt that was started but never completed is not up for judging"""
+    tony = await register(client, "tony")
+    rodney = await register(client, "rodney")
+    challenge = await create_challenge(client, tony)
+    await client.post(
+        f"/api/v1/matches/challenge/accept/{challenge['challenge_code']}",
+        headers=rodney
+    )
+    trick = await init_upload(client, tony, challenge["match_id"], "trick_set")
+    await client.post(f"/api/v1/clips/upload/complete/{trick['clip_id']}", headers=tony)
+    await init_upload(client, rodney, challenge["match_id"], "trick_match")
+
+    response = await client.get("/api/v1/dashboard", headers=tony)
+
+    data = response.json()
+    assert data["awaiting_judgement_count"] == 0
+    assert data["active_matches"][0]["awaiting_my_judgement"] == []
+
+
+@pytest.mark.asyncio
+async def test_dashboard_query_count_does_not_grow_with_matches(client: AsyncClient, query_inspector):
+    """Test loading the dashboard takes the same number of queries for 1 or 3 matches"""
+    tony = await register(client, "tony")
+    await play_opening_trick(client, tony, "rodney")
+
+    with query_inspector.capture() as one_match:
+        response = await client.get("/api/v1/dashboard", headers=tony)
+    assert len(response.json()["active_matches"]) == 1
+
+    await play_opening_trick(client, tony, "eric")
+    await play_opening_trick(client, tony, "daewon")
+
+    with query_inspector.capture() as three_matches:
+        response = await client.get("/api/v1/dashboard", headers=tony)
+    assert len(response.json()["active_matches"]) == 3
+    assert response.json()["awaiting_judgement_count"] == 3
+
+    assert three_matches.count == one_match.count
+    assert not three_matches.repeated(2)
@@ -0,0 +1,20 @@
+import numpy as np
+
+from app.services.gps import batch_distances, haversine_miles, geohash_encode
+
+
+def test_batch_matches_scalar():
+    """Test the vectorized kernel agrees with the scalar Haversine"""
+    points = [(34.05, -118.24), (40.71, -74.00), (-33.87, 151.21)]
+    anchors = [(34.06, -118.25), (51.51, -0.13)]
+
+    distances = batch_distances(points, anchors)
+
+    assert distances.shape == (3, 2)
+    expected = [[haversine_miles(*p, *a) for a in anchors] for p in points]
+    assert np.allclose(distances, expected)
+
+
+def test_geohash_encode():
+    """Test geohash encoding against a known value"""
+    assert geohash_encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
@@ -0,0 +1,135 @@
+import pytest
+from httpx import AsyncClient
+
+from app.models.user import StanceEnum, User
+from app.services import leaderboard as leaderboard_module
+from app.services.leaderboard import Board, Leaderboard, _REBUILD_LOCK_KEY
+from tests.test_clips import start_match
+from tests.test_matches import register, create_challenge
+
+
+class RebuildRedis:
+    """The Redis calls a rebuild makes; the lock goes to whoever sets it first"""
+
+    def __init__(self, lock_holder=None):
+        self.data = {} if lock_holder is None else {_REBUILD_LOCK_KEY: lock_holder}
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def zadd(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+
+    async def rename(self, source, destination):
+        self.data[destination] = self.data.pop(source)
+
+    async def smembers(self, key):
+        return set()
+
+    async def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+
+
+def add_player(db_session, user_id: str, wins: int, losses: int) -> None:
+    db_session.add(User(
+        id=user_id,
+        username=user_id,
+        email=f"{user_id}@sk8.test",
+        hashed_password="x",
+        stance=StanceEnum.REGULAR,
+        wins=wins,
+        losses=losses
+    ))
+
+
+@pytest.mark.asyncio
+async def test_boards_read_from_database_without_redis(db_session):
+    """Test every worker's board agrees with the users table, ties by id"""
+    for user_id, wins, losses in [("a", 3, 0), ("b", 3, 1), ("c", 5, 5), ("d", 0, 0)]:
+        add_player(db_session, user_id, wins, losses)
+    await db_session.commit()
+    worker_a, worker_b = Leaderboard(), Leaderboard()
+
+    assert await worker_b.page(db_session, Board.WINS, 0, 10) == (3, [("c", 5.0), ("b", 3.0), ("a", 3.0)])
+    assert await worker_b.page(db_session, Board.WINS, 1, 1) == (3, [("b", 3.0)])
+    assert await worker_a.rank(db_session, Board.WINS, "a") == (2, 3.0, 3)
+    assert await worker_a.rank(db_session, Board.WINS, "d") == (None, None, 3)
+    assert await worker_a.rank(db_session, Board.WIN_RATE, "c") == (0, 0.5, 1)
+
+
+@pytest.mark.asyncio
+async def test_rebuild_releases_only_its_own_lock(db_session, monkeypatch):
+    """Test a rebuild fills the boards and deletes the lock it took"""
+    redis = RebuildRedis()
+    monkeypatch.setattr(leaderboard_module, "get_redis", lambda: redis)
+    add_player(db_session, "a", 3, 1)
+    await db_session.commit()
+    board = Leaderboard()
+
+    assert await board.rebuild(db_session) == 1
+
+    assert redis.data["sk8:leaderboard:wins"] == {"a": 3}
+    assert _REBUILD_LOCK_KEY not in redis.data
+
+
+@pytest.mark.asyncio
+async def test_rebuild_elsewhere_counts_as_built(db_session, monkeypatch):
+    """Test a worker that finds the lock taken reads the boards and leaves the lock alone"""
+    redis = RebuildRedis(lock_holder="another-worker")
+    monkeypatch.setattr(leaderboard_module, "get_redis", lambda: redis)
+    board = Leaderboard()
+
+    assert await board.rebuild(db_session) == 0
+
+    assert board._built
+    assert redis.data[_REBUILD_LOCK_KEY] == "another-worker"
+
+
+@pytest.mark.asyncio
+async def test_leaderboard_updates_on_match_completion(client: AsyncClient):
+    """Test a finished match ranks the winner first on wins and streak"""
+    tony, rodney, match_id = await start_match(client)
+    await client.post(f"/api/v1/matches/{match_id}/forfeit", headers=tony)
+
+    wins = await client.get("/api/v1/leaderboard/wins", headers=tony)
+    assert wins.status_code == 200
+    data = wins.json()
+    assert data["total"] == 2
+    assert [(e["rank"], e["username"], e["score"]) for e in data["entries"]] == [
+        (1, "rodney", 1.0),
+        (2, "tony", 0.0),
+    ]
+
+    # A second result on top of the built boards is applied incrementally
+    challenge = await create_challenge(client, tony)
+    await client.post(
+        f"/api/v1/matches/challenge/accept/{challenge['challenge_code']}",
+        headers=rodney
+    )
+    await client.post(f"/api/v1/matches/{challenge['match_id']}/forfeit", headers=tony)
+
+    me = await client.get("/api/v1/leaderboard/streak/me", headers=rodney)
+    assert me.json() == {"board": "streak", "total": 2, "rank": 1, "score": 2.0}
+
+    # Too few games for win rate yet
+    rate = await client.get("/api/v1/leaderboard/win_rate/me", headers=rodney)
+    assert rate.json()["rank"] is None
+
+
+@pytest.mark.asyncio
+async def test_unknown_board_is_rejected(client: AsyncClient):
+    """Test only the known boards are served"""
+    headers = await register(client, "tony")
+
+    response = await client.get("/api/v1/leaderboard/kickflips", headers=headers)
+
+    assert response.status_code == 422
+
@@ -0,0 +1,227 @@
+import pytest
+from datetime import datetime, timedelta
+from httpx import AsyncClient
+from sqlalchemy import select, update
+
+from app.core import cache
+from app.core.config import settings
+from app.models.challenge import ChallengeCode
+from app.models.match import Match, MatchStatusEnum
+from app.models.user import User
+from app.services.challenge_service import ChallengeService
+from app.services.match_cache import match_cache
+from tests.test_auth import FakeRedis
+
+
+async def register(client: AsyncClient, username: str) -> dict:
+    """Register a user and return auth headers"""
+    response = await client.post(
+        "/api/v1/auth/register",
+        json={
+            "username": username,
+            "email": f"{username}@example.com",
+            "password": "testpass123",
+            "stance": "regular"
+        }
+    )
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def create_challenge(client: AsyncClient, headers: dict) -> dict:
+    response = await client.post(
+        "/api/v1/matches/challenge/create",
+        json={"mode": "normal", "gps_lat": 34.05, "gps_lng": -118.24},
+        headers=headers
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_accept_challenge(client: AsyncClient):
+    """Test accepting a challenge activates the match"""
+    tony = await register(client, "tony")
+    rodney = await register(client, "rodney")
+    challenge = await create_challenge(client, tony)
+
+    response = await client.post(
+        f"/api/v1/matches/challenge/accept/{challenge['challenge_code']}",
+        headers=rodney
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["id"] == challenge["match_id"]
+    assert data["status"] == "active"
+    assert data["current_turn_user_id"] == data["player1_id"]
+
+
+@pytest.mark.asyncio
+async def test_accept_challenge_only_once(client: AsyncClient):
+    """Test a challenge cannot be accepted twice"""
+    tony = await register(client, "tony")
+    rodney = await register(client, "rodney")
+    bam = await register(client, "bam")
+    challenge = await create_challenge(client, tony)
+    url = f"/api/v1/matches/challenge/accept/{challenge['challenge_code']}"
+
+    assert (await client.post(url, headers=rodney)).status_code == 200
+    assert (await client.post(url, headers=bam)).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_accept_own_challenge(client: AsyncClient):
+    """Test accepting your own challenge is rejected"""
+    tony = await register(client, "tony")
+    challenge = await create_challenge(client, tony)
+
+    response = await client.post(
+        f"/api/v1/matches/challenge/accept/{challenge['challenge_code']}",
+        headers=tony
+    )
+
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_expired_challenge(client: AsyncClient, db_session):
+    """Test expired challenges cannot be accepted and get swept"""
+    tony = await register(client, "tony")
+    rodney = await register(client, "rodney")
+    challenge = await create_challenge(client, tony)
+
+    expired = datetime.utcnow() - timedelta(minutes=1)
+    await db_session.execute(
+        update(Match).where(Match.id == challenge["match_id"]).values(challenge_expires_at=expired)
+    )
+    await db_session.execute(update(ChallengeCode).values(expires_at=expired))
+    await db_session.commit()
+
+    response = await client.post(
+        f"/api/v1/matches/challenge/accept/{challenge['challenge_code']}",
+        headers=rodney
+    )
+    assert response.status_code == 404
+
+    assert await ChallengeService.expire_stale_challenges(db_session) == 1
+    match = await db_session.get(Match, challenge["match_id"])
+    await db_session.refresh(match)
+    assert match.status == MatchStatusEnum.ABANDONED
+    assert await db_session.get(ChallengeCode, challenge["challenge_code"]) is None
+
+
+@pytest.mark.asyncio
+async def test_match_history_pages(client: AsyncClient, db_session):
+    """Test history pages with a keyset cursor and reports the full total"""
+    tony = await register(client, "tony")
+    await register(client, "rodney")
+    me = (await client.get("/api/v1/auth/me", headers=tony)).json()
+    result = await db_session.execute(select(User).where(User.username == "rodney"))
+    rodney = result.scalar_one()
+
+    started = datetime(2026, 1, 1)
+    for i in range(5):
+        # Alternate seats so both player columns are covered
+        p1, p2 = (me["id"], rodney.id) if i % 2 else (rodney.id, me["id"])
+        db_session.add(Match(
+            player1_id=p1,
+            player2_id=p2,
+            status=MatchStatusEnum.COMPLETED,
+            winner_id=p1,
+            completed_at=started + timedelta(days=i // 2),  # Ties broken by id
+        ))
+    await db_session.commit()
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/api/v1/matches/history", params=params, headers=tony)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 5
+        seen.extend(data["matches"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+
+    assert len({m["id"] for m in seen}) == 5
+    keys = [(m["completed_at"], m["id"]) for m in seen]
+    assert keys == sorted(keys, reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_match_history_bad_cursor(client: AsyncClient):
+    """Test a garbage cursor is rejected"""
+    tony = await register(client, "tony")
+
+    response = await client.get("/api/v1/matches/history", params={"cursor": "nope"}, headers=tony)
+
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_match_cache_is_written_through(client: AsyncClient):
+    """Test reads fill the match cache and moves update it in place"""
+    tony = await register(client, "tony")
+    rodney = await register(client, "rodney")
+    challenge = await create_challenge(client, tony)
+    match_id = challenge["match_id"]
+    await client.post(f"/api/v1/matches/challenge/accept/{challenge['challenge_code']}", headers=rodney)
+
+    cached = match_cache.matches.local.get(match_id)
+    assert cached["status"] == "active"
+
+    response = await client.post(f"/api/v1/matches/{match_id}/forfeit", headers=tony)
+    assert response.status_code == 200
+
+    assert match_cache.matches.local.get(match_id)["status"] == "completed"
+    match = await client.get(f"/api/v1/matches/{match_id}", headers=rodney)
+    assert match.json()["status"] == "completed"
+    assert match.json()["winner_id"] == match.json()["player2_id"]
+
+
+@pytest.mark.asyncio
+async def test_match_cache_bypassed_without_relay(client: AsyncClient, db_session, monkeypatch):
+    """Test one of several workers without Redis invalidation never serves a cached match"""
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 4)
+    tony = await register(client, "tony")
+    rodney = await register(client, "rodney")
+    challenge = await create_challenge(client, tony)
+    match_id = challenge["match_id"]
+    await client.post(f"/api/v1/matches/challenge/accept/{challenge['challenge_code']}", headers=rodney)
+    assert match_cache.matches.local.get(match_id) is None
+
+    # Another worker finishing the match
+    await db_session.execute(
+        update(Match)
+        .where(Match.id == match_id)
+        .values(status=MatchStatusEnum.COMPLETED, version=Match.version + 1)
+    )
+    await db_session.commit()
+
+    match = await client.get(f"/api/v1/matches/{match_id}", headers=rodney)
+    assert match.json()["status"] == "completed"
+
+
+@pytest.mark.asyncio
+async def test_expired_challenge_invalidates_other_workers(client: AsyncClient, db_session, monkeypatch):
+    """Test the sweep tells every worker to drop the expired match, it publishes no event"""
+    redis = FakeRedis()
+    monkeypatch.setattr(cache, "get_redis", lambda: redis)
+    tony = await register(client, "tony")
+    challenge = await create_challenge(client, tony)
+    await db_session.execute(
+        update(Match)
+        .where(Match.id == challenge["match_id"])
+        .values(challenge_expires_at=datetime.utcnow() - timedelta(minutes=1))
+    )
+    await db_session.commit()
+
+    assert await ChallengeService.expire_stale_challenges(db_session) == 1
+    await match_cache.matches.wait_pending()
+
+    assert redis.messages.get_nowait() == f'["match", "{challenge["match_id"]}"]'
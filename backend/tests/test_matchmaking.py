@@ -0,0 +1,99 @@
+import pytest
+from datetime import datetime, timedelta
+from httpx import AsyncClient
+from sqlalchemy import update
+
+from app.models.match import MatchModeEnum
+from app.models.matchmaking import MatchmakingEntry
+from app.services.matchmaking import MatchmakingQueue
+from tests.test_matches import register
+
+
+@pytest.mark.asyncio
+async def test_pairs_players_within_radius(db_session):
+    """Test nearby players in the same mode are paired, oldest first"""
+    queue = MatchmakingQueue(radius_miles=1.0, wait_minutes=30)
+
+    assert await queue.join(db_session, "tony", MatchModeEnum.NORMAL, 34.0500, -118.2400) is None
+    assert await queue.join(db_session, "far", MatchModeEnum.NORMAL, 34.2000, -118.2400) is None
+    assert await queue.join(db_session, "long", MatchModeEnum.LONG, 34.0505, -118.2405) is None
+
+    match = await queue.join(db_session, "rodney", MatchModeEnum.NORMAL, 34.0510, -118.2410)
+
+    assert (match.player1_id, match.player2_id) == ("tony", "rodney")
+    assert (match.gps_anchor_lat, match.gps_anchor_lng) == (34.0500, -118.2400)
+    assert not await queue.is_waiting(db_session, "tony")
+    assert not await queue.is_waiting(db_session, "rodney")
+    assert await queue.is_waiting(db_session, "far")
+    assert await queue.is_waiting(db_session, "long")
+
+
+@pytest.mark.asyncio
+async def test_pairs_across_cell_boundary(db_session):
+    """Test players in adjacent geohash cells still find each other"""
+    queue = MatchmakingQueue(radius_miles=1.0, wait_minutes=30)
+    await queue.join(db_session, "tony", MatchModeEnum.NORMAL, 0.0001, -0.0001)
+
+    match = await queue.join(db_session, "rodney", MatchModeEnum.NORMAL, -0.0001, 0.0001)
+
+    assert match.player1_id == "tony"
+
+
+@pytest.mark.asyncio
+async def test_pairs_players_from_separate_queues(db_session):
+    """Test two workers' queues share waiting players through the table"""
+    worker_a = MatchmakingQueue(radius_miles=1.0, wait_minutes=30)
+    worker_b = MatchmakingQueue(radius_miles=1.0, wait_minutes=30)
+
+    assert await worker_a.join(db_session, "tony", MatchModeEnum.NORMAL, 34.05, -118.24) is None
+    match = await worker_b.join(db_session, "rodney", MatchModeEnum.NORMAL, 34.05, -118.24)
+
+    assert (match.player1_id, match.player2_id) == ("tony", "rodney")
+    assert await worker_a.join(db_session, "eric", MatchModeEnum.NORMAL, 34.05, -118.24) is None
+
+
+@pytest.mark.asyncio
+async def test_stale_entries_are_not_paired(db_session):
+    """Test players who stopped waiting long ago are skipped"""
+    queue = MatchmakingQueue(radius_miles=1.0, wait_minutes=30)
+    await queue.join(db_session, "tony", MatchModeEnum.NORMAL, 34.05, -118.24)
+    await db_session.execute(
+        update(MatchmakingEntry).values(joined_at=datetime.utcnow() - timedelta(hours=1))
+    )
+    await db_session.commit()
+
+    assert await queue.join(db_session, "rodney", MatchModeEnum.NORMAL, 34.05, -118.24) is None
+
+
+@pytest.mark.asyncio
+async def test_join_queue_creates_match(client: AsyncClient):
+    """Test the second nearby player gets an active match back"""
+    tony = await register(client, "tony")
+    rodney = await register(client, "rodney")
+    spot = {"mode": "normal", "gps_lat": 34.05, "gps_lng": -118.24}
+
+    first = await client.post("/api/v1/matches/queue/join", json=spot, headers=tony)
+    second = await client.post("/api/v1/matches/queue/join", json=spot, headers=rodney)
+
+    assert first.json() == {"status": "waiting", "match": None}
+    data = second.json()
+    assert data["status"] == "matched"
+    assert data["match"]["status"] == "active"
+
+    active = await client.get("/api/v1/matches/active", headers=tony)
+    assert active.json()["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_leave_queue(client: AsyncClient):
+    """Test a player who left is not paired"""
+    tony = await register(client, "tony")
+    rodney = await register(client, "rodney")
+    spot = {"mode": "normal", "gps_lat": 34.05, "gps_lng": -118.24}
+
+    await client.post("/api/v1/matches/queue/join", json=spot, headers=tony)
+    response = await client.delete("/api/v1/matches/queue", headers=tony)
+    second = await client.post("/api/v1/matches/queue/join", json=spot, headers=rodney)
+
+    assert response.status_code == 204
+    assert second.json()["status"] == "waiting"
@@ -0,0 +1,112 @@
+import json
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.core.metrics import (
+    Gauge,
+    Histogram,
+    Metric,
+    MetricsDirectory,
+    MetricsRegistry,
+    REQUEST_SECONDS,
+    REQUEST_QUERIES,
+    instrument_engine
+)
+from tests.conftest import engine
+from tests.test_matches import register
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Test bucket counts are cumulative and +Inf matches the count"""
+    histogram = Histogram("sk8_test_seconds", "Test", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "/x")
+
+    lines = histogram.render()
+
+    assert 'sk8_test_seconds_bucket{route="/x",le="0.1"} 2' in lines
+    assert 'sk8_test_seconds_bucket{route="/x",le="1"} 3' in lines
+    assert 'sk8_test_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+    assert 'sk8_test_seconds_count{route="/x"} 4' in lines
+
+
+def test_incomplete_metric_fails_when_created():
+    """Test a metric type missing part of the interface fails up front, not at scrape time"""
+    class Unmergeable(Metric):
+        type_name = "gauge"
+
+        def snapshot(self):
+            return {}
+
+        def samples(self, series):
+            return []
+
+    with pytest.raises(TypeError, match="combine"):
+        Unmergeable("sk8_test", "Test")
+
+
+@pytest.mark.asyncio
+async def test_requests_and_queries_are_recorded_per_route(client: AsyncClient):
+    """Test a request is timed under its route template with its SQL counted"""
+    instrument_engine(engine)
+    headers = await register(client, "tony")
+    requests_before = REQUEST_SECONDS.count("GET", "/api/v1/matches/{match_id}", "404")
+    queries_before = REQUEST_QUERIES.total("GET", "/api/v1/matches/{match_id}")
+
+    await client.get("/api/v1/matches/nope", headers=headers)
+
+    assert REQUEST_SECONDS.count("GET", "/api/v1/matches/{match_id}", "404") == requests_before + 1
+    assert REQUEST_QUERIES.total("GET", "/api/v1/matches/{match_id}") > queries_before
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'sk8_http_request_duration_seconds_count{method="GET",route="/api/v1/matches/{match_id}",status="404"}' in response.text
+    assert "sk8_db_query_duration_seconds_bucket" in response.text
+
+
+def test_scrape_adds_up_every_workers_snapshot(tmp_path, monkeypatch):
+    """Test any worker's scrape totals all workers, without gauges of exited ones"""
+    def worker_registry():
+        registry = MetricsRegistry()
+        latency = registry.register(Histogram("sk8_test_seconds", "Test", ("route",), buckets=(0.1, 1.0)))
+        busy = registry.register(Gauge("sk8_test_busy", "Test"))
+        return registry, latency, busy
+
+    directory = MetricsDirectory(str(tmp_path))
+    other, other_latency, other_busy = worker_registry()
+    other_latency.observe(0.05, "/x")
+    other_busy.inc()
+    exited, exited_latency, exited_busy = worker_registry()
+    exited_latency.observe(3.0, "/x")
+    exited_busy.inc()
+    (tmp_path / "1001.json").write_text(json.dumps(other.snapshot()))
+    (tmp_path / "1002.json").write_text(json.dumps(exited.snapshot()))
+    monkeypatch.setattr("app.core.metrics._process_alive", lambda pid: pid == 1001)
+
+    scraped, scraped_latency, scraped_busy = worker_registry()
+    scraped_latency.observe(0.5, "/x")
+    scraped_busy.inc()
+    directory.write(scraped.snapshot())
+    lines = scraped.render(directory.read_others()).splitlines()
+
+    assert 'sk8_test_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 'sk8_test_seconds_bucket{route="/x",le="1"} 2' in lines
+    assert 'sk8_test_seconds_count{route="/x"} 3' in lines
+    assert "sk8_test_busy 2" in lines
+    # Rendering doesn't fold other workers into this one's own series
+    assert scraped_latency.count("/x") == 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_token_required_when_set(client: AsyncClient, monkeypatch):
+    """Test /metrics rejects scrapes without the configured bearer token"""
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "s3cret")
+
+    denied = await client.get("/metrics")
+    allowed = await client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+
+    assert denied.status_code == 401
+    assert allowed.status_code == 200
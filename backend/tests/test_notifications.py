@@ -0,0 +1,111 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.models.match import Match, MatchStatusEnum
+from app.services.notification import NotificationBus, notification_bus
+from tests.conftest import TestSessionLocal
+from tests.test_clips import start_match, init_upload
+from tests.test_matches import register
+
+
+@pytest.mark.asyncio
+async def test_bus_fans_out_per_match_and_drops_oldest():
+    """Test subscribers only see their match and slow readers lose old events"""
+    bus = NotificationBus(queue_size=2)
+
+    async with bus.subscribe("m1") as first, bus.subscribe("m1") as second, bus.subscribe("m2") as other:
+        for n in range(3):
+            await bus.publish({"type": "turn_switched", "match_id": "m1", "n": n})
+
+        assert first.qsize() == 2 and second.qsize() == 2
+        assert other.empty()
+        event_type, data = first.get_nowait()
+        assert event_type == "turn_switched"
+        assert '"n": 1' in data
+
+    assert bus.subscriber_count("m1") == 0
+
+
+@pytest.mark.asyncio
+async def test_several_workers_need_redis(monkeypatch):
+    """Test the bus won't start under several workers with nothing to relay events"""
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 4)
+    bus = NotificationBus(queue_size=2)
+
+    with pytest.raises(RuntimeError, match="REDIS_ENABLED"):
+        await bus.start()
+
+
+@pytest.mark.asyncio
+async def test_moves_publish_match_events(client: AsyncClient):
+    """Test setting a trick pushes a turn switch to match subscribers"""
+    tony, rodney, match_id = await start_match(client)
+
+    async with notification_bus.subscribe(match_id) as events:
+        clip = await init_upload(client, tony, match_id, "trick_set")
+        await client.post(f"/api/v1/clips/upload/complete/{clip['clip_id']}", headers=tony)
+        await client.post(f"/api/v1/matches/{match_id}/forfeit", headers=rodney)
+
+        received = [events.get_nowait()[0] for _ in range(events.qsize())]
+
+    assert received == ["turn_switched", "match_forfeited"]
+
+
+@pytest.mark.asyncio
+async def test_event_stream_ends_for_finished_match(client: AsyncClient):
+    """Test the SSE stream opens with a snapshot and closes once the match is over"""
+    tony, rodney, match_id = await start_match(client)
+    await client.post(f"/api/v1/matches/{match_id}/forfeit", headers=rodney)
+
+    response = await asyncio.wait_for(
+        client.get(f"/api/v1/matches/{match_id}/events", headers=tony), timeout=5
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.startswith("event: snapshot\ndata: ")
+    assert '"status": "completed"' in response.text
+
+
+@pytest.mark.asyncio
+async def test_event_stream_snapshot_includes_moves_before_subscribing(client: AsyncClient, monkeypatch):
+    """Test a move committed while the stream is subscribing is in the snapshot"""
+    tony, rodney, match_id = await start_match(client)
+    subscribe = notification_bus.subscribe
+
+    @asynccontextmanager
+    async def subscribe_after_a_move(match_id):
+        # Committed once the route has loaded the match, with no event published
+        async with TestSessionLocal() as session:
+            await session.execute(
+                update(Match)
+                .where(Match.id == match_id)
+                .values(status=MatchStatusEnum.COMPLETED, winner_id=Match.player1_id)
+            )
+            await session.commit()
+        async with subscribe(match_id) as events:
+            yield events
+
+    monkeypatch.setattr(notification_bus, "subscribe", subscribe_after_a_move)
+
+    response = await asyncio.wait_for(
+        client.get(f"/api/v1/matches/{match_id}/events", headers=tony), timeout=5
+    )
+
+    assert '"status": "completed"' in response.text
+
+
+@pytest.mark.asyncio
+async def test_event_stream_is_players_only(client: AsyncClient):
+    """Test only the two players can subscribe to a match"""
+    _, _, match_id = await start_match(client)
+    bucky = await register(client, "bucky")
+
+    response = await client.get(f"/api/v1/matches/{match_id}/events", headers=bucky)
+
+    assert response.status_code == 403
@@ -0,0 +1,50 @@
+import pytest
+from datetime import date, datetime, timedelta
+from httpx import AsyncClient
+
+from app.core.tasks import background_jobs
+from app.models.challenge import ChallengeCode
+from app.services.challenge_service import ChallengeService
+from app.services.partitions import add_months, month_start, partition_month, partition_name
+from tests.test_matches import register, create_challenge
+
+
+def test_month_arithmetic():
+    """Test month stepping wraps years in both directions"""
+    assert month_start(datetime(2026, 10, 17, 23, 59)) == date(2026, 10, 1)
+    assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert add_months(date(2026, 1, 1), -13) == date(2024, 12, 1)
+
+
+def test_partition_names_round_trip():
+    """Test partition names encode their month and the default partition has none"""
+    name = partition_name("matches", date(2026, 3, 1))
+    assert name == "matches_p202603"
+    assert partition_month("matches", name) == date(2026, 3, 1)
+    assert partition_month("clips", name) is None
+    assert partition_month("matches", "matches_default") is None
+
+
+def test_maintenance_job_only_on_postgres():
+    """Test the partition job isn't registered on SQLite"""
+    assert "partition-maintenance" not in [name for name, _, _ in background_jobs._jobs]
+
+
+@pytest.mark.asyncio
+async def test_challenge_code_taken_in_registry_is_redrawn(client: AsyncClient, db_session, monkeypatch):
+    """Test the code registry, not the matches table, decides whether a code is free"""
+    tony = await register(client, "tony")
+    db_session.add(ChallengeCode(
+        code="taken",
+        match_id="elsewhere",
+        match_created_at=datetime.utcnow(),
+        expires_at=datetime.utcnow() + timedelta(hours=1)
+    ))
+    await db_session.commit()
+    codes = iter(["taken", "fresh"])
+    monkeypatch.setattr(ChallengeService, "generate_code", staticmethod(lambda: next(codes)))
+
+    challenge = await create_challenge(client, tony)
+
+    assert challenge["challenge_code"] == "fresh"
@@ -0,0 +1,70 @@
+import logging
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.core.query_inspector import statement_shape
+from app.models.user import User
+from tests.conftest import TestSessionLocal
+from tests.test_clips import start_match, init_upload
+
+
+def test_statement_shape_collapses_parameter_lists():
+    """Test IN lists of any length share a shape"""
+    two = statement_shape("SELECT id FROM users\n WHERE id IN (?, ?)")
+    five = statement_shape("SELECT id FROM users WHERE id IN (?, ?, ?, ?, ?)")
+
+    assert two == five == "SELECT id FROM users WHERE id IN (...)"
+
+
+@pytest.mark.asyncio
+async def test_repeated_queries_are_flagged(client: AsyncClient, query_inspector, monkeypatch, caplog):
+    """Test one query per row shows up as a repeated shape and is logged"""
+    await start_match(client)
+    monkeypatch.setattr(query_inspector, "n_plus_one_threshold", 2)
+
+    with caplog.at_level(logging.WARNING, logger="app.core.query_inspector"):
+        async with TestSessionLocal() as session:
+            with query_inspector.capture() as log:
+                for username in ("tony", "rodney"):
+                    await session.execute(select(User).where(User.username == username))
+
+    [(shape, times)] = log.repeated(2)
+    assert times == 2
+    assert shape.startswith("SELECT users.id")
+    assert "Possible N+1" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_slow_queries_are_logged_with_route(client: AsyncClient, query_inspector, monkeypatch, caplog):
+    """Test statements over the threshold are logged with the request route"""
+    monkeypatch.setattr(query_inspector, "slow_ms", 0)
+
+    with caplog.at_level(logging.WARNING, logger="app.core.query_inspector"):
+        async with TestSessionLocal() as session:
+            with query_inspector.capture({"method": "GET", "path": "/api/v1/dashboard"}):
+                await session.execute(select(User.id))
+
+    assert "Slow query" in caplog.text
+    assert "GET /api/v1/dashboard" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_judging_runs_no_repeated_queries(client: AsyncClient, query_inspector):
+    """Test judging a clip loads each row once"""
+    tony, rodney, match_id = await start_match(client)
+    trick = await init_upload(client, tony, match_id, "trick_set")
+    await client.post(f"/api/v1/clips/upload/complete/{trick['clip_id']}", headers=tony)
+    attempt = await init_upload(client, rodney, match_id, "trick_match")
+    await client.post(f"/api/v1/clips/upload/complete/{attempt['clip_id']}", headers=rodney)
+
+    with query_inspector.capture() as log:
+        response = await client.post(
+            "/api/v1/clips/judge",
+            json={"clip_id": attempt["clip_id"], "approved": False},
+            headers=tony
+        )
+
+    assert response.status_code == 200
+    assert not log.repeated(2)
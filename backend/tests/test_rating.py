@@ -0,0 +1,138 @@
+import numpy as np
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import delete, event, select, update
+
+from app.models.user import User
+
+from app.services.rating import RatingParams, RatingService, assign_waves, recompute_ratings, replay_chunk
+from tests.conftest import TestSessionLocal, engine
+from tests.test_clips import start_match
+from tests.test_matches import create_challenge, register
+
+
+def test_wave_replay_matches_sequential_replay():
+    """Test the vectorized replay gives exactly the one-by-one result"""
+    rng = np.random.default_rng(42)
+    players = 50
+    params = RatingParams(provisional_games=5)
+    winners = rng.integers(0, players, 2000)
+    losers = (winners + rng.integers(1, players, 2000)) % players
+
+    ratings = np.full(players, params.initial)
+    games = np.zeros(players, dtype=np.int64)
+    for chunk in range(0, 2000, 300):
+        replay_chunk(ratings, games, winners[chunk:chunk + 300], losers[chunk:chunk + 300], params)
+
+    expected = [params.initial] * players
+    played = [0] * players
+    for w, l in zip(winners.tolist(), losers.tolist()):
+        up, down = RatingService.rating_deltas(expected[w], played[w], expected[l], played[l], params)
+        expected[w] += up
+        expected[l] += down
+        played[w] += 1
+        played[l] += 1
+
+    assert np.allclose(ratings, expected)
+    assert games.tolist() == played
+
+
+def test_waves_never_repeat_a_player():
+    """Test no player appears twice in one wave"""
+    waves = assign_waves(np.array([0, 2, 0, 1]), np.array([1, 3, 2, 3]))
+
+    assert waves.tolist() == [0, 0, 1, 1]
+
+
+@pytest.mark.asyncio
+async def test_completed_match_moves_ratings(client: AsyncClient):
+    """Test the winner gains exactly what the loser drops between equals"""
+    tony, rodney, match_id = await start_match(client)
+
+    await client.post(f"/api/v1/matches/{match_id}/forfeit", headers=tony)
+
+    tony_rating = (await client.get("/api/v1/auth/me", headers=tony)).json()["rating"]
+    rodney_rating = (await client.get("/api/v1/auth/me", headers=rodney)).json()["rating"]
+    assert rodney_rating == pytest.approx(1520.0)
+    assert tony_rating == pytest.approx(1480.0)
+
+
+@pytest.mark.asyncio
+async def test_stats_update_players_in_id_order(client: AsyncClient):
+    """Test both players' rows are updated in id order whoever won, so they can't deadlock"""
+    tony, rodney, match_id = await start_match(client)
+    ids = {
+        (await client.get("/api/v1/auth/me", headers=headers)).json()["id"]: headers
+        for headers in (tony, rodney)
+    }
+    # The lower id forfeits, so the winner has the higher one
+    forfeiting = ids[min(ids)]
+    updated = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE users"):
+            updated.append(parameters[-1])
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        await client.post(f"/api/v1/matches/{match_id}/forfeit", headers=forfeiting)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+    assert updated == sorted(ids)
+
+
+@pytest.mark.asyncio
+async def test_recompute_reproduces_incremental_ratings(client: AsyncClient):
+    """Test replaying history lands on every rating the live updates produced"""
+    tony, rodney, match_id = await start_match(client)
+    await client.post(f"/api/v1/matches/{match_id}/forfeit", headers=tony)
+    bucky = await register(client, "bucky")
+    challenge = await create_challenge(client, rodney)
+    await client.post(f"/api/v1/matches/challenge/accept/{challenge['challenge_code']}", headers=bucky)
+    await client.post(f"/api/v1/matches/{challenge['match_id']}/forfeit", headers=rodney)
+
+    async with TestSessionLocal() as db:
+        live = (await db.execute(select(User.id, User.rating, User.rated_games))).all()
+        summary = await recompute_ratings(db)
+        replayed = dict((await db.execute(select(User.id, User.rating))).all())
+
+    assert summary["matches"] == 2
+    assert summary["changed"] == 0
+    for user_id, rating, rated_games in live:
+        assert rated_games > 0
+        assert replayed[user_id] == pytest.approx(rating, abs=1e-9)
+
+
+@pytest.mark.asyncio
+async def test_recompute_refreshes_cached_principals(client: AsyncClient):
+    """Test /auth/me serves the replayed rating, not a cached one"""
+    tony, rodney, match_id = await start_match(client)
+    await client.post(f"/api/v1/matches/{match_id}/forfeit", headers=tony)
+    async with TestSessionLocal() as db:
+        await db.execute(update(User).values(rating=1000.0))
+        await db.commit()
+    assert (await client.get("/api/v1/auth/me", headers=rodney)).json()["rating"] == 1000.0
+
+    async with TestSessionLocal() as db:
+        summary = await recompute_ratings(db)
+
+    assert summary["changed"] == 2
+    assert (await client.get("/api/v1/auth/me", headers=rodney)).json()["rating"] == pytest.approx(1520.0)
+
+
+@pytest.mark.asyncio
+async def test_recompute_counts_games_of_deleted_players(client: AsyncClient):
+    """Test history against a player no longer in users still rates their opponent"""
+    tony, rodney, match_id = await start_match(client)
+    await client.post(f"/api/v1/matches/{match_id}/forfeit", headers=tony)
+    async with TestSessionLocal() as db:
+        live = dict((await db.execute(select(User.username, User.rating))).all())
+        await db.execute(delete(User).where(User.username == "rodney"))
+        await db.commit()
+
+        summary = await recompute_ratings(db)
+        replayed = dict((await db.execute(select(User.username, User.rating))).all())
+
+    assert summary == {**summary, "players": 1, "matches": 1, "changed": 0}
+    assert replayed == {"tony": pytest.approx(live["tony"])}
@@ -0,0 +1,94 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import orjson
+
+from app.models.clip import Clip, ClipTypeEnum, ClipStatusEnum, ClipProcessingStatusEnum
+from app.models.match import Match, MatchModeEnum, MatchStatusEnum
+from app.schemas.clip import ClipResponse
+from app.schemas.match import MatchResponse
+from app.utils.serialization import RowSerializer, dumps
+
+
+def validated(schema, row) -> dict:
+    """What the response_model path would send for a row"""
+    return json.loads(schema.model_validate(row).model_dump_json())
+
+
+def test_match_rows_match_validated_output():
+    """Test the fast path encodes a match exactly like the Pydantic path"""
+    match = Match(
+        id="m1",
+        player1_id="u1",
+        player2_id="u2",
+        mode=MatchModeEnum.LONG,
+        status=MatchStatusEnum.ACTIVE,
+        current_turn_user_id="u1",
+        player1_letters=2,
+        player2_letters=0,
+        gps_anchor_lat=34.05,
+        gps_anchor_lng=-118.24,
+        created_at=datetime(2026, 1, 1, 12, 0, 0, 123456),
+        started_at=datetime(2026, 1, 1, 12, 5),
+        last_activity=datetime(2026, 1, 1, 12, 30),
+    )
+
+    fast = orjson.loads(dumps(RowSerializer(MatchResponse).rows([match])))
+
+    assert fast == [validated(MatchResponse, match)]
+
+
+def test_aware_datetimes_match_validated_output():
+    """Test UTC datetimes, as PostgreSQL returns them, get Pydantic's Z suffix"""
+    match = Match(
+        id="m1",
+        player1_id="u1",
+        player2_id="u2",
+        mode=MatchModeEnum.NORMAL,
+        status=MatchStatusEnum.ACTIVE,
+        player1_letters=0,
+        player2_letters=0,
+        gps_anchor_lat=34.05,
+        gps_anchor_lng=-118.24,
+        created_at=datetime(2026, 1, 1, 12, 0, 0, 123456, tzinfo=timezone.utc),
+        last_activity=datetime(2026, 1, 1, 14, 30, tzinfo=timezone(timedelta(hours=2))),
+    )
+
+    fast = orjson.loads(dumps(RowSerializer(MatchResponse).row(match)))
+
+    assert fast["created_at"] == "2026-01-01T12:00:00.123456Z"
+    assert fast == validated(MatchResponse, match)
+
+
+def test_clip_rows_match_validated_output():
+    """Test the fast path encodes a processed clip exactly like the Pydantic path"""
+    clip = Clip(
+        id="c1",
+        match_id="m1",
+        user_id="u1",
+        clip_type=ClipTypeEnum.TRICK_SET,
+        status=ClipStatusEnum.PENDING,
+        video_url="https://sk8-clips.s3.amazonaws.com/clips/m1/c1.mp4",
+        thumbnail_url="https://sk8-clips.s3.amazonaws.com/thumbnails/c1.jpg",
+        processing_status=ClipProcessingStatusEnum.READY,
+        duration_seconds=8.5,
+        file_size_bytes=5 * 1024 * 1024,
+        trick_name="kickflip",
+        gps_lat=34.05,
+        gps_lng=-118.24,
+        gps_verified=True,
+        recorded_at=datetime(2026, 1, 1, 12, 10),
+        uploaded_at=datetime(2026, 1, 1, 12, 11, 5, 42),
+        extra_data={"preview_sprite": {
+            "url": "https://sk8-clips.s3.amazonaws.com/previews/c1_sprite.webp",
+            "columns": 5,
+            "rows": 2,
+            "tile_width": 160,
+            "tile_height": 90,
+            "interval_seconds": 0.85,
+        }},
+    )
+
+    fast = orjson.loads(dumps(RowSerializer(ClipResponse).row(clip)))
+
+    assert fast == validated(ClipResponse, clip)
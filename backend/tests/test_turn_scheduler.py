@@ -0,0 +1,52 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import update
+
+from app.models.match import Match, MatchModeEnum, MatchStatusEnum
+from app.models.user import User, StanceEnum
+from app.services.game_service import GameService
+from app.services.turn_scheduler import TurnDeadlineScheduler
+
+
+def test_reschedule_replaces_deadline():
+    """Test only the latest deadline for a match is honoured"""
+    scheduler = TurnDeadlineScheduler()
+    now = datetime.utcnow()
+
+    scheduler.schedule("a", now - timedelta(seconds=5))
+    scheduler.schedule("b", now - timedelta(seconds=1))
+    scheduler.schedule("a", now + timedelta(minutes=2))
+
+    assert scheduler.pop_due(now, limit=10) == ["b"]
+    assert scheduler.next_deadline() == now + timedelta(minutes=2)
+    assert len(scheduler) == 1
+
+
+@pytest.mark.asyncio
+async def test_rebuild_and_expire_turns(db_session):
+    """Test expired turns are forfeited from a scheduler rebuilt from the DB"""
+    tony = User(username="tony", email="tony@example.com", hashed_password="x", stance=StanceEnum.REGULAR)
+    rodney = User(username="rodney", email="rodney@example.com", hashed_password="x", stance=StanceEnum.GOOFY)
+    db_session.add_all([tony, rodney])
+    await db_session.commit()
+
+    match = await GameService.create_match(db_session, tony.id, rodney.id, MatchModeEnum.NORMAL, 34.05, -118.24)
+    await db_session.execute(
+        update(Match)
+        .where(Match.id == match.id)
+        .values(last_activity=datetime.utcnow() - timedelta(hours=1))
+    )
+    await db_session.commit()
+
+    scheduler = TurnDeadlineScheduler()
+    await scheduler.rebuild(db_session)
+    due = scheduler.pop_due(datetime.utcnow(), limit=10)
+    assert due == [match.id]
+
+    assert await GameService.expire_turns(db_session, due) == 1
+
+    await db_session.refresh(match)
+    await db_session.refresh(rodney)
+    assert match.status == MatchStatusEnum.COMPLETED
+    assert match.winner_id == rodney.id
+    assert rodney.wins == 1
@@ -0,0 +1,172 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import update
+
+from app.models.clip import Clip, ClipProcessingStatusEnum
+from app.services import video
+from app.services.video import VideoPipeline, build_sprite, output_size, sprite_timestamps, stream_frame_rate
+from tests.conftest import TestSessionLocal
+from tests.test_clips import start_match, init_upload
+
+
+def test_sprite_timestamps_split_clip_evenly():
+    """Test one sprite tile per equal slice, starting at zero"""
+    assert sprite_timestamps(10.0, frames=5) == [0.0, 2.0, 4.0, 6.0, 8.0]
+
+
+def test_build_sprite_lays_tiles_out_row_major():
+    """Test tiles land in order and a short last row is padded black"""
+    tiles = [np.full((2, 3, 3), value, dtype=np.uint8) for value in (10, 20, 30)]
+
+    sprite = build_sprite(tiles, columns=2)
+
+    assert sprite.shape == (4, 6, 3)
+    assert (sprite[:2, :3] == 10).all()
+    assert (sprite[:2, 3:] == 20).all()
+    assert (sprite[2:, :3] == 30).all()
+    assert (sprite[2:, 3:] == 0).all()
+
+
+def test_output_size_only_downscales_to_even_sides():
+    """Test renditions cap the height, keep aspect ratio and never upscale"""
+    assert output_size(3840, 2160, 720) == (1280, 720)
+    assert output_size(1080, 1920, 720) == (404, 720)
+    assert output_size(641, 361, 720) == (640, 360)
+
+
+def test_unknown_frame_rate_falls_back():
+    """Test ffprobe's "0/0" is treated as missing rather than passed to the fps filter"""
+    assert stream_frame_rate({"avg_frame_rate": "30000/1001", "r_frame_rate": "30/1"}) == "30000/1001"
+    assert stream_frame_rate({"avg_frame_rate": "0/0", "r_frame_rate": "60/1"}) == "60/1"
+    assert stream_frame_rate({"avg_frame_rate": "0/0", "r_frame_rate": "0/0"}) == "30/1"
+    assert stream_frame_rate({}) == "30/1"
+
+
+def fake_previews(clip_id, source_url, duration_seconds):
+    return {"sprite": {"key": f"sprites/{clip_id}.webp", "columns": 5, "rows": 2}}
+
+
+@pytest_asyncio.fixture
+async def pipeline(client, monkeypatch):
+    """Pipeline on the test database with ffmpeg stubbed out, run in threads"""
+    transcoded = []
+
+    def fake_transcode(clip_id, source_url, lines):
+        transcoded.append(clip_id)
+        return {"rendition_key": f"renditions/{clip_id}.mp4", "size_bytes": 1, "watermark": {}}
+
+    monkeypatch.setattr(video, "AsyncSessionLocal", TestSessionLocal)
+    monkeypatch.setattr(video, "transcode_clip", fake_transcode)
+    monkeypatch.setattr(video, "generate_previews", fake_previews)
+
+    pipeline = VideoPipeline(workers=1, queue_size=10)
+    pipeline.transcoded = transcoded
+    await pipeline.start(executor=ThreadPoolExecutor(max_workers=1))
+    yield pipeline
+    await pipeline.stop()
+
+
+async def uploaded_clip(client: AsyncClient) -> str:
+    """A completed upload, left QUEUED for processing"""
+    tony, _, match_id = await start_match(client)
+    clip = await init_upload(client, tony, match_id, "trick_set")
+    await client.post(f"/api/v1/clips/upload/complete/{clip['clip_id']}", headers=tony)
+    return clip["clip_id"]
+
+
+async def set_processing(clip_id: str, started_at: datetime) -> None:
+    async with TestSessionLocal() as db:
+        await db.execute(
+            update(Clip)
+            .where(Clip.id == clip_id)
+            .values(processing_status=ClipProcessingStatusEnum.PROCESSING, processing_started_at=started_at)
+        )
+        await db.commit()
+
+
+async def load_clip(clip_id: str) -> Clip:
+    async with TestSessionLocal() as db:
+        return await db.get(Clip, clip_id)
+
+
+@pytest.mark.asyncio
+async def test_pipeline_marks_clip_ready(client: AsyncClient, pipeline):
+    """Test a submitted clip is claimed, transcoded once and marked READY"""
+    clip_id = await uploaded_clip(client)
+
+    assert pipeline.submit(clip_id)
+    await pipeline.join()
+
+    clip = await load_clip(clip_id)
+    assert clip.processing_status == ClipProcessingStatusEnum.READY
+    assert clip.rendition_url.endswith(f"renditions/{clip_id}.mp4")
+    assert clip.extra_data["preview_sprite"]["url"].endswith(f"sprites/{clip_id}.webp")
+    assert pipeline.transcoded == [clip_id]
+
+    # Finished clips are never picked up again
+    pipeline.submit(clip_id)
+    await pipeline.join()
+    assert pipeline.transcoded == [clip_id]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_marks_clip_failed(client: AsyncClient, pipeline, monkeypatch):
+    """Test a transcode error leaves the clip FAILED"""
+    def broken_transcode(clip_id, source_url, lines):
+        raise RuntimeError("ffmpeg exploded")
+
+    monkeypatch.setattr(video, "transcode_clip", broken_transcode)
+    clip_id = await uploaded_clip(client)
+
+    pipeline.submit(clip_id)
+    await pipeline.join()
+
+    clip = await load_clip(clip_id)
+    assert clip.processing_status == ClipProcessingStatusEnum.FAILED
+    assert clip.rendition_url is None
+
+
+@pytest.mark.asyncio
+async def test_pipeline_skips_clip_claimed_elsewhere(client: AsyncClient, pipeline):
+    """Test a clip another worker is processing is left alone until its lease runs out"""
+    clip_id = await uploaded_clip(client)
+    started_at = datetime.utcnow()
+    await set_processing(clip_id, started_at)
+
+    pipeline.submit(clip_id)
+    await pipeline.join()
+
+    clip = await load_clip(clip_id)
+    assert clip.processing_status == ClipProcessingStatusEnum.PROCESSING
+    assert clip.processing_started_at == started_at
+    assert pipeline.transcoded == []
+
+
+@pytest.mark.asyncio
+async def test_requeue_picks_queued_and_expired_leases(client: AsyncClient, pipeline):
+    """Test requeue resubmits QUEUED clips and abandoned PROCESSING ones only"""
+    tony, _, match_id = await start_match(client)
+    queued, fresh, abandoned = [
+        (await init_upload(client, tony, match_id, "trick_set"))["clip_id"] for _ in range(3)
+    ]
+    async with TestSessionLocal() as db:
+        await db.execute(
+            update(Clip)
+            .where(Clip.id == queued)
+            .values(processing_status=ClipProcessingStatusEnum.QUEUED)
+        )
+        await db.commit()
+    await set_processing(fresh, datetime.utcnow())
+    await set_processing(abandoned, datetime.utcnow() - timedelta(hours=2))
+
+    assert await pipeline.requeue_pending(older_than=timedelta(0)) == 2
+    await pipeline.join()
+
+    assert sorted(pipeline.transcoded) == sorted([queued, abandoned])
+    assert (await load_clip(abandoned)).processing_status == ClipProcessingStatusEnum.READY
+    assert (await load_clip(fresh)).processing_status == ClipProcessingStatusEnum.PROCESSING
@@ -0,0 +1,43 @@
+from datetime import datetime
+
+import numpy as np
+
+from app.utils.watermark import WatermarkOverlay, watermark_lines
+
+
+def make_overlay(opacity: float = 0.8) -> WatermarkOverlay:
+    lines = watermark_lines("a1b2c3d4e5", "tony", 34.05, -118.24, datetime(2026, 10, 17, 12, 0))
+    return WatermarkOverlay(lines, 640, 360, opacity=opacity)
+
+
+def test_watermark_lines_carry_match_user_gps_and_time():
+    """Test the burned-in text identifies the take"""
+    lines = watermark_lines("a1b2c3d4e5", "tony", 34.05, -118.24, datetime(2026, 10, 17, 12, 0))
+
+    assert lines == ["SK8 a1b2c3d4 @tony", "34.05000, -118.24000", "2026-10-17 12:00:00 UTC"]
+
+
+def test_overlay_blends_only_its_box():
+    """Test frames are changed inside the bottom-left box and nowhere else"""
+    overlay = make_overlay()
+    frame = np.full((360, 640, 3), 128, dtype=np.uint8)
+
+    overlay.apply(frame)
+
+    box = frame[overlay.y:overlay.y + overlay.height, overlay.x:overlay.x + overlay.width]
+    outside = frame.copy()
+    outside[overlay.y:overlay.y + overlay.height, overlay.x:overlay.x + overlay.width] = 128
+    assert overlay.y + overlay.height < 360 and overlay.x > 0
+    assert (outside == 128).all()
+    assert box.max() > 128 and box.min() < 128
+
+
+def test_zero_opacity_overlay_is_a_no_op():
+    """Test the integer blend is exact when the overlay is invisible"""
+    overlay = make_overlay(opacity=0.0)
+    frame = np.random.default_rng(7).integers(0, 256, (360, 640, 3), dtype=np.uint8)
+    original = frame.copy()
+
+    overlay.apply(frame)
+
+    assert (frame == original).all()